@@ -0,0 +1,288 @@
+"""Archive ZIP du projet générée en streaming.
+
+Les entrées sont compressées au fil du parcours de l'arborescence et
+envoyées par morceaux : la mémoire reste constante quelle que soit la
+taille du projet et le premier octet part dès le premier fichier.
+
+ArchiveCache conserve sur disque la dernière archive construite, adressée
+par l'empreinte du manifeste de l'arborescence, pour que les téléchargements
+répétés ne coûtent que des lectures disque.
+"""
+import asyncio
+import contextlib
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Optional, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Exclure UNIQUEMENT les dossiers très volumineux
+EXCLUDE_DIRS = {'node_modules', '.git'}
+
+# Taille des blocs lus sur le disque et envoyés au client
+CHUNK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def iter_project_files(root: Path) -> Iterator[Path]:
+    """Parcourir les fichiers du projet dans un ordre stable, sans descendre dans les dossiers exclus"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in EXCLUDE_DIRS)
+        for filename in sorted(filenames):
+            yield Path(dirpath) / filename
+
+
+class ChunkSink:
+    """Flux en écriture seule et non « seekable » dans lequel écrit zipfile.
+
+    zipfile détecte l'absence de tell()/seek() et passe alors en mode
+    streaming (descripteurs de données après chaque entrée).
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def write(self, data) -> int:
+        self._buffer += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    @property
+    def size(self) -> int:
+        return len(self._buffer)
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def stream_project_zip(root: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Générer l'archive ZIP de ``root`` morceau par morceau.
+
+    Générateur synchrone : StreamingResponse l'itère dans le threadpool,
+    la compression ne bloque donc jamais la boucle d'événements.
+    """
+    sink = ChunkSink()
+    total_files = 0
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for file_path in iter_project_files(root):
+            arcname = str(file_path.relative_to(root))
+            # stat et ouverture avant de créer l'entrée : un fichier illisible
+            # est ignoré sans laisser d'entrée tronquée dans l'archive
+            try:
+                zip_info = zipfile.ZipInfo.from_file(file_path, arcname)
+                src = open(file_path, 'rb')
+            except OSError as e:
+                logger.warning(f"Impossible d'ajouter {arcname}: {e}")
+                continue
+            zip_info.compress_type = zipfile.ZIP_DEFLATED
+            with src, zip_file.open(zip_info, 'w') as dest:
+                while True:
+                    block = src.read(chunk_size)
+                    if not block:
+                        break
+                    dest.write(block)
+                    if sink.size >= chunk_size:
+                        yield sink.drain()
+            total_files += 1
+            data = sink.drain()
+            if data:
+                yield data
+    # Répertoire central écrit à la fermeture de l'archive
+    data = sink.drain()
+    if data:
+        yield data
+    logger.info(f"Total fichiers dans le ZIP: {total_files}")
+
+
+def manifest_digest(root: Path) -> str:
+    """Empreinte du manifeste de l'arborescence (chemins, tailles, dates de modification)"""
+    digest = hashlib.sha256()
+    for file_path in iter_project_files(root):
+        try:
+            stat = file_path.stat()
+        except OSError:
+            continue
+        arcname = str(file_path.relative_to(root))
+        digest.update(f"{arcname}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode('utf-8', 'surrogateescape'))
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedArchive:
+    digest: str
+    path: Path
+    size: int
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.digest}"'
+
+
+class ArchiveCache:
+    """Cache disque de l'archive, adressé par le contenu du manifeste.
+
+    Le manifeste est recalculé au plus toutes les ``manifest_ttl`` secondes ;
+    l'archive n'est reconstruite (dans le threadpool) que si son empreinte
+    change. Pendant la reconstruction, l'archive précédente reste servie ;
+    sans archive précédente, les requêtes concurrentes attendent la même
+    reconstruction. Une construction dépassée par une empreinte plus
+    récente ne remplace pas l'archive courante et ne supprime rien.
+    """
+
+    def __init__(self, root: Path, cache_dir: Path, manifest_ttl: float = 5.0):
+        self.root = root
+        self.cache_dir = cache_dir
+        self.manifest_ttl = manifest_ttl
+        self._current: Optional[CachedArchive] = None
+        self._digest: Optional[str] = None
+        self._checked_at = 0.0
+        self._builds: Dict[str, asyncio.Task] = {}
+
+    async def current_digest(self) -> str:
+        now = time.monotonic()
+        if self._digest is None or now - self._checked_at >= self.manifest_ttl:
+            self._digest = await run_in_threadpool(manifest_digest, self.root)
+            self._checked_at = now
+        return self._digest
+
+    async def get(self) -> CachedArchive:
+        """Archive à jour, ou la précédente tant que la nouvelle se construit"""
+        digest = await self.current_digest()
+        current = self._current
+        if current is not None and current.digest == digest:
+            return current
+        task = self._schedule_build(digest)
+        if current is not None:
+            return current
+        # shield : un client qui abandonne n'annule pas la reconstruction partagée
+        return await asyncio.shield(task)
+
+    async def open(self) -> Tuple[CachedArchive, BinaryIO]:
+        """Archive à jour et son fichier ouvert, lisible même si elle est supprimée ensuite
+
+        Une reconstruction peut supprimer l'archive entre ``get`` et
+        l'ouverture : l'archive courante, plus récente, est alors ouverte.
+        """
+        archive = await self.get()
+        try:
+            return archive, open(archive.path, 'rb')
+        except FileNotFoundError:
+            archive = await self.get()
+            return archive, open(archive.path, 'rb')
+
+    def warm(self) -> asyncio.Task:
+        """Lancer la première construction en arrière-plan (au démarrage)"""
+        return asyncio.ensure_future(self.get())
+
+    def _schedule_build(self, digest: str) -> asyncio.Task:
+        task = self._builds.get(digest)
+        if task is None:
+            task = asyncio.ensure_future(self._build(digest))
+            self._builds[digest] = task
+            task.add_done_callback(lambda done: self._build_done(digest, done))
+        return task
+
+    def _build_done(self, digest: str, task: asyncio.Task):
+        self._builds.pop(digest, None)
+        # Construction en arrière-plan : personne n'attend peut-être son résultat
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Échec de la construction de l'archive {digest[:12]}: {task.exception()}")
+
+    async def _build(self, digest: str) -> CachedArchive:
+        archive = await run_in_threadpool(self._write_archive, digest)
+        # Une construction plus récente a pu être lancée entre-temps : ne pas la remplacer
+        if digest == self._digest:
+            previous = self._current
+            self._current = archive
+            # L'archive précédente vient peut-être d'être remise à une requête : elle est gardée un tour
+            keep = {archive.path} | ({previous.path} if previous is not None else set())
+            await run_in_threadpool(self._prune, keep)
+        return archive
+
+    def _write_archive(self, digest: str) -> CachedArchive:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        target = self.cache_dir / f"{digest}.zip"
+        if not target.exists():
+            start = time.perf_counter()
+            fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as out:
+                    for chunk in stream_project_zip(self.root):
+                        out.write(chunk)
+                os.replace(tmp_name, target)
+            except BaseException:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp_name)
+                raise
+            logger.info(f"Archive {digest[:12]} construite en {time.perf_counter() - start:.2f}s")
+        return CachedArchive(digest=digest, path=target, size=target.stat().st_size)
+
+    def _prune(self, keep: Set[Path]):
+        """Supprimer les anciennes archives (un fichier déjà ouvert reste lisible)"""
+        for old in self.cache_dir.glob('*.zip'):
+            if old not in keep:
+                with contextlib.suppress(OSError):
+                    old.unlink()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparaison faible de If-None-Match (RFC 9110)"""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(',')]
+    opaque = etag.removeprefix('W/')
+    return '*' in candidates or any(c.removeprefix('W/') == opaque for c in candidates)
+
+
+def parse_byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Analyser un en-tête Range à plage unique.
+
+    Retourne ``(début, fin)`` inclusifs, ``None`` si l'en-tête est ignoré
+    (syntaxe inconnue ou plages multiples) ; lève ValueError si la plage
+    n'est pas satisfaisable.
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        # bytes=-N : les N derniers octets
+        suffix = int(last)
+        if suffix == 0:
+            raise ValueError(header)
+        start, end = max(size - suffix, 0), size - 1
+    if start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def iter_file_range(file_obj: BinaryIO, start: int, end: int, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Lire ``[start, end]`` d'un fichier déjà ouvert, puis le fermer"""
+    with file_obj:
+        file_obj.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = file_obj.read(min(chunk_size, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
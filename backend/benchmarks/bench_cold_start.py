@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark du démarrage à froid : import, lifespan et première réponse.
+
+En serverless (fonctions Vercel, etc.), chaque instance neuve importe
+server.py puis sert sa première requête : ce temps s'ajoute à la latence
+de l'utilisateur. Deux mesures :
+
+1. ``python -X importtime -c "import server"`` : temps d'import total et
+   modules importés directement par server.py, classés par coût cumulé ;
+2. pour chaque route, un processus neuf qui importe l'application, exécute
+   le lifespan et sert une requête (httpx + ASGITransport) : temps de
+   chaque étape et modules lourds chargés en chemin (NumPy, PyMongo...).
+
+Profil par défaut « serverless » : MongoDB non configuré, pas de
+surveillance du catalogue, archive du projet non préconstruite. Chaque
+mesure est répétée (``--repeat``) et la médiane est gardée ; un premier
+passage met en cache le bytecode et le catalogue binaire.
+
+Usage :
+    python benchmarks/bench_cold_start.py
+    python benchmarks/bench_cold_start.py --routes /api/health '/api/costs?plans=netflix,spotify' --repeat 5
+    python benchmarks/bench_cold_start.py --mongo-url mongodb://localhost:27017
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_ROUTES = (
+    '/api/health',
+    '/api/subscriptions?page_size=12',
+    '/api/search?q=netf',
+    '/api/costs?plans=netflix,spotify',
+    '/api/subscriptions/netflix/similar',
+    '/api/reviews/netflix/summary',
+)
+
+# Modules dont la présence après la première réponse est signalée
+HEAVY_MODULES = ('numpy', 'pymongo', 'motor', 'bson', 'pandas', 'boto3')
+
+# Processus « instance froide » : import, lifespan, une requête
+WORKER = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import server
+imported = time.perf_counter()
+from httpx import ASGITransport, AsyncClient
+
+async def main():
+    async with server.app.router.lifespan_context(server.app):
+        started = time.perf_counter()
+        transport = ASGITransport(app=server.app, raise_app_exceptions=False)
+        async with AsyncClient(transport=transport, base_url='http://cold-start') as client:
+            response = await client.get(sys.argv[1])
+        answered = time.perf_counter()
+    return {
+        'status': response.status_code,
+        'import_ms': (imported - start) * 1000,
+        'lifespan_ms': (started - imported) * 1000,
+        'request_ms': (answered - started) * 1000,
+        'first_response_ms': (answered - start) * 1000,
+        'heavy': [name for name in sys.argv[2].split(',') if name in sys.modules],
+    }
+
+print(json.dumps(asyncio.run(main())))
+"""
+
+_IMPORTTIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def environment(mongo_url: Optional[str]) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.pop('MONGO_URL', None)
+    env.setdefault('DB_NAME', 'bench_cold_start')
+    if mongo_url:
+        env['MONGO_URL'] = mongo_url
+    env['CATALOG_WATCH_INTERVAL'] = '0'
+    env['ARCHIVE_WARM_ON_STARTUP'] = '0'
+    return env
+
+
+def import_profile(env: Dict[str, str], top: int) -> Dict[str, Any]:
+    """Temps d'import de server et de ses imports directs (-X importtime, microsecondes)"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import server'],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            entries.append((int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2, match.group(4)))
+    server = next(entry for entry in reversed(entries) if entry[3] == 'server' and entry[2] == 0)
+    # Les imports de server précèdent sa ligne, au niveau 1
+    start = entries.index(server)
+    while start > 0 and entries[start - 1][2] > 0:
+        start -= 1
+    direct = [entry for entry in entries[start:entries.index(server)] if entry[2] == 1]
+    return {
+        'server_ms': round(server[1] / 1000, 1),
+        'server_self_ms': round(server[0] / 1000, 1),
+        'modules': len(entries),
+        'heavy': [name for name in HEAVY_MODULES if any(entry[3] == name for entry in entries)],
+        'top': [
+            {'module': name, 'cumulative_ms': round(cumulative / 1000, 1)}
+            for _, cumulative, _, name in sorted(direct, key=lambda entry: -entry[1])[:top]
+        ],
+    }
+
+
+def cold_start(env: Dict[str, str], route: str) -> Dict[str, Any]:
+    output = subprocess.run(
+        [sys.executable, '-c', WORKER, route, ','.join(HEAVY_MODULES)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def median(samples: List[Dict[str, Any]], key: str) -> float:
+    values = sorted(sample[key] for sample in samples)
+    return round(values[len(values) // 2], 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--routes', nargs='+', default=DEFAULT_ROUTES,
+                        help="routes mesurées (une instance neuve par mesure)")
+    parser.add_argument('--repeat', type=int, default=3, help="mesures par route (la médiane est gardée)")
+    parser.add_argument('--top', type=int, default=12, help="imports directs de server affichés")
+    parser.add_argument('--mongo-url', help="configurer MongoDB (par défaut : absent, profil serverless)")
+    args = parser.parse_args()
+
+    env = environment(args.mongo_url)
+    # Bytecode et catalogue binaire en cache : on mesure un démarrage à froid d'instance, pas un premier déploiement
+    cold_start(env, '/api/health')
+
+    profiles = [import_profile(env, args.top) for _ in range(args.repeat)]
+    profile = sorted(profiles, key=lambda p: p['server_ms'])[len(profiles) // 2]
+    print(f"import server: {profile['server_ms']} ms ({profile['modules']} modules, "
+          f"lourds: {', '.join(profile['heavy']) or 'aucun'})", file=sys.stderr)
+    for entry in profile['top']:
+        print(f"  {entry['module']:28} {entry['cumulative_ms']:>8} ms", file=sys.stderr)
+
+    routes = []
+    for route in args.routes:
+        samples = [cold_start(env, route) for _ in range(args.repeat)]
+        result = {
+            'route': route,
+            'status': samples[-1]['status'],
+            **{key: median(samples, key) for key in ('import_ms', 'lifespan_ms', 'request_ms', 'first_response_ms')},
+            'heavy': samples[-1]['heavy'],
+        }
+        routes.append(result)
+        print(f"{route:40} {result['status']}  première réponse {result['first_response_ms']:>7} ms  "
+              f"(requête {result['request_ms']} ms)  {', '.join(result['heavy'])}", file=sys.stderr)
+
+    print(json.dumps({'import': profile, 'routes': routes}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
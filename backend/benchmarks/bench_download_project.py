@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark /api/download-project : ZIP en mémoire (ancienne version) vs ZIP en streaming.
+
+Mesure, pour chaque mode et dans un processus séparé :
+- le pic de mémoire (RSS max) ;
+- la latence du premier octet ;
+- la durée totale et la taille de l'archive.
+
+Usage :
+    python benchmarks/bench_download_project.py [--root /app] [--files 400 --size-kb 256]
+
+Sans --root, une arborescence synthétique est générée dans un dossier temporaire.
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+def legacy_zip(project_root: Path):
+    """Reproduction de l'ancienne implémentation (BytesIO construit en entier)"""
+    zip_buffer = io.BytesIO()
+    exclude_dirs = {'node_modules', '.git'}
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for file_path in project_root.rglob('*'):
+            if file_path.is_file():
+                if any(part in exclude_dirs for part in file_path.parts):
+                    continue
+                zip_file.write(file_path, str(file_path.relative_to(project_root)))
+    zip_buffer.seek(0)
+    # StreamingResponse itère un BytesIO ligne par ligne
+    yield from zip_buffer
+
+
+def streaming_zip(project_root: Path):
+    from archive import stream_project_zip
+    yield from stream_project_zip(project_root)
+
+
+MODES = {'legacy': legacy_zip, 'streaming': streaming_zip}
+
+
+def run_mode(mode: str, root: Path) -> dict:
+    start = time.perf_counter()
+    first_byte = None
+    total = 0
+    for chunk in MODES[mode](root):
+        if first_byte is None and chunk:
+            first_byte = time.perf_counter() - start
+        total += len(chunk)
+    elapsed = time.perf_counter() - start
+    return {
+        'mode': mode,
+        'first_byte_ms': round((first_byte or 0) * 1000, 2),
+        'total_ms': round(elapsed * 1000, 2),
+        'archive_bytes': total,
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def make_tree(root: Path, files: int, size_kb: int):
+    for i in range(files):
+        path = root / f"dir{i % 20}" / f"file{i}.bin"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Moitié compressible, moitié aléatoire : proche d'un vrai projet
+        half = size_kb * 512
+        path.write_bytes(b'x' * half + os.urandom(half))
+    (root / 'node_modules').mkdir(exist_ok=True)
+    (root / 'node_modules' / 'ignored.js').write_bytes(b'0' * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--root', type=Path)
+    parser.add_argument('--files', type=int, default=400)
+    parser.add_argument('--size-kb', type=int, default=256)
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.root)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = args.root
+        if root is None:
+            root = Path(tmp)
+            make_tree(root, args.files, args.size_kb)
+        results = []
+        for mode in MODES:
+            # Un processus par mode pour que le RSS max ne soit pas partagé
+            out = subprocess.run(
+                [sys.executable, __file__, '--mode', mode, '--root', str(root)],
+                check=True, capture_output=True, text=True,
+            )
+            results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
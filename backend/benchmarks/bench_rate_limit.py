@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark de POST /api/reviews sous abus : un client inonde l'API pendant
+que des clients normaux publient quelques avis.
+
+L'application tourne dans le processus (httpx + ASGITransport) ; chaque
+client est identifié par X-Forwarded-For. Pour chaque mode (limiteur
+désactivé puis activé), on mesure la latence p50/p99 des clients normaux
+et le nombre d'avis réellement insérés.
+
+Usage :
+    python benchmarks/bench_rate_limit.py --mongo-url mongodb://localhost:27017
+    python benchmarks/bench_rate_limit.py [--abusers 50 --normal-clients 10 --posts 5]
+
+Sans --mongo-url, mongomock-motor sert de base : il répond sans jamais rendre
+la main à la boucle, les latences ne montrent donc pas la contention ; seuls
+le nombre d'insertions et la répartition des statuts sont significatifs.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:1')
+os.environ.setdefault('DB_NAME', 'bench_rate_limit')
+os.environ['TRUST_FORWARDED_FOR'] = '1'
+
+REVIEW = {'appId': 'netflix', 'userName': 'Client Test', 'rating': 4, 'comment': 'Très bien'}
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+async def run_mode(server, enabled: bool, args) -> dict:
+    from httpx import ASGITransport, AsyncClient
+
+    from ratelimit import MemoryBucketStore
+
+    if args.mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        server.mongo.use(AsyncIOMotorClient(args.mongo_url))
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        server.mongo.use(AsyncMongoMockClient())
+    await server.mongo.client.drop_database(os.environ['DB_NAME'])
+    server.review_limiter.store = MemoryBucketStore()
+    server.review_limiter.enabled = enabled
+    stop = asyncio.Event()
+    latencies = []
+    statuses = {}
+
+    async with AsyncClient(transport=ASGITransport(app=server.app), base_url='http://bench') as client:
+        async def abuser(worker: int):
+            headers = {'X-Forwarded-For': '203.0.113.66'}
+            while not stop.is_set():
+                response = await client.post('/api/reviews', json=REVIEW, headers=headers)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                # mongomock ne rend jamais la main : céder la boucle explicitement
+                await asyncio.sleep(0)
+
+        async def normal(index: int):
+            headers = {'X-Forwarded-For': f'198.51.100.{index}'}
+            for _ in range(args.posts):
+                start = time.perf_counter()
+                response = await client.post('/api/reviews', json=REVIEW, headers=headers)
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.status_code
+                await asyncio.sleep(args.pause)
+
+        abusers = [asyncio.ensure_future(abuser(i)) for i in range(args.abusers)]
+        started = time.perf_counter()
+        await asyncio.gather(*(normal(i) for i in range(args.normal_clients)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*abusers)
+
+    result = {
+        'rateLimit': enabled,
+        'normal_p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'normal_p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'abuser_requests': sum(statuses.values()),
+        'abuser_statuses': statuses,
+        'reviews_inserted': await server.mongo.db.reviews.count_documents({}),
+        'elapsed_s': round(elapsed, 2),
+    }
+    if args.mongo_url:
+        await server.mongo.client.drop_database(os.environ['DB_NAME'])
+    return result
+
+
+async def run(args) -> list:
+    import server
+    return [await run_mode(server, enabled, args) for enabled in (False, True)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--abusers', type=int, default=50, help="requêtes simultanées du client abusif")
+    parser.add_argument('--normal-clients', type=int, default=10)
+    parser.add_argument('--posts', type=int, default=5, help="avis par client normal (≤ burst)")
+    parser.add_argument('--pause', type=float, default=0.05)
+    parser.add_argument('--mongo-url')
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
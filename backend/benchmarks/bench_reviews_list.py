@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la lecture d'une page d'avis (/api/reviews/{app_id}).
+
+Compare, sur les mêmes avis :
+- legacy : documents complets, ``Review(**doc)`` puis jsonable_encoder et json
+  (double passage Pydantic + encodeur standard, comme avant) ;
+- fast : projection sur les champs de Review et encodage direct avec orjson.
+
+Mesure p50/p99 et débit sur ``--iterations`` lectures de ``--reviews`` avis.
+
+Usage :
+    python benchmarks/bench_reviews_list.py [--reviews 1000 --iterations 200]
+    python benchmarks/bench_reviews_list.py --mongo-url mongodb://localhost:27017
+
+Sans --mongo-url, les avis sont servis par mongomock-motor (pip install mongomock-motor).
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+APP_ID = 'bench-app'
+
+
+async def legacy_page(db, limit: int) -> bytes:
+    """Reproduction de l'ancienne lecture (documents complets, Review puis JSONResponse)"""
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    from models import Review
+    from reviews import REVIEWS_SORT
+
+    reviews = await db.reviews.find({"appId": APP_ID}).sort(REVIEWS_SORT).limit(limit + 1).to_list(limit + 1)
+    models = [Review(**review) for review in reviews[:limit]]
+    # response_model : validation puis sérialisation une seconde fois
+    validated = [Review.model_validate(model.model_dump()) for model in models]
+    return JSONResponse(content=jsonable_encoder(validated)).body
+
+
+async def fast_page(db, limit: int) -> bytes:
+    import orjson
+    from fastapi.encoders import jsonable_encoder
+
+    from reviews import fetch_reviews_page
+
+    reviews, _ = await fetch_reviews_page(db, APP_ID, limit)
+    return orjson.dumps(reviews, default=jsonable_encoder)
+
+
+MODES = {'legacy': legacy_page, 'fast': fast_page}
+
+
+async def seed(db, count: int):
+    from models import ReviewCreate
+    from reviews import build_review
+
+    await db.reviews.delete_many({"appId": APP_ID})
+    start = datetime(2024, 1, 1)
+    documents = []
+    for i in range(count):
+        review = build_review(
+            ReviewCreate(appId=APP_ID, userName=f"Utilisateur {i}", rating=1 + i % 5,
+                         comment="Très bon service, catalogue complet et application fluide. " * 3),
+            created_at=start + timedelta(minutes=i),
+            helpful=i % 7,
+        ).model_dump()
+        # Champ présent sur les avis importés, jamais renvoyé au client
+        review["localId"] = f"local_{uuid.uuid4().hex}"
+        documents.append(review)
+    await db.reviews.insert_many(documents)
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+async def run(args) -> list:
+    if args.mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(args.mongo_url)
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+    db = client[args.db_name]
+    await seed(db, args.reviews)
+
+    results = []
+    for mode, page in MODES.items():
+        for _ in range(args.warmup):
+            await page(db, args.reviews)
+        samples = []
+        size = 0
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            body = await page(db, args.reviews)
+            samples.append(time.perf_counter() - start)
+            size = len(body)
+        results.append({
+            'mode': mode,
+            'reviews': args.reviews,
+            'p50_ms': round(percentile(samples, 0.50) * 1000, 3),
+            'p99_ms': round(percentile(samples, 0.99) * 1000, 3),
+            'mean_ms': round(statistics.mean(samples) * 1000, 3),
+            'pages_per_s': round(len(samples) / sum(samples), 1),
+            'body_bytes': size,
+        })
+
+    if args.mongo_url:
+        await db.reviews.delete_many({"appId": APP_ID})
+        client.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reviews', type=int, default=1000)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--mongo-url')
+    parser.add_argument('--db-name', default='bench_reviews')
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark mémoire et démarrage à froid : 1 worker contre N.
+
+Chaque worker uvicorn importe server.py, qui construit l'instantané du
+catalogue : ce benchmark lance N processus qui font exactement cet import
+en même temps, attend qu'ils soient tous prêts, puis relève pour chacun
+le temps de démarrage et la mémoire (RSS et PSS lus dans
+/proc/<pid>/smaps_rollup ; le PSS répartit les pages partagées entre les
+processus qui les projettent, la somme des PSS est donc la mémoire réelle
+du groupe).
+
+Modes comparés :
+- json : chaque worker lit, valide et indexe les fichiers JSON ;
+- packed-cold : catalogue binaire absent, le premier worker le construit
+  pendant que les autres attendent le verrou ;
+- packed-warm : catalogue binaire déjà écrit, chaque worker le projette.
+
+Usage :
+    python benchmarks/bench_workers.py [--workers 1,4] [--modes json,packed-cold,packed-warm]
+
+MongoDB n'est pas nécessaire : le client Motor n'est créé qu'à la
+première utilisation de la base.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+MODES = ('json', 'packed-cold', 'packed-warm')
+
+# Processus « worker » : importer l'application, signaler qu'il est prêt, attendre la fin de la mesure
+WORKER = """
+import json, sys, time
+start = time.perf_counter()
+import server
+print(json.dumps({'ready': time.time(), 'startup': time.perf_counter() - start}), flush=True)
+sys.stdin.read()
+"""
+
+
+def memory(pid: int) -> dict:
+    """RSS et PSS d'un processus, en Mo"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in ('Rss', 'Pss', 'Shared_Clean', 'Private_Dirty'):
+                values[name] = int(rest.split()[0]) / 1024
+    return values
+
+
+def run(mode: str, workers: int, packed_dir: Path) -> dict:
+    env = dict(os.environ)
+    env.setdefault('MONGO_URL', 'mongodb://localhost:1')
+    env.setdefault('DB_NAME', 'bench_workers')
+    env['CATALOG_WATCH_INTERVAL'] = '0'
+    env['CATALOG_PACKED_DIR'] = '' if mode == 'json' else str(packed_dir)
+    if mode == 'packed-cold':
+        shutil.rmtree(packed_dir, ignore_errors=True)
+
+    started = time.time()
+    processes = [
+        subprocess.Popen(
+            [sys.executable, '-c', WORKER], cwd=BACKEND_DIR, env=env,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        for _ in range(workers)
+    ]
+    try:
+        reports = [json.loads(process.stdout.readline()) for process in processes]
+        usage = [memory(process.pid) for process in processes]
+    finally:
+        for process in processes:
+            process.communicate('')
+
+    return {
+        'mode': mode,
+        'workers': workers,
+        'allReady_s': round(max(report['ready'] for report in reports) - started, 3),
+        'startupMean_s': round(sum(report['startup'] for report in reports) / workers, 3),
+        'startupMax_s': round(max(report['startup'] for report in reports), 3),
+        'rssTotal_mb': round(sum(u['Rss'] for u in usage), 1),
+        'pssTotal_mb': round(sum(u['Pss'] for u in usage), 1),
+        'pssPerWorker_mb': round(sum(u['Pss'] for u in usage) / workers, 1),
+        'privateDirtyPerWorker_mb': round(sum(u['Private_Dirty'] for u in usage) / workers, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default='1,4', help="nombres de workers séparés par des virgules")
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--repeat', type=int, default=3, help="mesures par configuration (la médiane est gardée)")
+    args = parser.parse_args()
+
+    packed_dir = Path(tempfile.mkdtemp(prefix='bench-workers-'))
+    results = []
+    try:
+        # Un premier import met en cache le bytecode : seul le catalogue distingue les modes
+        run('json', 1, packed_dir)
+        for workers in (int(n) for n in args.workers.split(',')):
+            for mode in args.modes.split(','):
+                if mode not in MODES:
+                    parser.error(f"mode inconnu: {mode}")
+                if mode == 'packed-warm' and not any(packed_dir.glob('catalog-*.bin')):
+                    run('packed-cold', 1, packed_dir)
+                samples = sorted(
+                    (run(mode, workers, packed_dir) for _ in range(args.repeat)), key=lambda r: r['allReady_s']
+                )
+                results.append(samples[len(samples) // 2])
+                print(json.dumps(results[-1]), file=sys.stderr)
+    finally:
+        shutil.rmtree(packed_dir, ignore_errors=True)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
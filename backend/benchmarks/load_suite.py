@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Suite de charge locale : toutes les routes de l'API, application dans le processus.
+
+L'application FastAPI tourne dans le processus (httpx + ASGITransport, avec
+son lifespan) sur mongomock-motor ou sur un mongod de test. La base est
+remplie d'avis réalistes (répartition Zipf entre les applications du
+catalogue), puis chaque scénario est joué ``--requests`` fois avec
+``--concurrency`` requêtes simultanées. Pour chaque route : débit, p50,
+p95, p99, max et statuts.
+
+Les résultats sont écrits en JSON ; avec ``--baseline``, toute route dont le
+p99 ou le débit se dégrade de plus de ``--max-regression`` fait échouer la
+commande (code retour 1), pour comparer deux versions.
+
+Usage :
+    python benchmarks/load_suite.py --reviews 10000 --output bench.json
+    python benchmarks/load_suite.py --mongo-url mongodb://localhost:27017 --reviews 1000000
+    python benchmarks/load_suite.py --baseline bench-v1.json --output bench-v2.json
+    python benchmarks/load_suite.py --routes reviews.page,costs.basket
+
+mongomock-motor répond sans rendre la main à la boucle d'événements : la
+concurrence y est sérialisée et il devient lent au-delà de ~100k avis.
+Pour 1M d'avis et des latences représentatives, utiliser --mongo-url.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:1')
+os.environ.setdefault('DB_NAME', 'load_suite')
+
+SEED_BATCH = 5000
+COMMENTS = [
+    "Très bon service, catalogue complet.",
+    "Application fluide, rien à redire.",
+    "Trop cher pour ce que c'est, j'ai résilié au bout de trois mois.",
+    "Bonne qualité mais des publicités de plus en plus fréquentes.",
+    "Parfait pour toute la famille, les profils enfants sont bien pensés.",
+]
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    # (rng, contexte) → (chemin, corps JSON ou None[, en-têtes])
+    build: Callable[[random.Random, Dict[str, Any]], tuple]
+    expected: tuple = (200,)
+
+
+def _pick_app(rng: random.Random, context: Dict[str, Any]) -> str:
+    return rng.choices(context['apps'], weights=context['weights'])[0]
+
+
+def _basket(rng: random.Random, context: Dict[str, Any], size: int = 6) -> List[str]:
+    return rng.sample(context['catalog_ids'], size)
+
+
+def _spending_snapshot(rng: random.Random, context: Dict[str, Any]) -> Dict[str, Any]:
+    """Corps de saveSnapshot : panier courant d'un utilisateur"""
+    subscriptions = [
+        {'id': sub_id, 'name': sub_id, 'monthlyPrice': context['prices'][sub_id]}
+        for sub_id in _basket(rng, context, rng.randint(1, 8))
+    ]
+    total = round(sum(item['monthlyPrice'] for item in subscriptions), 2)
+    return {'totalMonthly': total, 'totalYearly': round(total * 12, 2),
+            'subscriptionCount': len(subscriptions), 'subscriptions': subscriptions}
+
+
+def _spending_user(rng: random.Random, context: Dict[str, Any]) -> Tuple[str, Dict[str, str]]:
+    """Identifiant d'historique et en-tête de son secret"""
+    user = rng.choice(context['spending_users'])
+    return user, {'X-Spending-Secret': context['spending_secrets'][user]}
+
+
+def _spending_call(rng: random.Random, context: Dict[str, Any], path: str, body=None) -> tuple:
+    user, headers = _spending_user(rng, context)
+    return f"/api/spending/{user}{path}", body, headers
+
+
+def _typeahead(rng: random.Random, context: Dict[str, Any]) -> str:
+    """Début d'un nom du catalogue, comme pendant la saisie"""
+    name = rng.choice(context['catalog_names'])
+    return quote(name[:rng.randint(1, len(name))])
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario('health', 'GET', lambda rng, ctx: ('/api/health', None)),
+    Scenario('ready', 'GET', lambda rng, ctx: ('/api/ready', None), (200, 503)),
+    Scenario('subscriptions.page', 'GET', lambda rng, ctx: (
+        f"/api/subscriptions?sort={rng.choice(['name-asc', 'price-asc', 'price-desc'])}"
+        f"&page={rng.randint(1, 20)}", None)),
+    Scenario('subscriptions.filtered', 'GET', lambda rng, ctx: (
+        f"/api/subscriptions?category={rng.choice(ctx['categories'])}&max_price=15", None)),
+    Scenario('subscriptions.get', 'GET', lambda rng, ctx: (
+        f"/api/subscriptions/{rng.choice(ctx['catalog_ids'])}", None)),
+    Scenario('subscriptions.similar', 'GET', lambda rng, ctx: (
+        f"/api/subscriptions/{rng.choice(ctx['catalog_ids'])}/similar?limit=6", None)),
+    Scenario('search', 'GET', lambda rng, ctx: (f"/api/search?q={_typeahead(rng, ctx)}", None)),
+    Scenario('categories', 'GET', lambda rng, ctx: ('/api/categories', None)),
+    Scenario('promo_codes', 'GET', lambda rng, ctx: (f"/api/promo-codes/{rng.choice(ctx['catalog_ids'])}", None)),
+    Scenario('costs.basket', 'GET', lambda rng, ctx: (f"/api/costs?plans={','.join(_basket(rng, ctx))}", None)),
+    Scenario('costs.catalog', 'GET', lambda rng, ctx: ('/api/costs', None)),
+    Scenario('export.basket', 'GET', lambda rng, ctx: (f"/api/export?plans={','.join(_basket(rng, ctx))}", None)),
+    Scenario('export.catalog', 'GET', lambda rng, ctx: ('/api/export?format=ndjson', None)),
+    Scenario('optimize', 'POST', lambda rng, ctx: (
+        '/api/optimize', {'plans': {sub_id: 0 for sub_id in _basket(rng, ctx, 12)}, 'budget': 40})),
+    Scenario('overlaps.basket', 'GET', lambda rng, ctx: (f"/api/overlaps?ids={','.join(_basket(rng, ctx, 10))}", None)),
+    Scenario('overlaps.audit', 'GET', lambda rng, ctx: ('/api/overlaps/audit', None)),
+    Scenario('reviews.summaries', 'GET', lambda rng, ctx: (
+        f"/api/reviews/summary?ids={','.join(rng.sample(ctx['apps'], min(20, len(ctx['apps']))))}", None)),
+    Scenario('reviews.summary', 'GET', lambda rng, ctx: (f"/api/reviews/{_pick_app(rng, ctx)}/summary", None)),
+    Scenario('reviews.page', 'GET', lambda rng, ctx: (f"/api/reviews/{_pick_app(rng, ctx)}", None)),
+    Scenario('reviews.page_deep', 'GET', lambda rng, ctx: (
+        f"/api/reviews/{ctx['hot_app']}?cursor={rng.choice(ctx['cursors'])}", None)),
+    Scenario('reviews.create', 'POST', lambda rng, ctx: ('/api/reviews', {
+        'appId': _pick_app(rng, ctx), 'userName': 'Charge Test', 'rating': rng.randint(1, 5),
+        'comment': rng.choice(COMMENTS)})),
+    Scenario('reviews.helpful', 'PUT', lambda rng, ctx: (
+        f"/api/reviews/{ctx['hot_app']}/{rng.choice(ctx['review_ids'])}/helpful", None)),
+    Scenario('spending.append', 'POST', lambda rng, ctx: _spending_call(
+        rng, ctx, '/snapshots', _spending_snapshot(rng, ctx))),
+    Scenario('spending.evolution', 'GET', lambda rng, ctx: _spending_call(rng, ctx, '/evolution?limit=12')),
+    Scenario('spending.evolution_years', 'GET', lambda rng, ctx: _spending_call(
+        rng, ctx, '/evolution?granularity=year&limit=10')),
+    Scenario('status.create', 'POST', lambda rng, ctx: ('/api/status', {'client_name': 'load-suite'})),
+    Scenario('status.list', 'GET', lambda rng, ctx: ('/api/status', None)),
+    Scenario('metrics', 'GET', lambda rng, ctx: ('/api/metrics', None)),
+]
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+async def seed_reviews(db, catalog, count: int, rng: random.Random) -> Dict[str, Any]:
+    """Avis répartis selon une loi de Zipf entre les applications du catalogue"""
+    from reviews import make_initials, stats_increments
+
+    apps = [sub['id'] for sub in catalog.subscriptions]
+    weights = [1 / (rank + 1) for rank in range(len(apps))]
+    start = datetime(2023, 1, 1)
+    for batch_start in range(0, count, SEED_BATCH):
+        documents = []
+        for i in range(batch_start, min(batch_start + SEED_BATCH, count)):
+            created_at = start + timedelta(seconds=rng.randint(0, 3 * 365 * 86400))
+            user_name = f"Utilisateur {rng.randint(1, 50000)}"
+            documents.append({
+                'id': str(uuid.UUID(int=rng.getrandbits(128))),
+                'appId': rng.choices(apps, weights=weights)[0],
+                'userName': user_name,
+                'rating': rng.choices((1, 2, 3, 4, 5), weights=(5, 5, 15, 35, 40))[0],
+                'comment': rng.choice(COMMENTS),
+                'date': created_at.strftime('%d/%m/%Y'),
+                'createdAt': created_at,
+                'helpful': rng.randint(0, 20),
+                'userInitials': make_initials(user_name),
+            })
+        await db.reviews.insert_many(documents, ordered=False)
+        await db.review_stats.bulk_write(stats_increments(documents), ordered=False)
+    return {'apps': apps, 'weights': weights, 'hot_app': apps[0]}
+
+
+async def seed_spending(db, catalog, users: int, months: int, rng: random.Random) -> Dict[str, Any]:
+    """Historique des dépenses : un panier qui évolue, quelques instantanés par mois et par utilisateur"""
+    from models import SpendingSnapshotCreate
+    from spending import append_snapshot, issue_user
+
+    prices = {sub['id']: sub['plans'][0]['monthlyPrice'] for sub in catalog.subscriptions}
+    context = {'prices': prices, 'catalog_ids': list(prices)}
+    # Identifiants délivrés comme pour le navigateur : chaque route exige le secret
+    secrets: Dict[str, str] = {}
+    for _ in range(max(users, 1)):
+        credentials = await issue_user(db)
+        secrets[credentials['user']] = credentials['secret']
+    spending_users = list(secrets)
+    start = datetime(2020, 1, 1)
+    for user in spending_users[:users]:
+        for month in range(months):
+            for _ in range(rng.randint(1, 3)):
+                moment = start + timedelta(days=month * 30 + rng.randint(0, 29))
+                body = _spending_snapshot(rng, context)
+                snapshot = SpendingSnapshotCreate(
+                    **body, timestamp=int(moment.timestamp() * 1000), date=moment.strftime('%Y-%m')
+                )
+                await append_snapshot(db, user, snapshot)
+    return {'prices': prices, 'spending_users': spending_users, 'spending_secrets': secrets}
+
+
+async def build_context(client, catalog, seeded: Dict[str, Any]) -> Dict[str, Any]:
+    """Identifiants et curseurs réels utilisés par les scénarios"""
+    context = dict(seeded)
+    context['catalog_ids'] = [sub['id'] for sub in catalog.subscriptions]
+    context['catalog_names'] = [sub['name'] for sub in catalog.subscriptions]
+    context['categories'] = list(catalog.categories)
+    context['review_ids'] = []
+    context['cursors'] = []
+    cursor = None
+    for _ in range(10):
+        params = {'limit': 100, **({'cursor': cursor} if cursor else {})}
+        response = await client.get(f"/api/reviews/{context['hot_app']}", params=params)
+        context['review_ids'] += [review['id'] for review in response.json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+        context['cursors'].append(cursor)
+    context['cursors'] = context['cursors'] or ['']
+    context['review_ids'] = context['review_ids'] or ['absent']
+    return context
+
+
+async def run_scenario(
+    client, scenario: Scenario, context, requests: int, concurrency: int, seed: int
+) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    calls = [scenario.build(rng, context) for _ in range(requests)]
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    errors = 0
+    position = 0
+
+    async def worker():
+        nonlocal position, errors
+        while position < len(calls):
+            path, body, *headers = calls[position]
+            position += 1
+            start = time.perf_counter()
+            response = await client.request(scenario.method, path, json=body, headers=headers[0] if headers else None)
+            latencies.append(time.perf_counter() - start)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+            if response.status_code not in scenario.expected:
+                errors += 1
+            # mongomock ne rend jamais la main : laisser tourner les autres workers
+            await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        'method': scenario.method,
+        'requests': len(latencies),
+        'errors': errors,
+        'statuses': statuses,
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'max_ms': round(max(latencies) * 1000, 3),
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Routes dont le p99 monte ou le débit baisse de plus de ``max_regression``"""
+    regressions = []
+    for name, current in results['routes'].items():
+        previous = baseline.get('routes', {}).get(name)
+        if previous is None:
+            continue
+        if current['p99_ms'] > previous['p99_ms'] * (1 + max_regression):
+            regressions.append(f"{name}: p99 {previous['p99_ms']} → {current['p99_ms']} ms")
+        if current['throughput_rps'] < previous['throughput_rps'] * (1 - max_regression):
+            regressions.append(f"{name}: débit {previous['throughput_rps']} → {current['throughput_rps']} req/s")
+    return regressions
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> Dict[str, Any]:
+    from httpx import ASGITransport, AsyncClient
+
+    import server
+
+    if args.mongo_url:
+        # Client créé au premier accès, avec les listeners des métriques
+        server.mongo.url = args.mongo_url
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        server.mongo.use(AsyncMongoMockClient())
+    await server.mongo.client.drop_database(os.environ['DB_NAME'])
+    # Un seul client fictif : le limiteur de débit fausserait les scénarios d'écriture
+    server.review_limiter.enabled = False
+    server.spending_limiter.enabled = False
+    if not args.cache:
+        server.response_cache.ttl = 0
+
+    rng = random.Random(args.seed)
+    seed_start = time.perf_counter()
+    seeded = await seed_reviews(server.mongo.db, server.catalog_store.latest.catalog, args.reviews, rng)
+    seeded.update(await seed_spending(
+        server.mongo.db, server.catalog_store.latest.catalog, args.spending_users, args.spending_months, rng
+    ))
+    seed_seconds = time.perf_counter() - seed_start
+
+    selected = set(args.routes.split(',')) if args.routes else None
+    routes: Dict[str, Any] = {}
+    async with server.app.router.lifespan_context(server.app):
+        async with AsyncClient(transport=ASGITransport(app=server.app), base_url='http://load-suite') as client:
+            context = await build_context(client, server.catalog_store.latest.catalog, seeded)
+            for index, scenario in enumerate(SCENARIOS):
+                if selected is not None and scenario.name not in selected:
+                    continue
+                routes[scenario.name] = await run_scenario(
+                    client, scenario, context, args.requests, args.concurrency, args.seed + index
+                )
+                print(f"{scenario.name:24} {routes[scenario.name]['throughput_rps']:>9} req/s  "
+                      f"p99 {routes[scenario.name]['p99_ms']} ms", file=sys.stderr)
+        cache_metrics = server.response_cache.metrics()
+
+    if args.mongo_url:
+        await server.mongo.client.drop_database(os.environ['DB_NAME'])
+    return {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'backend': 'mongod' if args.mongo_url else 'mongomock',
+            'reviews': args.reviews,
+            'spendingUsers': args.spending_users,
+            'spendingMonths': args.spending_months,
+            'seedSeconds': round(seed_seconds, 2),
+            'requestsPerRoute': args.requests,
+            'concurrency': args.concurrency,
+            'responseCache': args.cache,
+            'seed': args.seed,
+        },
+        'routes': routes,
+        'responseCache': cache_metrics,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reviews', type=int, default=10000, help="avis à insérer (10k à 1M)")
+    parser.add_argument('--spending-users', type=int, default=20, help="utilisateurs avec un historique de dépenses")
+    parser.add_argument('--spending-months', type=int, default=24, help="mois d'historique par utilisateur")
+    parser.add_argument('--requests', type=int, default=200, help="requêtes par route")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--routes', help="scénarios à jouer, séparés par des virgules (par défaut tous)")
+    parser.add_argument('--no-cache', dest='cache', action='store_false', help="désactiver le cache des réponses")
+    parser.add_argument('--mongo-url', help="mongod de test (la base DB_NAME est vidée)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=Path, help="fichier JSON des résultats (par défaut la sortie standard)")
+    parser.add_argument('--baseline', type=Path, help="résultats d'une version précédente à comparer")
+    parser.add_argument('--max-regression', type=float, default=0.2)
+    parser.add_argument('--list', action='store_true', help="lister les scénarios")
+    args = parser.parse_args()
+
+    if args.list:
+        for scenario in SCENARIOS:
+            print(f"{scenario.name:24} {scenario.method}")
+        return 0
+
+    results = asyncio.run(run(args))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.max_regression)
+        for regression in regressions:
+            print(f"RÉGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
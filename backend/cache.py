@@ -0,0 +1,169 @@
+"""Cache des réponses JSON en mémoire (LRU, TTL, taille maximale).
+
+Les entrées sont indexées par route et paramètres de requête et portent
+des étiquettes (``reviews:{appId}``, ``status``...) : une écriture
+invalide toutes les entrées d'une étiquette. Un compteur de génération
+par étiquette empêche de mettre en cache une réponse calculée pendant
+qu'une écriture l'invalidait.
+
+Chaque réponse porte un ETag faible dérivé de son contenu ; un
+If-None-Match correspondant est servi en 304 sans relire MongoDB.
+
+Le contenu est encodé une seule fois avec orjson : les documents MongoDB
+projetés passent directement, sans repasser par les modèles Pydantic.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Iterable, Optional, Set, Tuple
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from starlette.requests import Request
+from starlette.responses import Response
+
+from archive import etag_matches
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    headers: Dict[str, str]
+    tags: FrozenSet[str]
+    expires_at: float
+    size: int = field(init=False)
+
+    def __post_init__(self):
+        self.size = len(self.body)
+
+
+def weak_etag(body: bytes) -> str:
+    return f'W/"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def request_key(request: Request) -> str:
+    """Route et paramètres de requête, dans un ordre stable"""
+    return f"{request.url.path}?{'&'.join(sorted(f'{k}={v}' for k, v in request.query_params.multi_items()))}"
+
+
+class ResponseCache:
+    def __init__(self, ttl: float = 30.0, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._by_tag: Dict[str, Set[str]] = {}
+        self._generations: Dict[str, int] = {}
+        self.size = 0
+
+        # Métriques
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _remove(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+            for tag in entry.tags:
+                keys = self._by_tag.get(tag)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._by_tag[tag]
+        return entry
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def generations(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def put(self, key: str, entry: CachedResponse, generations: Optional[Tuple[int, ...]] = None):
+        """Mettre en cache, sauf si une étiquette a été invalidée depuis ``generations``"""
+        if generations is not None and generations != self.generations(sorted(entry.tags)):
+            return
+        if entry.size > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = entry
+        self.size += entry.size
+        for tag in entry.tags:
+            self._by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, *tags: str) -> int:
+        """Retirer les entrées portant l'une des étiquettes ; renvoie leur nombre"""
+        removed = 0
+        for tag in tags:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+            for key in list(self._by_tag.get(tag, ())):
+                if self._remove(key) is not None:
+                    removed += 1
+        self.invalidations += removed
+        return removed
+
+    def clear(self):
+        for tag in list(self._by_tag):
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+        self._entries.clear()
+        self._by_tag.clear()
+        self.size = 0
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "maxEntries": self.max_entries,
+            "maxBytes": self.max_bytes,
+            "ttlSeconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else None,
+            "notModified": self.not_modified,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    async def respond(
+        self,
+        request: Request,
+        tags: Iterable[str],
+        compute: Callable[[], Awaitable[Tuple[Any, Dict[str, str]]]],
+    ) -> Response:
+        """Réponse JSON servie depuis le cache, ou calculée par ``compute`` (contenu, en-têtes)"""
+        key = request_key(request)
+        entry = self.get(key)
+        if entry is None:
+            tags = frozenset(tags)
+            generations = self.generations(sorted(tags))
+            content, headers = await compute()
+            body = orjson.dumps(content, default=jsonable_encoder)
+            entry = CachedResponse(body, weak_etag(body), headers, tags, time.monotonic() + self.ttl)
+            self.put(key, entry, generations)
+
+        headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
@@ -0,0 +1,140 @@
+"""Catalogue des abonnements chargé en mémoire et indexé.
+
+Le fichier subscriptions.json du frontend est lu une seule fois ; les index
+(par id, par catégorie, par prix min/max des plans) et les ordres de tri
+sont précalculés pour que chaque requête de page ne fasse qu'un filtrage
+et un découpage de listes déjà triées.
+
+Plage de prix : par défaut (``cheapest``), comme le filtre de
+ComparisonSection, c'est le plan le moins cher qui doit être dans
+[min_price, max_price]. En mode ``overlap``, il suffit que les prix des
+plans (du moins cher au plus cher) recoupent la plage.
+"""
+import bisect
+import json
+import logging
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+SORT_OPTIONS = ('name-asc', 'name-desc', 'price-asc', 'price-desc', 'category')
+PRICE_MATCHES = ('cheapest', 'overlap')
+
+
+def sort_key(text: str) -> str:
+    """Clé de tri insensible à la casse et aux accents (proche de localeCompare)"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+class Catalog:
+    """Catalogue immuable et ses index"""
+
+    def __init__(self, subscriptions: Sequence[Dict[str, Any]], duration_options: List[Dict[str, Any]]):
+        self.subscriptions = subscriptions
+        self.duration_options = duration_options
+
+        self.by_id: Dict[str, int] = {}
+        self.by_category: Dict[str, List[int]] = {}
+        self.min_prices: List[float] = []
+        self.max_prices: List[float] = []
+        for position, sub in enumerate(subscriptions):
+            prices = [plan['monthlyPrice'] for plan in sub['plans']] or [0.0]
+            self.by_id[sub['id']] = position
+            self.by_category.setdefault(sub['category'], []).append(position)
+            self.min_prices.append(min(prices))
+            self.max_prices.append(max(prices))
+
+        # Positions triées par prix du plan le moins cher et du plus cher, pour les plages de prix
+        self._by_min_price = sorted(range(len(subscriptions)), key=self.min_prices.__getitem__)
+        self._min_price_keys = [self.min_prices[i] for i in self._by_min_price]
+        self._by_max_price = sorted(range(len(subscriptions)), key=self.max_prices.__getitem__)
+        self._max_price_keys = [self.max_prices[i] for i in self._by_max_price]
+
+        # Ordres de tri précalculés ; le tri par prix suit le plan affiché par défaut (le premier)
+        positions = range(len(subscriptions))
+        names = [sort_key(sub['name']) for sub in subscriptions]
+        first_prices = [sub['plans'][0]['monthlyPrice'] if sub['plans'] else 0.0 for sub in subscriptions]
+        self._orders: Dict[str, List[int]] = {
+            'name-asc': sorted(positions, key=names.__getitem__),
+            'name-desc': sorted(positions, key=names.__getitem__, reverse=True),
+            'price-asc': sorted(positions, key=first_prices.__getitem__),
+            'price-desc': sorted(positions, key=first_prices.__getitem__, reverse=True),
+            'category': sorted(positions, key=lambda i: sort_key(subscriptions[i]['category'])),
+        }
+        self.categories = sorted(self.by_category, key=sort_key)
+
+    @classmethod
+    def from_file(cls, path: Path) -> 'Catalog':
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        catalog = cls(data['subscriptions'], data.get('durationOptions', []))
+        logger.info(f"Catalogue chargé: {len(catalog)} abonnements, {len(catalog.categories)} catégories")
+        return catalog
+
+    def __len__(self) -> int:
+        return len(self.subscriptions)
+
+    def get(self, subscription_id: str) -> Optional[Dict[str, Any]]:
+        position = self.by_id.get(subscription_id)
+        return None if position is None else self.subscriptions[position]
+
+    def price_range(self, min_price: Optional[float], max_price: Optional[float], match: str = 'cheapest') -> List[int]:
+        """Positions dont les prix correspondent à [min_price, max_price] (voir PRICE_MATCHES)
+
+        ``cheapest`` : le plan le moins cher est dans la plage. ``overlap`` :
+        le moins cher est au plus ``max_price`` et le plus cher au moins
+        ``min_price``.
+        """
+        if match not in PRICE_MATCHES:
+            raise ValueError(f"Correspondance de prix inconnue: {match}")
+        hi = len(self._min_price_keys) if max_price is None else bisect.bisect_right(self._min_price_keys, max_price)
+        if match == 'cheapest':
+            lo = 0 if min_price is None else bisect.bisect_left(self._min_price_keys, min_price)
+            return self._by_min_price[lo:hi]
+        cheap_enough = self._by_min_price[:hi]
+        if min_price is None:
+            return cheap_enough
+        expensive_enough = self._by_max_price[bisect.bisect_left(self._max_price_keys, min_price):]
+        if len(expensive_enough) < len(cheap_enough):
+            cheap_enough, expensive_enough = expensive_enough, cheap_enough
+        wanted = set(expensive_enough)
+        return [i for i in cheap_enough if i in wanted]
+
+    def query(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        sort: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 12,
+        price_match: str = 'cheapest',
+    ) -> Dict[str, Any]:
+        """Filtrer, trier et paginer le catalogue"""
+        candidates: Optional[set] = None
+        if category is not None and category != 'all':
+            candidates = set(self.by_category.get(category, ()))
+        if min_price is not None or max_price is not None:
+            in_range = self.price_range(min_price, max_price, price_match)
+            candidates = set(in_range) if candidates is None else candidates.intersection(in_range)
+
+        order = self._orders.get(sort) if sort else None
+        if candidates is None:
+            matches = order if order is not None else range(len(self.subscriptions))
+        elif order is not None:
+            matches = [i for i in order if i in candidates]
+        else:
+            matches = sorted(candidates)
+
+        total = len(matches)
+        start = (page - 1) * page_size
+        return {
+            'items': [self.subscriptions[i] for i in matches[start:start + page_size]],
+            'total': total,
+            'page': page,
+            'pageSize': page_size,
+            'totalPages': (total + page_size - 1) // page_size,
+        }
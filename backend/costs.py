@@ -0,0 +1,77 @@
+"""Moteur de calcul des coûts totaux, vectorisé avec NumPy.
+
+Tous les prix mensuels du catalogue sont rangés dans un seul vecteur ;
+les totaux d'un panier pour toutes les durées demandées sont obtenus en
+un seul produit extérieur prix × mois.
+"""
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from catalog import Catalog
+
+
+def parse_plan_ref(ref: str) -> Tuple[str, int]:
+    """Analyser une référence de plan ``id`` ou ``id:index`` (plan 0 par défaut)"""
+    subscription_id, sep, index = ref.strip().partition(':')
+    if not sep:
+        return subscription_id, 0
+    if not index.isdigit():
+        raise ValueError(f"Index de plan invalide: {ref}")
+    return subscription_id, int(index)
+
+
+def round_cents(values: np.ndarray) -> np.ndarray:
+    """Arrondi au centime « au demi supérieur », comme Math.round côté frontend"""
+    return np.floor(values * 100 + 0.5) / 100
+
+
+class CostEngine:
+    """Matrice des prix de tous les plans du catalogue"""
+
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        self.rows: Dict[Tuple[str, int], int] = {}
+        prices: List[float] = []
+        for sub in catalog.subscriptions:
+            for index, plan in enumerate(sub['plans']):
+                self.rows[(sub['id'], index)] = len(prices)
+                prices.append(plan['monthlyPrice'])
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.refs: List[Tuple[str, int]] = list(self.rows)
+        self.default_months = [option['months'] for option in catalog.duration_options]
+
+    def resolve(self, refs: Iterable[str]) -> List[Tuple[str, int]]:
+        """Valider des références de plans ; lève KeyError pour un plan inconnu"""
+        resolved = []
+        for ref in refs:
+            key = parse_plan_ref(ref)
+            if key not in self.rows:
+                raise KeyError(ref)
+            resolved.append(key)
+        return resolved
+
+    def totals(self, plans: Sequence[Tuple[str, int]], months: Sequence[int]) -> np.ndarray:
+        """Matrice (plans × durées) des coûts totaux arrondis au centime"""
+        rows = np.fromiter((self.rows[key] for key in plans), dtype=np.intp, count=len(plans))
+        horizon = np.asarray(months, dtype=np.float64)
+        return round_cents(np.outer(self.prices[rows], horizon))
+
+    def price_basket(self, plans: Sequence[Tuple[str, int]], months: Sequence[int]) -> Dict:
+        """Coûts d'un panier pour chaque durée, en une seule passe"""
+        matrix = self.totals(plans, months)
+        monthly = [self.prices[self.rows[key]] for key in plans]
+        return {
+            'months': list(months),
+            'plans': [
+                {
+                    'id': subscription_id,
+                    'plan': index,
+                    'monthlyPrice': float(price),
+                    'totals': row,
+                }
+                for (subscription_id, index), price, row in zip(plans, monthly, matrix.tolist())
+            ],
+            'basketMonthly': float(round_cents(np.sum(monthly))),
+            'basketTotals': round_cents(matrix.sum(axis=0)).tolist(),
+        }
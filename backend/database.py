@@ -0,0 +1,99 @@
+"""Connexion MongoDB paresseuse.
+
+Motor et PyMongo (~170 ms d'import à eux deux) ne sont chargés qu'à la
+première utilisation de la base, pas à l'import de server.py : un
+démarrage à froid qui ne sert que le catalogue ou /api/health ne les paie
+jamais. Sans MONGO_URL, l'application démarre quand même : les routes du
+catalogue et les sondes restent servies, celles qui touchent à MongoDB
+lèvent MongoUnavailable (503).
+
+Les compteurs branchés sur le monitoring de PyMongo (PoolStats,
+CommandMetrics) n'héritent pas des classes de pymongo.monitoring, ce qui
+imposerait l'import : ils nomment leur classe de base dans ``LISTENER`` et
+``listeners.wrap`` construit le listener à la création du client.
+"""
+import logging
+import threading
+from typing import Any, Callable, List, Optional, Sequence
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+class MongoUnavailable(RuntimeError):
+    """MongoDB non configuré (MONGO_URL ou DB_NAME absent)"""
+
+
+class Mongo:
+    """Client Motor créé au premier accès à ``client`` ou ``db``"""
+
+    def __init__(
+        self,
+        url: Optional[str],
+        name: Optional[str],
+        listeners: Sequence[Any] = (),
+        on_connect: Optional[Callable[[Any], None]] = None,
+    ):
+        self.url = url
+        self.name = name
+        self.listeners: List[Any] = list(listeners)
+        self._on_connect = on_connect
+        self._client = None
+        self._db = None
+        # Le client peut être créé dans un thread (connect) pendant qu'une requête y accède
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return self._client is not None or bool(self.url and self.name)
+
+    def require(self):
+        """Lever MongoUnavailable si aucune base ne peut être jointe (avant d'accepter une écriture différée)"""
+        if not self.configured:
+            raise MongoUnavailable("MongoDB non configuré (MONGO_URL ou DB_NAME non défini)")
+
+    @property
+    def connected(self) -> bool:
+        return self._client is not None
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._create()
+        return self._client
+
+    @property
+    def db(self):
+        db = self._db
+        if db is None:
+            db = self._db = self.client[self.name]
+        return db
+
+    def _create(self):
+        self.require()
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        from listeners import wrap
+
+        client = AsyncIOMotorClient(self.url, event_listeners=[wrap(h) for h in self.listeners])
+        if self._on_connect is not None:
+            self._on_connect(client)
+        self._client = client
+        logger.info(f"Client MongoDB créé (base {self.name})")
+
+    async def connect(self):
+        """Créer le client hors de la boucle d'événements (import de Motor compris)"""
+        if self._client is None:
+            await run_in_threadpool(lambda: self.client)
+
+    def use(self, client):
+        """Remplacer le client (mongomock, base de test) ; le nom de la base est conservé"""
+        self._client = client
+        self._db = None
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
@@ -0,0 +1,199 @@
+"""Exports CSV, NDJSON et XLSX générés en streaming depuis le moteur de coûts.
+
+Une ligne par plan et par durée. Les totaux sont calculés par blocs de
+plans (un produit extérieur NumPy par bloc) puis encodés au fil de l'eau :
+la mémoire reste constante quel que soit le nombre de lignes et l'en-tête
+part avant le premier calcul.
+
+Le XLSX est écrit à la main (SpreadsheetML minimal, chaînes en ligne) dans
+un ZIP en mode streaming, comme l'archive du projet : aucune dépendance et
+aucun classeur gardé en mémoire.
+"""
+import csv
+import io
+import json
+import zipfile
+from typing import TYPE_CHECKING, Any, Iterator, List, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from archive import CHUNK_SIZE, ChunkSink
+
+if TYPE_CHECKING:
+    from costs import CostEngine
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Clés NDJSON et en-têtes CSV/XLSX, dans l'ordre des colonnes
+COLUMNS = (
+    'subscriptionId', 'subscriptionName', 'category', 'plan', 'planName',
+    'monthlyPrice', 'months', 'duration', 'totalCost',
+)
+HEADERS = (
+    'Identifiant', 'Service', 'Catégorie', 'Plan', 'Formule',
+    'Prix mensuel', 'Mois', 'Durée', 'Total',
+)
+
+# Plans chiffrés par produit extérieur
+PLANS_PER_BLOCK = 512
+
+Row = Tuple[Any, ...]
+
+
+def duration_labels(engine: 'CostEngine', months: Sequence[int]) -> List[str]:
+    labels = {option['months']: option['label'] for option in engine.catalog.duration_options}
+    return [labels.get(m, f"{m} mois") for m in months]
+
+
+def iter_export_rows(
+    engine: 'CostEngine',
+    plans: Sequence[Tuple[str, int]],
+    months: Sequence[int],
+    with_totals: bool = False,
+) -> Iterator[Row]:
+    """Lignes (plan × durée) dans l'ordre de ``plans``, suivies des totaux du panier si demandé"""
+    # Déjà chargés par le moteur de coûts ; EXPORT_FORMATS s'importe sans NumPy
+    import numpy as np
+
+    from costs import round_cents
+
+    labels = duration_labels(engine, months)
+    basket_totals = np.zeros(len(months))
+    basket_monthly = 0.0
+    for start in range(0, len(plans), PLANS_PER_BLOCK):
+        block = plans[start:start + PLANS_PER_BLOCK]
+        matrix = engine.totals(block, months)
+        if with_totals:
+            basket_totals += matrix.sum(axis=0)
+        for (subscription_id, index), totals in zip(block, matrix.tolist()):
+            sub = engine.catalog.get(subscription_id)
+            plan = sub['plans'][index]
+            basket_monthly += plan['monthlyPrice']
+            for m, label, total in zip(months, labels, totals):
+                yield (subscription_id, sub['name'], sub['category'], index, plan['name'],
+                       plan['monthlyPrice'], m, label, total)
+    if with_totals:
+        monthly = float(round_cents(np.float64(basket_monthly)))
+        for m, label, total in zip(months, labels, round_cents(basket_totals).tolist()):
+            yield ('', 'TOTAL', '', None, '', monthly, m, label, total)
+
+
+def stream_csv(rows: Iterator[Row], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(HEADERS)
+    # L'en-tête part seul : premier octet immédiat
+    yield buffer.getvalue().encode('utf-8')
+    buffer.seek(0)
+    buffer.truncate()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def stream_ndjson(rows: Iterator[Row], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    lines: List[str] = []
+    size = 0
+    for row in rows:
+        line = json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False)
+        lines.append(line)
+        size += len(line) + 1
+        if size >= chunk_size:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+            lines, size = [], 0
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+_XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Abonnements" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_row(row: Sequence[Any]) -> str:
+    cells = []
+    for value in row:
+        if value is None:
+            cells.append('<c/>')
+        elif isinstance(value, (int, float)):
+            cells.append(f'<c t="n"><v>{value}</v></c>')
+        else:
+            cells.append(f'<c t="inlineStr"><is><t>{escape(str(value))}</t></is></c>')
+    return f"<row>{''.join(cells)}</row>"
+
+
+def stream_xlsx(rows: Iterator[Row], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Classeur d'une feuille ; zipfile passe en mode streaming sur un flux non « seekable »"""
+    sink = ChunkSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for name, content in _XLSX_PARTS.items():
+            zip_file.writestr(name, content)
+        yield sink.drain()
+        with zip_file.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            sheet.write(
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                .encode('utf-8')
+            )
+            sheet.write(_xlsx_row(HEADERS).encode('utf-8'))
+            for row in rows:
+                sheet.write(_xlsx_row(row).encode('utf-8'))
+                if sink.size >= chunk_size:
+                    yield sink.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield sink.drain()
+
+
+ENCODERS = {'csv': stream_csv, 'ndjson': stream_ndjson, 'xlsx': stream_xlsx}
+
+
+def stream_export(
+    engine: 'CostEngine',
+    fmt: str,
+    plans: Sequence[Tuple[str, int]],
+    months: Sequence[int],
+    with_totals: bool = False,
+) -> Iterator[bytes]:
+    """Générateur synchrone : StreamingResponse l'itère dans le threadpool"""
+    return ENCODERS[fmt](iter_export_rows(engine, plans, months, with_totals))
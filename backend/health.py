@@ -0,0 +1,199 @@
+"""Sondes de vivacité (/api/health) et de disponibilité (/api/ready).
+
+Aucune des deux ne fait d'appel à MongoDB pendant la requête : la
+disponibilité repose sur un ping mis en cache et rafraîchi en arrière-plan,
+ce qui permet de les interroger à haute fréquence sans charger la base.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    """Compteurs du pool de connexions du client Motor (via les événements PyMongo)"""
+
+    # Branché par listeners.wrap, sans importer PyMongo ici
+    LISTENER = "ConnectionPoolListener"
+
+    def __init__(self):
+        self.open = 0
+        self.checked_out = 0
+        self.checkout_failures = 0
+        self.max_pool_size: Optional[int] = None
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.open = max(self.open - 1, 0)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        self.checked_out = max(self.checked_out - 1, 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "open": self.open,
+            "inUse": self.checked_out,
+            "maxSize": self.max_pool_size,
+            "checkoutFailures": self.checkout_failures,
+        }
+
+
+class LoopLagMonitor:
+    """Retard de la boucle d'événements, mesuré par un sommeil périodique"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(loop.time() - expected, 0.0)
+            self.max_lag = max(self.max_lag, self.last_lag)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "lastMs": round(self.last_lag * 1000, 3),
+            "maxMs": round(self.max_lag * 1000, 3),
+        }
+
+
+class InFlightRequests:
+    """Compteur des requêtes HTTP en cours, alimenté par InFlightMiddleware"""
+
+    def __init__(self):
+        self.current = 0
+        self.total = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"current": self.current, "total": self.total}
+
+
+class InFlightMiddleware:
+    """Middleware ASGI pur : pas de coût par requête au-delà de deux incréments"""
+
+    def __init__(self, app, counter: InFlightRequests):
+        self.app = app
+        self.counter = counter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        self.counter.current += 1
+        self.counter.total += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.counter.current -= 1
+
+
+class MongoReadiness:
+    """Ping MongoDB périodique dont seul le dernier résultat est servi"""
+
+    def __init__(self, db_getter, interval: float = 5.0, timeout: float = 2.0):
+        # Accès paresseux à la base : le client MongoDB peut changer (tests, reconnexion)
+        self._db_getter = db_getter
+        self.interval = interval
+        self.timeout = timeout
+        self.ok = False
+        self.latency: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._ping: Optional[asyncio.Future] = None
+
+    async def check(self):
+        start = time.perf_counter()
+        try:
+            # Un ping encore bloqué (sélection de serveur) n'est pas relancé
+            if self._ping is None or self._ping.done():
+                self._ping = asyncio.ensure_future(self._db_getter().command("ping"))
+            await asyncio.wait_for(asyncio.shield(self._ping), timeout=self.timeout)
+            self.ok, self.error = True, None
+            self.latency = time.perf_counter() - start
+        except Exception as e:
+            if self.ok:
+                logger.warning(f"MongoDB indisponible: {e or type(e).__name__}")
+            self.ok, self.error = False, str(e) or type(e).__name__
+            self.latency = None
+        self.checked_at = time.time()
+
+    async def _run(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        for task in (self._task, self._ping):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._task = None
+
+    @property
+    def ready(self) -> bool:
+        # Un résultat trop ancien (boucle de ping bloquée) ne compte plus
+        if not self.ok or self.checked_at is None:
+            return False
+        return time.time() - self.checked_at < 3 * self.interval + self.timeout
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "latencyMs": None if self.latency is None else round(self.latency * 1000, 3),
+            "checkedAt": self.checked_at,
+            "error": self.error,
+        }
@@ -0,0 +1,90 @@
+"""Clés d'idempotence pour la création d'avis.
+
+Un POST /api/reviews portant ``Idempotency-Key`` n'insère qu'un seul avis,
+quel que soit le nombre de tentatives :
+- la clé est propre au client et à l'application (``scoped_key``) : deux
+  clients qui choisissent la même clé ne se répondent pas l'un à l'autre ;
+- les requêtes simultanées d'un même worker attendent le résultat de la
+  première (un futur par clé) ;
+- entre workers ou après coup, la clé est stockée dans ``idempotencyKey``
+  (index unique) avec l'empreinte du corps : l'avis existant est renvoyé
+  sans consommer de jeton du limiteur de débit.
+
+Une clé réutilisée avec un autre corps lève IdempotencyMismatch (422).
+"""
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+MAX_KEY_LENGTH = 200
+
+
+class IdempotencyMismatch(ValueError):
+    """Clé d'idempotence déjà utilisée pour une requête différente"""
+
+
+def scoped_key(client: str, app_id: str, key: str) -> str:
+    return f"{client}|{app_id}|{key}"
+
+
+def fingerprint(payload: Dict[str, Any]) -> str:
+    """Empreinte stable d'un corps de requête (clés triées)"""
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def check_fingerprint(stored: Optional[str], expected: str):
+    if stored is not None and stored != expected:
+        raise IdempotencyMismatch("Idempotency-Key déjà utilisée pour une autre requête")
+
+
+class IdempotentRequests:
+    def __init__(self):
+        self._in_flight: Dict[str, Tuple[asyncio.Future, Optional[str]]] = {}
+        self.coalesced = 0
+
+    def pending(self, key: str) -> bool:
+        """Une requête avec cette clé est en cours dans ce worker"""
+        return key in self._in_flight
+
+    async def run(
+        self,
+        key: str,
+        operation: Callable[[], Awaitable[Any]],
+        request_fingerprint: Optional[str] = None,
+    ) -> Tuple[Any, bool]:
+        """Exécuter ``operation`` une seule fois par clé en cours ; renvoie (résultat, rejoué)"""
+        entry = self._in_flight.get(key)
+        if entry is not None:
+            future, running_fingerprint = entry
+            check_fingerprint(running_fingerprint, request_fingerprint)
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                return await self.run(key, operation, request_fingerprint)
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = (future, request_fingerprint)
+        try:
+            result = await operation()
+        except Exception as e:
+            future.set_exception(e)
+            # Exception déjà remontée par l'appelant principal
+            future.exception()
+            raise
+        except BaseException:
+            # Requête annulée : les requêtes en attente retentent elles-mêmes
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._in_flight[key]
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
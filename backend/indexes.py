@@ -0,0 +1,274 @@
+"""Index MongoDB requis et vérification des plans d'exécution.
+
+``ensure_indexes`` est appelé au démarrage ; ``check_query_plans`` passe
+chaque requête émise par l'application dans ``explain`` et signale celles
+qui retombent sur un COLLSCAN ou n'utilisent pas l'index prévu.
+
+Usage en ligne de commande (depuis backend/) :
+    python indexes.py            # crée les index puis vérifie les plans
+    python indexes.py --check    # vérifie seulement (code retour 1 si COLLSCAN ou index inattendu)
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# pymongo.ASCENDING et DESCENDING, sans importer PyMongo au démarrage du serveur
+ASCENDING = 1
+DESCENDING = -1
+
+# (collection, clés, options)
+REQUIRED_INDEXES: List[Tuple[str, List[Tuple[str, int]], Dict[str, Any]]] = [
+    ("reviews", [("appId", ASCENDING), ("createdAt", DESCENDING), ("id", DESCENDING)], {"name": "appId_createdAt_id"}),
+    ("reviews", [("id", ASCENDING)], {"name": "id_unique", "unique": True}),
+    # Identifiant des avis créés hors ligne (import en masse), absent des autres
+    ("reviews", [("localId", ASCENDING)], {"name": "localId_unique", "unique": True, "sparse": True}),
+    # Clé d'idempotence de POST /api/reviews (client|application|clé), absente des autres
+    ("reviews", [("idempotencyKey", ASCENDING)], {"name": "idempotencyKey_unique", "unique": True, "sparse": True}),
+    ("review_stats", [("appId", ASCENDING)], {"name": "appId_unique", "unique": True}),
+    ("status_checks", [("timestamp", DESCENDING)], {"name": "timestamp"}),
+    # Journal des dépenses : l'unicité attribue les numéros de séquence
+    ("spending_events", [("user", ASCENDING), ("seq", ASCENDING)], {"name": "user_seq_unique", "unique": True}),
+    ("spending_rollups", [("user", ASCENDING), ("period", ASCENDING), ("key", ASCENDING)],
+     {"name": "user_period_key_unique", "unique": True}),
+]
+
+# Valeurs fictives : seule la forme des requêtes compte pour explain
+_APP_ID = "__explain__"
+_REVIEW_ID = "__explain__"
+_CREATED_AT = datetime(2000, 1, 1)
+_USER = "__explain__"
+_LOCAL_ID = "__explain__"
+# Clés composées client|application|clé (idempotence), client:application (limiteur)
+_IDEMPOTENCY_KEY = "__explain__|__explain__|__explain__"
+_BUCKET = "__explain__:__explain__"
+
+# Index attendu de l'identifiant (plan IDHACK, sans nom d'index)
+ID_INDEX = "_id_"
+
+_ROLLUP = {"user": _USER, "period": "month", "key": "2000-01"}
+
+# Requêtes émises par l'application, sous forme de commandes explicables,
+# avec l'index que leur plan doit utiliser : (index attendu, commande)
+QUERY_SHAPES: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    # Pages d'avis (keyset sur appId, createdAt desc, id desc)
+    "reviews.page": ("appId_createdAt_id", {
+        "find": "reviews",
+        "filter": {"appId": _APP_ID},
+        "sort": {"createdAt": -1, "id": -1},
+        "limit": 21,
+    }),
+    "reviews.page_after_cursor": ("appId_createdAt_id", {
+        "find": "reviews",
+        "filter": {"appId": _APP_ID, "$or": [
+            {"createdAt": {"$lt": _CREATED_AT}},
+            {"createdAt": _CREATED_AT, "id": {"$lt": _REVIEW_ID}},
+        ]},
+        "sort": {"createdAt": -1, "id": -1},
+        "limit": 21,
+    }),
+    # Dédoublonnage de l'import en masse (id local des avis créés hors ligne)
+    "reviews.by_local_id": ("localId_unique", {
+        "find": "reviews",
+        "filter": {"localId": _LOCAL_ID},
+        "limit": 1,
+    }),
+    # Rejeu d'un POST /api/reviews avec la même clé d'idempotence
+    "reviews.by_idempotency_key": ("idempotencyKey_unique", {
+        "find": "reviews",
+        "filter": {"idempotencyKey": _IDEMPOTENCY_KEY},
+        "limit": 1,
+    }),
+    "reviews.increment_helpful": ("id_unique", {
+        "update": "reviews",
+        "updates": [{"q": {"id": _REVIEW_ID, "appId": _APP_ID}, "u": {"$inc": {"helpful": 1}}}],
+    }),
+    # Applications ayant des avis (recalcul des agrégats)
+    "reviews.app_ids": ("appId_createdAt_id", {
+        "distinct": "reviews",
+        "key": "appId",
+    }),
+    "review_stats.summary": ("appId_unique", {
+        "find": "review_stats",
+        "filter": {"appId": _APP_ID},
+        "limit": 1,
+    }),
+    "review_stats.summaries": ("appId_unique", {
+        "find": "review_stats",
+        "filter": {"appId": {"$in": [_APP_ID, "__other__"]}},
+    }),
+    # Agrégats des applications sans avis, supprimés après le recalcul complet
+    "review_stats.delete_orphans": ("appId_unique", {
+        "delete": "review_stats",
+        "deletes": [{"q": {"appId": {"$nin": [_APP_ID, "__other__"]}}, "limit": 0}],
+    }),
+    "review_stats.record": ("appId_unique", {
+        "update": "review_stats",
+        "updates": [{"q": {"appId": _APP_ID}, "u": {"$inc": {"count": 1}}, "upsert": True}],
+    }),
+    "migrations.review_stats": (ID_INDEX, {
+        "find": "migrations",
+        "filter": {"_id": "review_stats"},
+        "limit": 1,
+    }),
+    # Seaux du limiteur de débit (RATE_LIMIT_BACKEND=mongo)
+    "rate_limits.take": (ID_INDEX, {
+        "findAndModify": "rate_limits",
+        "query": {"_id": _BUCKET},
+        "update": [{"$set": {"tokens": 1, "updatedAt": _CREATED_AT}}],
+        "upsert": True,
+        "new": True,
+    }),
+    # Secret d'un historique, vérifié à chaque requête
+    "spending_users.secret": (ID_INDEX, {
+        "find": "spending_users",
+        "filter": {"_id": _USER},
+        "limit": 1,
+    }),
+    "spending_heads.get": (ID_INDEX, {
+        "find": "spending_heads",
+        "filter": {"_id": _USER},
+        "limit": 1,
+    }),
+    "spending_heads.advance": (ID_INDEX, {
+        "update": "spending_heads",
+        "updates": [{"q": {"_id": _USER, "seq": {"$lt": 2}}, "u": {"$set": {"seq": 2}}, "upsert": True}],
+    }),
+    "spending_events.by_seq": ("user_seq_unique", {
+        "find": "spending_events",
+        "filter": {"user": _USER, "seq": 1},
+        "limit": 1,
+    }),
+    "spending_events.replay": ("user_seq_unique", {
+        "find": "spending_events",
+        "filter": {"user": _USER, "seq": {"$lte": 100}},
+        "sort": {"seq": -1},
+    }),
+    "spending_events.history": ("user_seq_unique", {
+        "find": "spending_events",
+        "filter": {"user": _USER},
+        "sort": {"seq": 1},
+    }),
+    "spending_events.delete": ("user_seq_unique", {
+        "delete": "spending_events",
+        "deletes": [{"q": {"user": _USER}, "limit": 0}],
+    }),
+    "spending_rollups.evolution": ("user_period_key_unique", {
+        "find": "spending_rollups",
+        "filter": {"user": _USER, "period": "month", "key": {"$gte": "2000-01", "$lte": "2000-12"}},
+        "sort": {"key": -1},
+        "limit": 6,
+    }),
+    "spending_rollups.record": ("user_period_key_unique", {
+        "update": "spending_rollups",
+        "updates": [{
+            "q": _ROLLUP,
+            "u": {"$inc": {"snapshots": 1}, "$min": {"minMonthly": 0}, "$max": {"maxMonthly": 0}},
+            "upsert": True,
+        }],
+    }),
+    "spending_rollups.last": ("user_period_key_unique", {
+        "update": "spending_rollups",
+        "updates": [{
+            "q": {**_ROLLUP, "$or": [
+                {"last": {"$exists": False}},
+                {"last.timestamp": {"$lt": 0}},
+                {"last.timestamp": 0, "last.seq": {"$lt": 1}},
+            ]},
+            "u": {"$set": {"last": {"seq": 1}}},
+        }],
+    }),
+    "spending_rollups.delete": ("user_period_key_unique", {
+        "delete": "spending_rollups",
+        "deletes": [{"q": {"user": _USER}, "limit": 0}],
+    }),
+    "status_checks.list": ("timestamp", {
+        "find": "status_checks",
+        "filter": {},
+        "sort": {"timestamp": -1},
+        "limit": 1000,
+    }),
+}
+
+
+async def ensure_indexes(db):
+    """Créer les index manquants (idempotent)"""
+    for collection, keys, options in REQUIRED_INDEXES:
+        await db[collection].create_index(keys, **options)
+    logger.info(f"{len(REQUIRED_INDEXES)} index MongoDB vérifiés")
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Étapes d'un plan d'exécution, en profondeur"""
+    stages = [plan]
+    for child_key in ("inputStage", "queryPlan"):
+        if child_key in plan:
+            stages += _plan_stages(plan[child_key])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return stages
+
+
+def _stage_index(stage: Dict[str, Any]) -> Optional[str]:
+    if "indexName" in stage:
+        return stage["indexName"]
+    if stage.get("stage", "").endswith("IDHACK"):
+        return ID_INDEX
+    return None
+
+
+async def check_query_plans(db) -> Dict[str, Dict[str, Any]]:
+    """Expliquer chaque requête connue ; signaler les COLLSCAN et les index inattendus"""
+    report = {}
+    for name, (expected, command) in QUERY_SHAPES.items():
+        explained = await db.command("explain", command, verbosity="queryPlanner")
+        stages = _plan_stages(explained["queryPlanner"]["winningPlan"])
+        names = [stage.get("stage", "") for stage in stages]
+        used = [index for index in map(_stage_index, stages) if index is not None]
+        report[name] = {
+            "stages": names,
+            "indexes": used,
+            "expected": expected,
+            "collscan": "COLLSCAN" in names,
+            "unexpected": expected not in used,
+        }
+        if report[name]["collscan"]:
+            logger.warning(f"Requête {name} sans index (COLLSCAN)")
+        elif report[name]["unexpected"]:
+            logger.warning(f"Requête {name} servie par {used} au lieu de {expected}")
+    return report
+
+
+async def _main(check_only: bool) -> int:
+    import os
+    from pathlib import Path
+
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        if not check_only:
+            await ensure_indexes(db)
+        report = await check_query_plans(db)
+    finally:
+        client.close()
+    for name, result in report.items():
+        status = "COLLSCAN" if result["collscan"] else "INDEX" if result["unexpected"] else "ok"
+        print(f"{status:9} {name} ({result['expected']}): {' <- '.join(result['stages'])}")
+    return 1 if any(result["collscan"] or result["unexpected"] for result in report.values()) else 0
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Index MongoDB et vérification des plans de requêtes")
+    parser.add_argument('--check', action='store_true', help="vérifier sans créer les index")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main(args.check)))
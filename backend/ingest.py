@@ -0,0 +1,223 @@
+"""Import en masse d'avis (NDJSON), partagé par POST /api/reviews/bulk et la CLI.
+
+Les deux chemins sont réservés à l'administration (jeton ADMIN_TOKEN pour
+la route) : ``helpful`` et ``date`` sont repris tels quels, ce qu'un client
+public ne doit pas pouvoir faire.
+
+Chaque ligne est validée avec ReviewCreate puis les avis sont insérés par
+lots avec ``insert_many`` non ordonné. Les avis créés hors ligne par le
+frontend gardent leur identifiant ``local_...`` dans ``localId`` (index
+unique) : un même avis importé deux fois n'est inséré qu'une fois.
+
+Usage en ligne de commande (depuis backend/) :
+    python ingest.py avis.ndjson [autres.ndjson ...]
+    python ingest.py --local-storage export.json
+
+Le second format est un export du localStorage du navigateur : un objet
+JSON dont les clés ``reviews_{appId}`` contiennent la liste des avis.
+"""
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+
+from models import ReviewCreate
+from reviews import build_review, parse_review_date, stats_increments
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+DUPLICATE_KEY_ERROR = 11000
+# Limites du flux NDJSON : un avis tient largement dans 64 Kio
+MAX_LINE_BYTES = 64 * 1024
+
+
+class IngestTooLarge(ValueError):
+    """Ligne trop longue ou trop d'avis dans le flux (les lots précédents sont déjà insérés)"""
+
+
+@dataclass
+class IngestReport:
+    received: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    def add_error(self, line: int, error: str):
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "errors": self.errors,
+        }
+
+
+def review_document(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Document MongoDB d'un avis importé ; lève ValueError s'il est invalide"""
+    if not isinstance(record, dict):
+        raise ValueError("un objet JSON est attendu")
+    review_input = ReviewCreate(**record)
+    created_at = parse_review_date(record["date"]) if record.get("date") else None
+    helpful = record.get("helpful", 0)
+    if not isinstance(helpful, int) or helpful < 0:
+        raise ValueError("helpful doit être un entier positif")
+    document = build_review(review_input, created_at=created_at, helpful=helpful).model_dump()
+    local_id = record.get("id")
+    if local_id:
+        document["localId"] = str(local_id)
+    return document
+
+
+async def iter_ndjson(
+    chunks: AsyncIterable[bytes],
+    max_line_bytes: int = MAX_LINE_BYTES,
+    max_records: Optional[int] = None,
+) -> AsyncIterator[Tuple[int, bytes]]:
+    """Découper un flux d'octets en lignes numérotées (lignes vides ignorées)
+
+    Lève IngestTooLarge dès qu'une ligne dépasse ``max_line_bytes`` ou que
+    le flux contient plus de ``max_records`` lignes non vides : la mémoire
+    reste bornée quel que soit le corps envoyé.
+    """
+    buffer = b""
+    line_number = 0
+    records = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        if len(buffer) > max_line_bytes:
+            raise IngestTooLarge(f"Ligne {line_number + len(lines) + 1} trop longue (plus de {max_line_bytes} octets)")
+        for line in lines:
+            line_number += 1
+            if len(line) > max_line_bytes:
+                raise IngestTooLarge(f"Ligne {line_number} trop longue (plus de {max_line_bytes} octets)")
+            if line.strip():
+                records += 1
+                if max_records is not None and records > max_records:
+                    raise IngestTooLarge(f"{max_records} avis maximum par import")
+                yield line_number, line
+    if buffer.strip():
+        if max_records is not None and records >= max_records:
+            raise IngestTooLarge(f"{max_records} avis maximum par import")
+        yield line_number + 1, buffer
+
+
+async def _insert_batch(db, documents: List[Dict[str, Any]], report: IngestReport):
+    from pymongo.errors import BulkWriteError
+
+    failed: Set[int] = set()
+    try:
+        await db.reviews.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            failed.add(error["index"])
+            if error.get("code") == DUPLICATE_KEY_ERROR:
+                report.duplicates += 1
+            else:
+                report.invalid += 1
+                report.add_error(-1, error.get("errmsg", "erreur d'écriture"))
+    inserted = [doc for index, doc in enumerate(documents) if index not in failed]
+    report.inserted += len(inserted)
+    if inserted:
+        await db.review_stats.bulk_write(stats_increments(inserted), ordered=False)
+
+
+async def ingest_reviews(
+    db,
+    lines: AsyncIterable[Tuple[int, Any]],
+    batch_size: int = BATCH_SIZE,
+) -> IngestReport:
+    """Valider et insérer des avis par lots.
+
+    ``lines`` produit des couples (numéro de ligne, ligne JSON ou dict déjà décodé).
+    """
+    report = IngestReport()
+    seen_local_ids: Set[str] = set()
+    batch: List[Dict[str, Any]] = []
+    async for line_number, line in lines:
+        report.received += 1
+        try:
+            record = json.loads(line) if isinstance(line, (bytes, str)) else line
+            document = review_document(record)
+        except (ValueError, ValidationError, TypeError) as e:
+            report.invalid += 1
+            report.add_error(line_number, str(e))
+            continue
+        local_id = document.get("localId")
+        if local_id:
+            if local_id in seen_local_ids:
+                report.duplicates += 1
+                continue
+            seen_local_ids.add(local_id)
+        batch.append(document)
+        if len(batch) >= batch_size:
+            await _insert_batch(db, batch, report)
+            batch = []
+    if batch:
+        await _insert_batch(db, batch, report)
+    logger.info(
+        f"Import d'avis: {report.inserted} insérés, {report.duplicates} doublons, "
+        f"{report.invalid} invalides sur {report.received}"
+    )
+    return report
+
+
+async def _iter_files(paths: List[str], local_storage: bool) -> AsyncIterator[Tuple[int, Any]]:
+    for path in paths:
+        if local_storage:
+            with open(path, encoding="utf-8") as f:
+                dump = json.load(f)
+            line_number = 0
+            for key, value in dump.items():
+                if not key.startswith("reviews_"):
+                    continue
+                app_id = key[len("reviews_"):]
+                # Le localStorage stocke des chaînes JSON
+                reviews = json.loads(value) if isinstance(value, str) else value
+                for review in reviews:
+                    line_number += 1
+                    yield line_number, {**review, "appId": app_id}
+        else:
+            with open(path, "rb") as f:
+                for line_number, line in enumerate(f, start=1):
+                    if line.strip():
+                        yield line_number, line
+
+
+async def _main(paths: List[str], local_storage: bool, batch_size: int) -> Dict[str, Any]:
+    import os
+    from pathlib import Path
+
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    try:
+        db = client[os.environ['DB_NAME']]
+        report = await ingest_reviews(db, _iter_files(paths, local_storage), batch_size)
+    finally:
+        client.close()
+    return report.as_dict()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Importer des avis en masse dans MongoDB")
+    parser.add_argument('paths', nargs='+', help="fichiers NDJSON (ou exports localStorage avec --local-storage)")
+    parser.add_argument('--local-storage', action='store_true', help="fichiers JSON exportés du localStorage")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(asyncio.run(_main(args.paths, args.local_storage, args.batch_size)), indent=2))
@@ -0,0 +1,75 @@
+"""Listeners pymongo.monitoring des compteurs PoolStats et CommandMetrics.
+
+Importé par database.Mongo à la création du client seulement : ce module
+charge PyMongo, que server.py n'importe pas au démarrage. Les compteurs
+eux-mêmes restent sans dépendance à PyMongo et nomment dans ``LISTENER``
+la classe de monitoring qui doit les relayer.
+"""
+from pymongo import monitoring
+
+
+class CommandListener(monitoring.CommandListener):
+    """Relaie les événements de commande vers un compteur (CommandMetrics)"""
+
+    def __init__(self, handler):
+        self.handler = handler
+
+    def started(self, event):
+        self.handler.started(event)
+
+    def succeeded(self, event):
+        self.handler.succeeded(event)
+
+    def failed(self, event):
+        self.handler.failed(event)
+
+
+class ConnectionPoolListener(monitoring.ConnectionPoolListener):
+    """Relaie les événements du pool de connexions vers un compteur (PoolStats)"""
+
+    def __init__(self, handler):
+        self.handler = handler
+
+    def pool_created(self, event):
+        self.handler.pool_created(event)
+
+    def pool_ready(self, event):
+        self.handler.pool_ready(event)
+
+    def pool_cleared(self, event):
+        self.handler.pool_cleared(event)
+
+    def pool_closed(self, event):
+        self.handler.pool_closed(event)
+
+    def connection_created(self, event):
+        self.handler.connection_created(event)
+
+    def connection_ready(self, event):
+        self.handler.connection_ready(event)
+
+    def connection_closed(self, event):
+        self.handler.connection_closed(event)
+
+    def connection_check_out_started(self, event):
+        self.handler.connection_check_out_started(event)
+
+    def connection_check_out_failed(self, event):
+        self.handler.connection_check_out_failed(event)
+
+    def connection_checked_out(self, event):
+        self.handler.connection_checked_out(event)
+
+    def connection_checked_in(self, event):
+        self.handler.connection_checked_in(event)
+
+
+LISTENERS = {
+    "CommandListener": CommandListener,
+    "ConnectionPoolListener": ConnectionPoolListener,
+}
+
+
+def wrap(handler):
+    """Listener pymongo.monitoring relayant les événements vers ``handler``"""
+    return LISTENERS[handler.LISTENER](handler)
@@ -0,0 +1,215 @@
+"""Instrumentation HTTP et MongoDB, exposée au format texte Prometheus.
+
+MetricsMiddleware (ASGI pur) mesure pour chaque requête la latence, la
+taille de la requête et de la réponse, et le nombre et la durée cumulée des
+commandes MongoDB qu'elle a émises. Ces dernières viennent du command
+monitoring de PyMongo : Motor exécute chaque opération dans un thread avec
+une copie du contexte, le ContextVar de la requête y est donc visible.
+
+Les histogrammes ont des bornes fixes (une recherche dichotomique par
+observation) et les séries sont étiquetées par modèle de route
+(``/api/reviews/{app_id}``) : le coût par requête reste de quelques
+microsecondes et la cardinalité est bornée.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _RequestStats:
+    __slots__ = ('mongo_operations', 'mongo_seconds')
+
+    def __init__(self):
+        self.mongo_operations = 0
+        self.mongo_seconds = 0.0
+
+
+_current_request: contextvars.ContextVar[Optional[_RequestStats]] = contextvars.ContextVar(
+    'metrics_request', default=None
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Labels, extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_bound(bound: float) -> str:
+    return str(int(bound)) if float(bound).is_integer() else repr(bound)
+
+
+class MetricsRegistry:
+    """Séries en mémoire du processus (un registre par worker)"""
+
+    def __init__(self):
+        # nom → (aide, bornes, {étiquettes: histogramme})
+        self._histograms: Dict[str, Tuple[str, Sequence[float], Dict[Labels, Histogram]]] = {}
+        # nom → (aide, {étiquettes: valeur})
+        self._counters: Dict[str, Tuple[str, Dict[Labels, float]]] = {}
+
+    def histogram(self, name: str, help_text: str, bounds: Sequence[float]):
+        self._histograms.setdefault(name, (help_text, bounds, {}))
+
+    def counter(self, name: str, help_text: str):
+        self._counters.setdefault(name, (help_text, {}))
+
+    def observe(self, name: str, labels: Labels, value: float):
+        _, bounds, series = self._histograms[name]
+        histogram = series.get(labels)
+        if histogram is None:
+            histogram = series[labels] = Histogram(bounds)
+        histogram.observe(value)
+
+    def inc(self, name: str, labels: Labels, value: float = 1):
+        series = self._counters[name][1]
+        series[labels] = series.get(labels, 0) + value
+
+    def render(self, gauges: Iterable[Tuple[str, str, str, float]] = ()) -> str:
+        """Exposition texte Prometheus ; ``gauges`` : (nom, type, aide, valeur) calculés à la demande"""
+        lines: List[str] = []
+        for name, (help_text, series) in self._counters.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for labels, value in list(series.items()):
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        for name, (help_text, bounds, series) in self._histograms.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for labels, histogram in list(series.items()):
+                cumulative = 0
+                for bound, count in zip(bounds, histogram.counts):
+                    cumulative += count
+                    le = _format_labels(labels, 'le="%s"' % _format_bound(bound))
+                    lines.append(f"{name}_bucket{le} {cumulative}")
+                le = _format_labels(labels, 'le="+Inf"')
+                lines.append(f"{name}_bucket{le} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        for name, kind, help_text, value in gauges:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return '\n'.join(lines) + '\n'
+
+
+def build_registry() -> MetricsRegistry:
+    registry = MetricsRegistry()
+    registry.counter('http_requests_total', "Requêtes HTTP par route, méthode et statut")
+    registry.histogram('http_request_duration_seconds', "Latence des requêtes HTTP", LATENCY_BUCKETS)
+    registry.histogram('http_request_size_bytes', "Taille du corps des requêtes", SIZE_BUCKETS)
+    registry.histogram('http_response_size_bytes', "Taille du corps des réponses", SIZE_BUCKETS)
+    registry.histogram('http_request_mongo_operations', "Commandes MongoDB émises par requête", COUNT_BUCKETS)
+    registry.histogram(
+        'http_request_mongo_duration_seconds', "Durée cumulée des commandes MongoDB par requête", LATENCY_BUCKETS
+    )
+    registry.counter('mongodb_commands_total', "Commandes MongoDB par nom et résultat")
+    registry.histogram('mongodb_command_duration_seconds', "Durée des commandes MongoDB", LATENCY_BUCKETS)
+    return registry
+
+
+class CommandMetrics:
+    """Durée et nombre des commandes MongoDB, rattachées à la requête en cours"""
+
+    # Branché par listeners.wrap, sans importer PyMongo ici
+    LISTENER = 'CommandListener'
+
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+        # Les événements arrivent depuis les threads de Motor
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        pass
+
+    def _record(self, event, outcome: str):
+        seconds = event.duration_micros / 1e6
+        command = (('command', event.command_name),)
+        with self._lock:
+            self.registry.inc('mongodb_commands_total', command + (('outcome', outcome),))
+            self.registry.observe('mongodb_command_duration_seconds', command, seconds)
+        stats = _current_request.get()
+        if stats is not None:
+            stats.mongo_operations += 1
+            stats.mongo_seconds += seconds
+
+    def succeeded(self, event):
+        self._record(event, 'success')
+
+    def failed(self, event):
+        self._record(event, 'failure')
+
+
+class MetricsMiddleware:
+    """Middleware ASGI pur : quelques compteurs par requête, aucune copie des corps"""
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = _RequestStats()
+        token = _current_request.set(stats)
+        request_size = 0
+        response_size = 0
+        status = 500
+
+        async def counting_receive():
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            nonlocal response_size, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_request.reset(token)
+            route = scope.get("route")
+            # Modèle de route plutôt que chemin réel : cardinalité bornée
+            labels = (("method", scope["method"]), ("route", route.path if route is not None else "unmatched"))
+            registry = self.registry
+            registry.inc('http_requests_total', labels + (("status", str(status)),))
+            registry.observe('http_request_duration_seconds', labels, elapsed)
+            registry.observe('http_request_size_bytes', labels, request_size)
+            registry.observe('http_response_size_bytes', labels, response_size)
+            registry.observe('http_request_mongo_operations', labels, stats.mongo_operations)
+            registry.observe('http_request_mongo_duration_seconds', labels, stats.mongo_seconds)
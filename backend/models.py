@@ -0,0 +1,137 @@
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+from typing import Dict, List, Optional
+import uuid
+from datetime import datetime
+
+
+# Define Models
+class StatusCheck(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    client_name: str
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+class StatusCheckCreate(BaseModel):
+    client_name: str
+
+# Review Models
+class Review(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    appId: str
+    userName: str
+    rating: int = Field(ge=1, le=5)  # Entre 1 et 5
+    comment: str
+    date: str  # Date d'affichage (dd/mm/YYYY)
+    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    helpful: int = Field(default=0)
+    userInitials: str
+
+class ReviewCreate(BaseModel):
+    appId: str
+    userName: str
+    rating: int = Field(ge=1, le=5)
+    comment: str
+
+# Optimisation de panier
+class OptimizeRequest(BaseModel):
+    plans: Dict[str, int]  # id de l'abonnement -> index du plan actuel (selectedPlans)
+    budget: Optional[float] = Field(default=None, ge=0, le=100000)  # Budget mensuel (useBudget)
+    months: int = Field(default=12, ge=1, le=1200)
+    requiredCategories: Optional[List[str]] = None  # Par défaut : toutes celles du panier
+    priorities: Dict[str, float] = Field(default_factory=dict)
+    allowDowngrade: bool = True
+
+# Fichiers du catalogue (miroir des interfaces Subscription/Plan/PromoCode du frontend)
+# Les champs inconnus sont conservés : le frontend peut en ajouter sans casser le rechargement
+class Plan(BaseModel):
+    model_config = ConfigDict(extra='allow')
+
+    name: str
+    monthlyPrice: float = Field(ge=0)
+    features: Optional[List[str]] = None
+    videoQuality: Optional[str] = None
+    simultaneousStreams: Optional[int] = None
+    downloads: Optional[bool] = None
+
+class EnrichedSubscription(BaseModel):
+    model_config = ConfigDict(extra='allow')
+
+    description: Optional[str] = None
+    descriptionEn: Optional[str] = None
+    features: Optional[List[str]] = None
+    pros: Optional[List[str]] = None
+    cons: Optional[List[str]] = None
+    devices: Optional[List[str]] = None
+    videoQuality: Optional[List[str]] = None
+    simultaneousStreams: Optional[List[int]] = None
+    website: Optional[str] = None
+    founded: Optional[str] = None
+    headquarters: Optional[str] = None
+
+class Subscription(EnrichedSubscription):
+    id: str = Field(min_length=1)
+    name: str = Field(min_length=1)
+    logo: str
+    color: str
+    plans: List[Plan] = Field(min_length=1)
+    category: str = Field(min_length=1)
+
+class DurationOption(BaseModel):
+    label: str
+    months: int = Field(gt=0)
+    value: str
+
+class CatalogFile(BaseModel):
+    subscriptions: List[Subscription]
+    durationOptions: List[DurationOption] = Field(default_factory=list)
+
+    @model_validator(mode='after')
+    def unique_ids(self):
+        seen = set()
+        for sub in self.subscriptions:
+            if sub.id in seen:
+                raise ValueError(f"Identifiant en double: {sub.id}")
+            seen.add(sub.id)
+        return self
+
+class PromoCode(BaseModel):
+    model_config = ConfigDict(extra='allow')
+
+    code: str = Field(min_length=1)
+    description: str
+    descriptionEn: str
+    discount: str
+    discountEn: str
+    expiresAt: str
+    isActive: bool
+
+    @field_validator('expiresAt')
+    @classmethod
+    def iso_date(cls, value: str) -> str:
+        datetime.fromisoformat(value)
+        return value
+
+class CategoryNames(BaseModel):
+    fr: str
+    en: str
+
+# Historique des dépenses (miroir de SpendingSnapshot du frontend)
+class SpendingItem(BaseModel):
+    id: str = Field(min_length=1, max_length=100)
+    name: str = Field(max_length=200)
+    monthlyPrice: float = Field(ge=0, le=100000)
+
+class SpendingSnapshotCreate(BaseModel):
+    totalMonthly: float = Field(ge=0)
+    totalYearly: float = Field(ge=0)
+    subscriptionCount: int = Field(ge=0)
+    subscriptions: List[SpendingItem] = Field(default_factory=list, max_length=500)
+    # Reprise de l'historique local : horodatage (ms) et mois d'origine
+    timestamp: Optional[int] = Field(default=None, ge=946684800000)  # après le 01/01/2000
+    date: Optional[str] = Field(default=None, pattern=r'^\d{4}-(0[1-9]|1[0-2])$')  # YYYY-MM, heure locale
+
+    @model_validator(mode='after')
+    def unique_ids(self):
+        ids = [item.id for item in self.subscriptions]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Abonnement en double dans l'instantané")
+        return self
@@ -0,0 +1,278 @@
+"""Optimisation d'un panier d'abonnements sous contrainte de budget.
+
+Problème de sac à dos à choix multiples : pour chaque abonnement du panier
+on garde un plan (au plus aussi cher que l'actuel) ou on le résilie.
+L'objectif est lexicographique :
+
+1. garder le plus de valeur possible (somme des priorités, 1 par défaut) ;
+2. à valeur égale, payer le moins cher possible ;
+
+sous contraintes : coût mensuel ≤ budget et au moins un abonnement conservé
+dans chaque catégorie requise. La programmation dynamique porte sur le coût
+exact en centimes ; chaque abonnement est un décalage vectorisé NumPy, soit
+O(abonnements × plans × budget) — quelques millisecondes pour 50+ services.
+
+La table (abonnements × budget) est bornée par MAX_CELLS : au-delà, le coût
+est compté en dizaines de centimes puis en euros, arrondi au supérieur (la
+solution respecte toujours le budget réel, au prix de quelques centimes
+d'optimalité). Si même en euros la table dépasse la borne, ``optimize``
+lève BasketTooLarge.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from catalog import Catalog
+
+NEG = np.iinfo(np.int64).min // 4
+VALUE_SCALE = 1000
+
+# Cases de la table de programmation dynamique (~130 ms et ~5 Mo d'historique)
+MAX_CELLS = 2_000_000
+# Unités de coût essayées, en centimes : centime, dizaine de centimes, euro
+COST_UNITS = (1, 10, 100)
+
+
+class BasketTooLarge(ValueError):
+    """Panier et budget trop grands pour la programmation dynamique"""
+
+
+def _cents(price: float) -> int:
+    return int(round(price * 100))
+
+
+def _units(cents: int, unit: int) -> int:
+    """Coût en unités, arrondi au supérieur"""
+    return -(-cents // unit)
+
+
+def _shift(values: np.ndarray, cost: int) -> np.ndarray:
+    """values décalé de ``cost`` vers les coûts croissants (NEG en tête)"""
+    if cost == 0:
+        return values
+    shifted = np.full_like(values, NEG)
+    if cost < len(values):
+        shifted[cost:] = values[:-cost]
+    return shifted
+
+
+class _Item:
+    __slots__ = ('id', 'name', 'category', 'current', 'value', 'options')
+
+    def __init__(self, sub: Dict, current: int, value: int, allow_downgrade: bool):
+        self.id = sub['id']
+        self.name = sub['name']
+        self.category = sub['category']
+        self.current = current
+        self.value = value
+        current_price = sub['plans'][current]['monthlyPrice']
+        # Options : (index du plan, coût en centimes), sans jamais monter en gamme
+        self.options: List[Tuple[int, int]] = [
+            (index, _cents(plan['monthlyPrice']))
+            for index, plan in enumerate(sub['plans'])
+            if index == current or (allow_downgrade and plan['monthlyPrice'] < current_price)
+        ]
+
+
+class BasketOptimizer:
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+
+    def _items(self, plans: Dict[str, int], priorities: Dict[str, float], allow_downgrade: bool) -> List[_Item]:
+        items = []
+        for subscription_id, plan_index in plans.items():
+            sub = self.catalog.get(subscription_id)
+            if sub is None or not 0 <= plan_index < len(sub['plans']):
+                raise KeyError(f"{subscription_id}:{plan_index}")
+            value = int(round(priorities.get(subscription_id, 1.0) * VALUE_SCALE))
+            items.append(_Item(sub, plan_index, max(value, 0), allow_downgrade))
+        return items
+
+    @staticmethod
+    def _table(items: List[_Item], budget: Optional[float], max_cells: int) -> Optional[Tuple[int, int]]:
+        """(unité de coût en centimes, cases) de la programmation dynamique, None si inutile"""
+        cheapest_total = sum(min(cost for _, cost in item.options) for item in items)
+        if budget is None or _cents(budget) >= cheapest_total:
+            return None
+        for unit in COST_UNITS:
+            cells = len(items) * (_cents(budget) // unit + 1)
+            if cells <= max_cells:
+                return unit, cells
+        raise BasketTooLarge(
+            f"Panier trop grand pour ce budget ({len(items)} abonnements, {budget:g} €/mois)"
+        )
+
+    def table_size(self, plans: Dict[str, int], budget: Optional[float], allow_downgrade: bool = True,
+                   max_cells: int = MAX_CELLS) -> int:
+        """Cases de la programmation dynamique pour ce panier (0 si le budget suffit)
+
+        Lève KeyError (plan inconnu) ou BasketTooLarge, comme ``optimize``.
+        """
+        table = self._table(self._items(plans, {}, allow_downgrade), budget, max_cells)
+        return table[1] if table else 0
+
+    def optimize(
+        self,
+        plans: Dict[str, int],
+        budget: Optional[float] = None,
+        months: int = 12,
+        required_categories: Optional[Iterable[str]] = None,
+        priorities: Optional[Dict[str, float]] = None,
+        allow_downgrade: bool = True,
+        max_cells: int = MAX_CELLS,
+    ) -> Dict:
+        """Meilleure affectation de plans pour un panier (``plans`` : id → index du plan actuel)"""
+        items = self._items(plans, priorities or {}, allow_downgrade)
+        table = self._table(items, budget, max_cells)
+        if required_categories is None:
+            required = {item.category for item in items}
+        else:
+            required = set(required_categories)
+
+        by_category: Dict[str, List[_Item]] = {}
+        for item in items:
+            by_category.setdefault(item.category, []).append(item)
+        uncoverable = sorted(required - set(by_category))
+
+        # Sans budget (ou budget suffisant), chaque abonnement passe à son plan le moins cher
+        if table is None:
+            choice = self._cheapest(by_category, required)
+            unit = 1
+        else:
+            unit = table[0]
+            choice = self._solve(by_category, required, _cents(budget) // unit, unit)
+
+        result = self._result(items, choice, months, budget, uncoverable, required, by_category)
+        result['costResolution'] = unit / 100
+        return result
+
+    @staticmethod
+    def _cheapest(by_category: Dict[str, List[_Item]], required: set) -> Dict[str, Optional[int]]:
+        """Solution sans contrainte de budget : même objectif que ``_solve``
+
+        Les abonnements de priorité nulle n'apportent aucune valeur : ils sont
+        résiliés, sauf le moins cher d'une catégorie requise qui n'en a pas d'autre.
+        """
+        result: Dict[str, Optional[int]] = {}
+        for category, cat_items in by_category.items():
+            for item in cat_items:
+                result[item.id] = min(item.options, key=lambda o: o[1])[0] if item.value > 0 else None
+            if category in required and all(result[item.id] is None for item in cat_items):
+                item = min(cat_items, key=lambda item: min(cost for _, cost in item.options))
+                result[item.id] = min(item.options, key=lambda o: o[1])[0]
+        return result
+
+    def _solve(self, by_category: Dict[str, List[_Item]], required: set, capacity: int,
+               unit: int = 1) -> Optional[Dict[str, Optional[int]]]:
+        """Sac à dos à choix multiples, en deux états par catégorie (aucun / au moins un gardé)
+
+        ``capacity`` et les coûts sont comptés en ``unit`` centimes.
+        """
+        best = np.full(capacity + 1, NEG, dtype=np.int64)
+        best[0] = 0
+        # Historique pour la reconstruction : (catégorie, état d'origine, choix par abonnement)
+        history = []
+        for category, cat_items in by_category.items():
+            none_kept = best
+            some_kept = np.full_like(best, NEG)
+            choices = []
+            for item in cat_items:
+                candidate = some_kept.copy()
+                # 0 : abonnement résilié ; 1 + k : option k depuis « au moins un » ;
+                # 1 + n + k : option k depuis « aucun »
+                choice = np.zeros(capacity + 1, dtype=np.int16)
+                n = len(item.options)
+                for k, (_, cents) in enumerate(item.options):
+                    cost = _units(cents, unit)
+                    for origin, offset in ((some_kept, 1), (none_kept, 1 + n)):
+                        shifted = _shift(origin, cost)
+                        gained = np.where(shifted > NEG, shifted + item.value, NEG)
+                        better = gained > candidate
+                        candidate = np.where(better, gained, candidate)
+                        choice[better] = offset + k
+                some_kept = candidate
+                choices.append(choice)
+            if category in required:
+                from_some = np.ones(capacity + 1, dtype=bool)
+                best = some_kept
+            else:
+                from_some = some_kept > none_kept
+                best = np.where(from_some, some_kept, none_kept)
+            history.append((cat_items, from_some, choices))
+
+        if best.max() <= NEG:
+            return None
+        # Valeur maximale, puis coût minimal
+        cost = int(np.flatnonzero(best == best.max())[0])
+
+        result: Dict[str, Optional[int]] = {}
+        for cat_items, from_some, choices in reversed(history):
+            some = bool(from_some[cost])
+            for item, choice in zip(reversed(cat_items), reversed(choices)):
+                if not some:
+                    result[item.id] = None
+                    continue
+                c = int(choice[cost])
+                n = len(item.options)
+                if c == 0:
+                    result[item.id] = None
+                    continue
+                k = c - 1 if c <= n else c - 1 - n
+                plan_index, plan_cents = item.options[k]
+                result[item.id] = plan_index
+                cost -= _units(plan_cents, unit)
+                some = c <= n
+        return result
+
+    def _result(self, items, choice, months, budget, uncoverable, required, by_category) -> Dict:
+        feasible = choice is not None and not uncoverable
+        current_monthly = sum(self._price(item.id, item.current) for item in items)
+        assignments = []
+        optimized_monthly = 0.0
+        for item in items:
+            plan_index = choice.get(item.id, item.current) if choice is not None else item.current
+            if plan_index is None:
+                action, price, plan_name = 'drop', 0.0, None
+            else:
+                price = self._price(item.id, plan_index)
+                plan_name = self.catalog.get(item.id)['plans'][plan_index]['name']
+                action = 'keep' if plan_index == item.current else 'downgrade'
+            optimized_monthly += price
+            assignments.append({
+                'id': item.id,
+                'name': item.name,
+                'category': item.category,
+                'currentPlan': item.current,
+                'plan': plan_index,
+                'planName': plan_name,
+                'monthlyPrice': price,
+                'action': action,
+            })
+
+        # Coût minimal pour couvrir les catégories requises (utile si infaisable)
+        minimum_monthly = sum(
+            min(min(cost for _, cost in item.options) for item in by_category[category])
+            for category in required if category in by_category
+        ) / 100
+        return {
+            'feasible': feasible,
+            'months': months,
+            'budget': budget,
+            'minimumMonthly': round(minimum_monthly, 2),
+            'current': self._amounts(current_monthly, months),
+            'optimized': self._amounts(optimized_monthly, months),
+            'savings': self._amounts(current_monthly - optimized_monthly, months),
+            'assignments': assignments,
+            'uncoveredCategories': uncoverable,
+        }
+
+    def _price(self, subscription_id: str, plan_index: int) -> float:
+        return self.catalog.get(subscription_id)['plans'][plan_index]['monthlyPrice']
+
+    @staticmethod
+    def _amounts(monthly: float, months: int) -> Dict[str, float]:
+        # Même arrondi que calculateTotalCost côté frontend
+        return {
+            'monthly': round(monthly, 2),
+            'total': float(np.floor(monthly * months * 100 + 0.5) / 100),
+        }
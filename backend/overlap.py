@@ -0,0 +1,143 @@
+"""Détection des doublons et chevauchements entre abonnements.
+
+Les noms sont normalisés (accents, casse, « + » → « plus ») puis découpés
+en trigrammes ; un index inversé trigramme → abonnements permet de ne
+comparer que les paires qui partagent au moins un trigramme, au lieu de
+toutes les paires du panier ou du catalogue.
+"""
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from catalog import Catalog, sort_key
+
+# Catégories où deux services différents font en général double emploi
+OVERLAP_CATEGORIES = {'Streaming vidéo', 'Musique', 'Jeux vidéo'}
+
+# Seuil de similarité (coefficient de Dice sur les trigrammes)
+DEFAULT_THRESHOLD = 0.65
+
+# Mots trop génériques pour distinguer deux services
+GENERIC_TOKENS = {'premium', 'pro', 'plus', 'app', 'the', 'le', 'la', 'les', 'de', 'du', 'des', 'and', 'et'}
+
+_SYMBOLS = {'+': ' plus ', '&': ' and '}
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def name_tokens(name: str) -> Tuple[str, ...]:
+    """« Disney+ » et « Disney Plus » donnent tous deux ('disney',)"""
+    text = sort_key(name)
+    for symbol, replacement in _SYMBOLS.items():
+        text = text.replace(symbol, replacement)
+    tokens = [token for token in _NON_ALNUM.split(text) if token]
+    # Un nom fait uniquement de mots génériques est gardé tel quel
+    return tuple(token for token in tokens if token not in GENERIC_TOKENS) or tuple(tokens)
+
+
+def trigrams(compact: str) -> FrozenSet[str]:
+    padded = f"^{compact}$"
+    if len(padded) < 3:
+        return frozenset([padded])
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def dice(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return 2 * len(a & b) / (len(a) + len(b)) if a or b else 0.0
+
+
+class OverlapIndex:
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        self.tokens: Dict[str, FrozenSet[str]] = {}
+        self.compact: Dict[str, str] = {}
+        self.grams: Dict[str, FrozenSet[str]] = {}
+        self.postings: Dict[str, List[str]] = {}
+        for sub in catalog.subscriptions:
+            tokens = name_tokens(sub['name'])
+            self.tokens[sub['id']] = frozenset(tokens)
+            self.compact[sub['id']] = ''.join(tokens)
+            self.grams[sub['id']] = trigrams(self.compact[sub['id']])
+            for gram in self.grams[sub['id']]:
+                self.postings.setdefault(gram, []).append(sub['id'])
+
+    def _compare(self, id1: str, id2: str, threshold: float) -> Optional[Dict]:
+        sub1, sub2 = self.catalog.get(id1), self.catalog.get(id2)
+        score = dice(self.grams[id1], self.grams[id2])
+        tokens1, tokens2 = self.tokens[id1], self.tokens[id2]
+        if self.compact[id1] == self.compact[id2]:
+            reason, label = 'same-name', 'Nom identique'
+        elif score >= threshold or (tokens1 and tokens2 and (tokens1 <= tokens2 or tokens2 <= tokens1)):
+            reason, label = 'similar-name', 'Noms similaires'
+        elif sub1['category'] == sub2['category'] and sub1['category'] in OVERLAP_CATEGORIES:
+            reason, label = 'same-category', 'Même catégorie'
+        else:
+            return None
+
+        min1 = self.catalog.min_prices[self.catalog.by_id[id1]]
+        min2 = self.catalog.min_prices[self.catalog.by_id[id2]]
+        cheaper = sub1 if min1 <= min2 else sub2
+        return {
+            'subscription1': {'id': id1, 'name': sub1['name']},
+            'subscription2': {'id': id2, 'name': sub2['name']},
+            'reason': reason,
+            'label': label,
+            'score': round(score, 3),
+            'category': sub1['category'] if sub1['category'] == sub2['category'] else None,
+            'recommendation': {
+                'keep': cheaper['id'],
+                'monthlyPrice': min(min1, min2),
+                'savings': round(abs(min1 - min2), 2),
+            },
+        }
+
+    def _name_candidates(self, ids: Iterable[str]) -> Set[Tuple[str, str]]:
+        """Paires partageant au moins un trigramme, via l'index inversé local"""
+        postings: Dict[str, List[str]] = {}
+        for subscription_id in ids:
+            for gram in self.grams[subscription_id]:
+                postings.setdefault(gram, []).append(subscription_id)
+        pairs = set()
+        for members in postings.values():
+            for i, id1 in enumerate(members):
+                for id2 in members[i + 1:]:
+                    pairs.add((id1, id2) if id1 < id2 else (id2, id1))
+        return pairs
+
+    def basket_overlaps(self, ids: Iterable[str], threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+        """Doublons et chevauchements dans un panier ; lève KeyError pour un id inconnu"""
+        ids = list(dict.fromkeys(ids))
+        for subscription_id in ids:
+            if subscription_id not in self.grams:
+                raise KeyError(subscription_id)
+        pairs = self._name_candidates(ids)
+        by_category: Dict[str, List[str]] = {}
+        for subscription_id in ids:
+            category = self.catalog.get(subscription_id)['category']
+            if category in OVERLAP_CATEGORIES:
+                by_category.setdefault(category, []).append(subscription_id)
+        for members in by_category.values():
+            for i, id1 in enumerate(members):
+                for id2 in members[i + 1:]:
+                    pairs.add((id1, id2) if id1 < id2 else (id2, id1))
+        return self._report(pairs, threshold)
+
+    def audit(self, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+        """Doublons probables dans tout le catalogue (noms identiques ou similaires)"""
+        pairs = set()
+        for members in self.postings.values():
+            # Un trigramme présent partout n'apporte rien : les paires viennent des autres
+            if len(members) > len(self.catalog) // 4:
+                continue
+            for i, id1 in enumerate(members):
+                for id2 in members[i + 1:]:
+                    pairs.add((id1, id2) if id1 < id2 else (id2, id1))
+        return [
+            overlap for overlap in self._report(pairs, threshold)
+            if overlap['reason'] != 'same-category'
+        ]
+
+    def _report(self, pairs: Iterable[Tuple[str, str]], threshold: float) -> List[Dict]:
+        overlaps = [self._compare(id1, id2, threshold) for id1, id2 in sorted(pairs)]
+        overlaps = [overlap for overlap in overlaps if overlap is not None]
+        order = {'same-name': 0, 'similar-name': 1, 'same-category': 2}
+        overlaps.sort(key=lambda o: (order[o['reason']], -o['score']))
+        return overlaps
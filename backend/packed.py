@@ -0,0 +1,380 @@
+"""Catalogue binaire compact, projeté en mémoire (mmap) par tous les workers.
+
+Avec plusieurs workers uvicorn, chaque processus relisait et validait les
+fichiers JSON du catalogue et recalculait ses index. Le catalogue validé
+est maintenant écrit une fois par version dans un fichier binaire, que
+chaque worker projette en lecture seule : les pages sont partagées par le
+cache du système, et le démarrage d'un worker ne relit plus le JSON, ne
+revalide rien et ne recalcule pas la table de similarité.
+
+Format (little-endian, sections alignées sur 8 octets) :
+- en-tête : magic, version du format, k de la table de similarité,
+  empreinte des fichiers sources, empreinte du corps du fichier, puis
+  (décalage, longueur) de chaque section ;
+- table des chaînes internées : décalages uint32 puis octets UTF-8 ; une
+  chaîne répétée (catégorie, nom de plan, couleur...) n'est stockée qu'une
+  fois ;
+- abonnements : enregistrements uint32 de taille fixe (chaînes, premier
+  plan, nombre de plans), l'enregistrement i est au décalage i × taille ;
+- plans : prix float64 et noms ;
+- index dérivés : prix min/max par abonnement, voisins (int32) et scores
+  (float32) de la table de similarité ;
+- tables clé → valeur : données enrichies et codes promo (JSON par entrée),
+  traductions des catégories.
+
+Les enregistrements sont décodés depuis la projection à chaque lecture
+(``PackedRecords``) : le worker ne garde aucune copie Python du catalogue.
+Les index dérivés ne deviennent des vues NumPy qu'au premier accès :
+projeter le fichier n'importe pas NumPy.
+
+Le nom du fichier (``packed_filename``) porte la version du format,
+l'empreinte des sources et k : un fichier d'une autre version du code ou
+d'un autre contenu n'est jamais repris. À l'ouverture, l'en-tête, la
+version attendue et la taille du fichier sont vérifiées ; l'empreinte du
+corps ne l'est qu'une fois, par le worker qui vient d'écrire le fichier
+(``verify``), et non à chaque ouverture par les autres workers.
+"""
+import contextlib
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Sequence
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'CCCATLG\0'
+FORMAT_VERSION = 2
+NO_STRING = 0xFFFFFFFF
+
+# magic, version du format, k, empreinte des sources et du corps (16 caractères hexadécimaux), nombre de sections
+_HEADER = struct.Struct('<8sHH16s16sI')
+_SECTION = struct.Struct('<QQ')
+SECTIONS = (
+    'string_offsets', 'string_data', 'subscriptions', 'plan_prices', 'plan_names', 'plan_extra',
+    'durations', 'min_prices', 'max_prices', 'neighbours', 'scores', 'enriched', 'promos', 'categories',
+)
+
+# Champs uint32 d'un enregistrement d'abonnement
+_SUBSCRIPTION_FIELDS = ('id', 'name', 'logo', 'color', 'category', 'extra', 'first_plan', 'plan_count')
+_SUBSCRIPTION_KEYS = frozenset(('id', 'name', 'logo', 'color', 'category', 'plans'))
+_PLAN_KEYS = frozenset(('name', 'monthlyPrice'))
+_RECORD = len(_SUBSCRIPTION_FIELDS)
+
+
+class PackedFormatError(ValueError):
+    """Fichier binaire absent, tronqué ou d'une autre version du format"""
+
+
+def _align(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def _header_size() -> int:
+    return _align(_HEADER.size + _SECTION.size * len(SECTIONS))
+
+
+def _checksum(body) -> bytes:
+    return hashlib.blake2b(body, digest_size=8).hexdigest().encode('ascii')
+
+
+def packed_filename(version: str, k: int) -> str:
+    """Nom du fichier binaire d'une version des sources (empreinte) pour ce format et ce k"""
+    return f"catalog-f{FORMAT_VERSION}-{version}-k{k}.bin"
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+class _StringTable:
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.values: List[bytes] = []
+
+    def intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return NO_STRING
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.values)
+            self.values.append(value.encode('utf-8'))
+        return string_id
+
+    def sections(self) -> Tuple[bytes, bytes]:
+        import numpy as np
+
+        offsets = np.zeros(len(self.values) + 1, dtype='<u4')
+        np.cumsum([len(value) for value in self.values], out=offsets[1:])
+        return offsets.tobytes(), b''.join(self.values)
+
+
+def pack_catalog(
+    version: str,
+    subscriptions: Sequence,
+    duration_options: List[Dict[str, Any]],
+    enriched: Dict[str, Dict[str, Any]],
+    category_translations: Dict[str, str],
+    promo_codes: Dict[str, List[Dict[str, Any]]],
+    neighbours: 'np.ndarray',
+    scores: 'np.ndarray',
+) -> bytes:
+    """Sérialiser un catalogue déjà validé et ses index dérivés"""
+    import numpy as np
+
+    strings = _StringTable()
+    records: List[int] = []
+    plan_prices: List[float] = []
+    plan_names: List[int] = []
+    plan_extra: List[int] = []
+    min_prices: List[float] = []
+    max_prices: List[float] = []
+    for sub in subscriptions:
+        extra = {key: value for key, value in sub.items() if key not in _SUBSCRIPTION_KEYS}
+        records += [
+            strings.intern(sub['id']), strings.intern(sub['name']), strings.intern(sub['logo']),
+            strings.intern(sub['color']), strings.intern(sub['category']),
+            strings.intern(_dumps(extra) if extra else None), len(plan_prices), len(sub['plans']),
+        ]
+        for plan in sub['plans']:
+            plan_extra_fields = {key: value for key, value in plan.items() if key not in _PLAN_KEYS}
+            plan_prices.append(plan['monthlyPrice'])
+            plan_names.append(strings.intern(plan['name']))
+            plan_extra.append(strings.intern(_dumps(plan_extra_fields) if plan_extra_fields else None))
+        prices = [plan['monthlyPrice'] for plan in sub['plans']] or [0.0]
+        min_prices.append(min(prices))
+        max_prices.append(max(prices))
+
+    durations = [
+        value for option in duration_options
+        for value in (strings.intern(option['label']), option['months'], strings.intern(option['value']))
+    ]
+
+    def pairs(mapping: Dict[str, Any], encode) -> bytes:
+        flat = [value for key, item in mapping.items() for value in (strings.intern(key), strings.intern(encode(item)))]
+        return np.asarray(flat, dtype='<u4').tobytes()
+
+    sections = {
+        'subscriptions': np.asarray(records, dtype='<u4').tobytes(),
+        'plan_prices': np.asarray(plan_prices, dtype='<f8').tobytes(),
+        'plan_names': np.asarray(plan_names, dtype='<u4').tobytes(),
+        'plan_extra': np.asarray(plan_extra, dtype='<u4').tobytes(),
+        'durations': np.asarray(durations, dtype='<u4').tobytes(),
+        'min_prices': np.asarray(min_prices, dtype='<f8').tobytes(),
+        'max_prices': np.asarray(max_prices, dtype='<f8').tobytes(),
+        'neighbours': np.ascontiguousarray(neighbours, dtype='<i4').tobytes(),
+        'scores': np.ascontiguousarray(scores, dtype='<f4').tobytes(),
+        'enriched': pairs(enriched, _dumps),
+        'promos': pairs(promo_codes, _dumps),
+        'categories': pairs(category_translations, lambda name: name),
+    }
+    # Chaînes en dernier : toutes les sections précédentes y ont interné leurs valeurs
+    sections['string_offsets'], sections['string_data'] = strings.sections()
+
+    k = neighbours.shape[1] if neighbours.ndim == 2 else 0
+    header_size = _header_size()
+    table = []
+    body = []
+    offset = header_size
+    for name in SECTIONS:
+        data = sections[name]
+        table.append(_SECTION.pack(offset, len(data)))
+        body.append(data + b'\0' * (_align(len(data)) - len(data)))
+        offset += _align(len(data))
+    body = b''.join(body)
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, k, version.encode('ascii'), _checksum(body), len(SECTIONS)
+    ) + b''.join(table)
+    return header + b'\0' * (header_size - len(header)) + body
+
+
+def write_packed(path: Path, data: bytes):
+    """Écriture atomique : un worker ne projette jamais un fichier à moitié écrit"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temporary, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+    # Les versions précédentes peuvent rester projetées ailleurs : sous POSIX, supprimer le nom suffit
+    for stale in path.parent.glob('catalog-*.bin'):
+        if stale != path:
+            with contextlib.suppress(FileNotFoundError):
+                stale.unlink()
+
+
+@contextlib.contextmanager
+def build_lock(directory: Path):
+    """Verrou exclusif entre processus : un seul worker construit une version donnée"""
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / '.lock', 'a') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class PackedCatalog:
+    """Lecture d'un catalogue binaire projeté en mémoire (lecture seule)
+
+    Avec ``version``, le fichier doit avoir été construit depuis ces sources.
+    ``verify`` recalcule l'empreinte du corps (tout le fichier est relu).
+    """
+
+    def __init__(self, path: Path, version: Optional[str] = None, verify: bool = False):
+        if sys.byteorder != 'little':
+            raise PackedFormatError("Format binaire little-endian uniquement")
+        try:
+            with open(path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError) as e:
+            raise PackedFormatError(f"{path}: {e}")
+        self.path = path
+        header_size = _header_size()
+        if len(self._mmap) < header_size:
+            raise PackedFormatError(f"{path}: fichier tronqué")
+        magic, format_version, k, packed_version, checksum, count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION or count != len(SECTIONS):
+            raise PackedFormatError(f"{path}: format inconnu")
+        self.version = packed_version.decode('ascii')
+        if version is not None and self.version != version:
+            raise PackedFormatError(f"{path}: construit pour la version {self.version}, {version} attendue")
+        self._sections: Dict[str, Tuple[int, int]] = {}
+        end = header_size
+        for index, name in enumerate(SECTIONS):
+            offset, length = _SECTION.unpack_from(self._mmap, _HEADER.size + index * _SECTION.size)
+            if offset + length > len(self._mmap):
+                raise PackedFormatError(f"{path}: section {name} tronquée")
+            self._sections[name] = (offset, length)
+            end = max(end, offset + _align(length))
+        if end != len(self._mmap):
+            raise PackedFormatError(f"{path}: taille inattendue")
+        if verify and _checksum(memoryview(self._mmap)[header_size:]) != checksum:
+            raise PackedFormatError(f"{path}: empreinte du contenu invalide")
+
+        # Tables uint32 et prix : memoryview (accès scalaire rapide) ; index dérivés : vues NumPy au premier accès
+        self._string_offsets = self._view('string_offsets', 'I')
+        self._string_base = self._sections['string_data'][0]
+        self._records = self._view('subscriptions', 'I')
+        self._plan_prices = self._view('plan_prices', 'd')
+        self._plan_names = self._view('plan_names', 'I')
+        self._plan_extra = self._view('plan_extra', 'I')
+        self._k = k
+        self.subscriptions = PackedRecords(self, len(self._records) // _RECORD)
+
+    def _view(self, name: str, fmt: str) -> memoryview:
+        offset, length = self._sections[name]
+        return memoryview(self._mmap)[offset:offset + length].cast(fmt)
+
+    def _array(self, name: str, dtype: str) -> 'np.ndarray':
+        import numpy as np
+
+        offset, length = self._sections[name]
+        return np.frombuffer(self._mmap, dtype=dtype, count=length // np.dtype(dtype).itemsize, offset=offset)
+
+    @cached_property
+    def min_prices(self) -> 'np.ndarray':
+        return self._array('min_prices', '<f8')
+
+    @cached_property
+    def max_prices(self) -> 'np.ndarray':
+        return self._array('max_prices', '<f8')
+
+    @cached_property
+    def neighbours(self) -> 'np.ndarray':
+        return self._array('neighbours', '<i4').reshape(len(self.subscriptions), self._k)
+
+    @cached_property
+    def scores(self) -> 'np.ndarray':
+        return self._array('scores', '<f4').reshape(len(self.subscriptions), self._k)
+
+    def string(self, string_id: int) -> Optional[str]:
+        if string_id == NO_STRING:
+            return None
+        start = self._string_base + self._string_offsets[string_id]
+        end = self._string_base + self._string_offsets[string_id + 1]
+        return self._mmap[start:end].decode('utf-8')
+
+    def subscription(self, position: int) -> Dict[str, Any]:
+        base = position * _RECORD
+        record = self._records[base:base + _RECORD]
+        string = self.string
+        first_plan, plan_count = record[6], record[7]
+        plans = []
+        for plan in range(first_plan, first_plan + plan_count):
+            decoded = {'name': string(self._plan_names[plan]), 'monthlyPrice': self._plan_prices[plan]}
+            if self._plan_extra[plan] != NO_STRING:
+                decoded.update(json.loads(string(self._plan_extra[plan])))
+            plans.append(decoded)
+        sub = {
+            'id': string(record[0]),
+            'name': string(record[1]),
+            'logo': string(record[2]),
+            'color': string(record[3]),
+            'category': string(record[4]),
+            'plans': plans,
+        }
+        if record[5] != NO_STRING:
+            sub.update(json.loads(string(record[5])))
+        return sub
+
+    def _pairs(self, name: str) -> Iterator[Tuple[str, str]]:
+        flat = self._view(name, 'I')
+        for i in range(0, len(flat), 2):
+            yield self.string(flat[i]), self.string(flat[i + 1])
+
+    def duration_options(self) -> List[Dict[str, Any]]:
+        flat = self._view('durations', 'I')
+        return [
+            {'label': self.string(flat[i]), 'months': flat[i + 1], 'value': self.string(flat[i + 2])}
+            for i in range(0, len(flat), 3)
+        ]
+
+    def enriched(self) -> Dict[str, Dict[str, Any]]:
+        return {key: json.loads(value) for key, value in self._pairs('enriched')}
+
+    def promo_codes(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {key: json.loads(value) for key, value in self._pairs('promos')}
+
+    def category_translations(self) -> Dict[str, str]:
+        return dict(self._pairs('categories'))
+
+
+class PackedRecords(Sequence):
+    """Abonnements d'un catalogue binaire, décodés depuis la projection à chaque lecture
+
+    Chaque lecture renvoie un nouveau dictionnaire : le modifier ne change
+    pas le catalogue.
+    """
+
+    def __init__(self, packed: PackedCatalog, count: int):
+        self._packed = packed
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self._packed.subscription(i) for i in range(*position.indices(self._count))]
+        if position < 0:
+            position += self._count
+        if not 0 <= position < self._count:
+            raise IndexError(position)
+        return self._packed.subscription(position)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for position in range(self._count):
+            yield self._packed.subscription(position)
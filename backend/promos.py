@@ -0,0 +1,99 @@
+"""Codes promo servis par le backend, sans codes expirés.
+
+Les codes de promoCodes.json sont rangés dans un tas indexé par date
+d'expiration : le balayage planifié ne regarde que le sommet du tas et
+désactive les codes au fur et à mesure qu'ils expirent, puis dort jusqu'à
+la prochaine échéance. Les réponses par application sont précalculées
+dans un cache versionné (lecture O(1)) ; seules les applications touchées
+par un balayage sont recalculées et changent de version.
+
+Comme côté frontend, un code ``expiresAt: "2026-06-30"`` expire le
+2026-06-30 à 00:00 UTC.
+"""
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Délai maximal entre deux balayages (secondes), même sans échéance proche
+MAX_SWEEP_INTERVAL = 3600.0
+
+
+def parse_expiry(value: str) -> datetime:
+    expires_at = datetime.fromisoformat(value)
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at
+
+
+class PromoCodes:
+    def __init__(self, codes: Dict[str, List[Dict[str, Any]]], now: Optional[datetime] = None, version: int = 0):
+        # Un rechargement du fichier repart de la version précédente + 1 : X-Promo-Version reste croissant
+        self.version = version
+        self.live: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._expiries: List[Tuple[datetime, str, str]] = []
+        self._cache: Dict[str, Tuple[int, List[Dict[str, Any]]]] = {}
+        for app_id, app_codes in codes.items():
+            self.live[app_id] = {}
+            for promo in app_codes:
+                if not promo.get('isActive', True):
+                    continue
+                self.live[app_id][promo['code']] = promo
+                if promo.get('expiresAt'):
+                    self._expiries.append((parse_expiry(promo['expiresAt']), app_id, promo['code']))
+        heapq.heapify(self._expiries)
+        self._task: Optional[asyncio.Task] = None
+        self.sweep(now)
+        for app_id in self.live:
+            self._refresh(app_id)
+
+    def _refresh(self, app_id: str):
+        codes = sorted(self.live[app_id].values(), key=lambda promo: promo.get('expiresAt') or '')
+        self._cache[app_id] = (self.version, codes)
+
+    def sweep(self, now: Optional[datetime] = None) -> Set[str]:
+        """Désactiver les codes expirés ; renvoie les applications touchées"""
+        now = now or datetime.now(timezone.utc)
+        touched: Set[str] = set()
+        while self._expiries and self._expiries[0][0] <= now:
+            _, app_id, code = heapq.heappop(self._expiries)
+            if self.live[app_id].pop(code, None) is not None:
+                touched.add(app_id)
+        if touched and self._cache:
+            self.version += 1
+            for app_id in touched:
+                self._refresh(app_id)
+            logger.info(f"Codes promo expirés retirés pour {len(touched)} applications (version {self.version})")
+        return touched
+
+    def next_expiry(self) -> Optional[datetime]:
+        return self._expiries[0][0] if self._expiries else None
+
+    def get(self, app_id: str) -> Tuple[int, List[Dict[str, Any]]]:
+        """(version, codes en cours de validité) d'une application"""
+        return self._cache.get(app_id, (0, []))
+
+    async def _run(self):
+        while True:
+            self.sweep()
+            delay = MAX_SWEEP_INTERVAL
+            next_expiry = self.next_expiry()
+            if next_expiry is not None:
+                delay = min(max((next_expiry - datetime.now(timezone.utc)).total_seconds(), 0.0), delay)
+            await asyncio.sleep(delay)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,144 @@
+"""Limitation de débit par seau à jetons (token bucket).
+
+Chaque clé (client + application) dispose d'un seau de ``burst`` jetons qui
+se remplit de ``rate`` jetons par seconde ; une écriture consomme un jeton
+et est refusée (429) quand le seau est vide. Un client abusif vide donc
+son propre seau sans pénaliser les autres.
+
+Le stockage est interchangeable :
+- MemoryBucketStore : dans le processus, borné en nombre de clés ;
+- MongoBucketStore : partagé entre workers, une mise à jour atomique
+  (pipeline d'agrégation) par décision, expiration par index TTL.
+"""
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RateDecision:
+    allowed: bool
+    remaining: int
+    retry_after: float
+
+    def headers(self, limit: int) -> Dict[str, str]:
+        headers = {"X-RateLimit-Limit": str(limit), "X-RateLimit-Remaining": str(self.remaining)}
+        if not self.allowed:
+            headers["Retry-After"] = str(max(int(self.retry_after + 0.999), 1))
+        return headers
+
+
+class BucketStore(ABC):
+    """Interface des stockages de seaux"""
+
+    async def ensure_index(self):
+        pass
+
+    @abstractmethod
+    async def take(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        """Consommer un jeton ; renvoie (accordé, jetons restants)"""
+
+
+class MemoryBucketStore(BucketStore):
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - updated_at) * rate)
+        allowed = tokens >= 1.0
+        if allowed:
+            tokens -= 1.0
+        self._buckets[key] = (tokens, now)
+        # Les clés les moins récemment vues partent en premier (leur seau est le plus plein)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed, tokens
+
+
+class MongoBucketStore(BucketStore):
+    """Seaux partagés dans une collection MongoDB (plusieurs workers ou instances)"""
+
+    def __init__(self, collection_getter, expire_after: int = 3600):
+        # Accès paresseux à la collection : le client MongoDB peut changer (tests, reconnexion)
+        self._collection_getter = collection_getter
+        self.expire_after = expire_after
+
+    async def ensure_index(self):
+        await self._collection_getter().create_index(
+            [("updatedAt", 1)], name="updatedAt_ttl", expireAfterSeconds=self.expire_after
+        )
+
+    async def take(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        from pymongo import ReturnDocument
+
+        now = datetime.utcnow()
+        elapsed = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updatedAt", now]}]}, 1000]}
+        refilled = {"$min": [burst, {"$add": [{"$ifNull": ["$tokens", burst]}, {"$multiply": [elapsed, rate]}]}]}
+        bucket = await self._collection_getter().find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "updatedAt": now}},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                {"$set": {"tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]}}},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return bool(bucket["allowed"]), float(bucket["tokens"])
+
+
+class RateLimiter:
+    def __init__(self, store: BucketStore, rate: float, burst: int, enabled: bool = True):
+        self.store = store
+        self.rate = rate
+        self.burst = burst
+        self.enabled = enabled
+
+        # Métriques
+        self.allowed = 0
+        self.rejected = 0
+        self.store_errors = 0
+
+    async def check(self, key: str) -> RateDecision:
+        if not self.enabled:
+            return RateDecision(True, self.burst, 0.0)
+        try:
+            allowed, tokens = await self.store.take(key, self.rate, self.burst)
+        except Exception as e:
+            # Stockage partagé indisponible : on laisse passer plutôt que tout bloquer
+            self.store_errors += 1
+            logger.warning(f"Limiteur de débit indisponible: {e}")
+            return RateDecision(True, 0, 0.0)
+        if allowed:
+            self.allowed += 1
+            return RateDecision(True, int(tokens), 0.0)
+        self.rejected += 1
+        return RateDecision(False, 0, (1.0 - tokens) / self.rate if self.rate > 0 else 60.0)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "ratePerSecond": self.rate,
+            "burst": self.burst,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "storeErrors": self.store_errors,
+        }
+
+
+def build_store(kind: str, collection_getter=None) -> BucketStore:
+    """Stockage des seaux selon RATE_LIMIT_BACKEND (``memory`` par défaut, ou ``mongo``)"""
+    if kind == "mongo":
+        return MongoBucketStore(collection_getter)
+    if kind != "memory":
+        logger.warning(f"Stockage de limitation inconnu: {kind}, utilisation de la mémoire")
+    return MemoryBucketStore()
@@ -0,0 +1,280 @@
+"""Agrégats des avis par application.
+
+Chaque application a un document ``review_stats`` (nombre d'avis, somme
+des notes, histogramme 1-5 étoiles) mis à jour par ``$inc`` atomique à
+chaque création d'avis : la moyenne s'obtient sans relire les avis. Le
+recalcul complet (démarrage, route d'administration) passe par une seule
+agrégation ``$merge``, sous le verrou d'un document témoin.
+
+Les listes d'avis sont paginées par curseur sur ``createdAt`` (un vrai
+horodatage, la date ``dd/mm/YYYY`` ne servant plus qu'à l'affichage).
+"""
+import base64
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from models import Review, ReviewCreate
+
+if TYPE_CHECKING:
+    from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+RATINGS = (1, 2, 3, 4, 5)
+
+_STATS_PROJECTION = {"_id": 0, "appId": 1, "count": 1, "ratingSum": 1, "histogram": 1}
+
+# Champs publics d'un avis : ni _id ni localId ne sortent de MongoDB
+REVIEW_PROJECTION = {"_id": 0, **{name: 1 for name in Review.model_fields}}
+
+
+def make_initials(user_name: str) -> str:
+    return ''.join([n[0] for n in user_name.strip().split()]).upper()[:2]
+
+
+def build_review(review_input: ReviewCreate, created_at: Optional[datetime] = None, helpful: int = 0) -> Review:
+    """Construire un avis complet à partir des champs saisis par l'utilisateur"""
+    created_at = created_at or datetime.utcnow()
+    return Review(
+        appId=review_input.appId,
+        userName=review_input.userName.strip(),
+        rating=review_input.rating,
+        comment=review_input.comment.strip(),
+        date=created_at.strftime('%d/%m/%Y'),
+        createdAt=created_at,
+        helpful=helpful,
+        userInitials=make_initials(review_input.userName)
+    )
+
+
+def stats_increments(reviews: Iterable[Dict]) -> List['UpdateOne']:
+    """Opérations $inc sur review_stats pour un lot d'avis insérés"""
+    from pymongo import UpdateOne
+
+    increments: Dict[str, Dict[str, int]] = {}
+    for review in reviews:
+        inc = increments.setdefault(review["appId"], {"count": 0, "ratingSum": 0})
+        inc["count"] += 1
+        inc["ratingSum"] += review["rating"]
+        key = f"histogram.{review['rating']}"
+        inc[key] = inc.get(key, 0) + 1
+    return [
+        UpdateOne({"appId": app_id}, {"$inc": inc}, upsert=True)
+        for app_id, inc in increments.items()
+    ]
+
+
+async def record_review_stats(db, app_id: str, rating: int):
+    """Comptabiliser un nouvel avis dans l'agrégat de son application"""
+    await db.review_stats.update_one(
+        {"appId": app_id},
+        {"$inc": {"count": 1, "ratingSum": rating, f"histogram.{rating}": 1}},
+        upsert=True
+    )
+
+
+def format_summary(app_id: str, stats: Optional[Dict] = None) -> Dict:
+    """Résumé public d'un agrégat (vide si l'application n'a aucun avis)"""
+    stats = stats or {}
+    count = stats.get("count", 0)
+    histogram = stats.get("histogram", {})
+    return {
+        "appId": app_id,
+        "count": count,
+        "average": round(stats.get("ratingSum", 0) / count, 2) if count else 0,
+        "histogram": {str(r): histogram.get(str(r), 0) for r in RATINGS},
+    }
+
+
+async def get_review_summary(db, app_id: str) -> Dict:
+    stats = await db.review_stats.find_one({"appId": app_id}, _STATS_PROJECTION)
+    return format_summary(app_id, stats)
+
+
+async def get_review_summaries(db, app_ids: Iterable[str]) -> List[Dict]:
+    """Résumés de plusieurs applications en une seule requête"""
+    app_ids = list(dict.fromkeys(app_ids))
+    found = {}
+    async for stats in db.review_stats.find({"appId": {"$in": app_ids}}, _STATS_PROJECTION):
+        found[stats["appId"]] = stats
+    return [format_summary(app_id, found.get(app_id)) for app_id in app_ids]
+
+
+def review_stats_pipeline() -> List[Dict]:
+    """Agrégation des avis en documents review_stats (un par application)"""
+    group = {"_id": "$appId", "count": {"$sum": 1}, "ratingSum": {"$sum": "$rating"}}
+    for r in RATINGS:
+        group[f"r{r}"] = {"$sum": {"$cond": [{"$eq": ["$rating", r]}, 1, 0]}}
+    return [
+        {"$group": group},
+        {"$project": {
+            "_id": 0,
+            "appId": "$_id",
+            "count": 1,
+            "ratingSum": 1,
+            "histogram": {str(r): f"$r{r}" for r in RATINGS},
+        }},
+    ]
+
+
+async def rebuild_review_stats(db) -> int:
+    """Recalculer tous les agrégats depuis la collection reviews (migration, réparation)
+
+    Une seule agrégation, écrite côté serveur par ``$merge`` sur l'index
+    unique ``appId`` : aucun document ne transite par l'application.
+    """
+    if await db.reviews.estimated_document_count() == 0:
+        await db.review_stats.delete_many({})
+        return 0
+    pipeline = review_stats_pipeline() + [{"$merge": {
+        "into": "review_stats",
+        "on": "appId",
+        "whenMatched": "replace",
+        "whenNotMatched": "insert",
+    }}]
+    await db.reviews.aggregate(pipeline).to_list(None)
+    # Applications dont tous les avis ont disparu
+    app_ids = await db.reviews.distinct("appId")
+    await db.review_stats.delete_many({"appId": {"$nin": app_ids}})
+    logger.info(f"Agrégats d'avis recalculés pour {len(app_ids)} applications")
+    return len(app_ids)
+
+
+# Document témoin du recalcul dans la collection ``migrations`` : verrou
+# (``lockedUntil``) pendant le calcul, état ``done`` une fois terminé
+STATS_MARKER = "review_stats"
+STATS_LOCK_SECONDS = 600
+
+
+async def _acquire_stats_rebuild(db, owner: str, force: bool) -> bool:
+    from pymongo.errors import DuplicateKeyError
+
+    now = datetime.utcnow()
+    query: Dict = {"_id": STATS_MARKER, "$or": [{"lockedUntil": {"$lt": now}}, {"lockedUntil": None}]}
+    if not force:
+        query["state"] = {"$ne": "done"}
+    try:
+        # Pas de correspondance : l'upsert heurte le témoin existant (verrou tenu ou recalcul fait)
+        await db.migrations.update_one(
+            query,
+            {"$set": {"state": "building", "owner": owner,
+                      "lockedUntil": now + timedelta(seconds=STATS_LOCK_SECONDS)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+async def rebuild_review_stats_exclusive(db, force: bool = False) -> Optional[int]:
+    """Recalculer les agrégats sous le verrou du document témoin.
+
+    Retourne le nombre d'applications recalculées, ou ``None`` si un autre
+    processus tient le verrou (ou, sans ``force``, si le recalcul est déjà fait).
+    Un recalcul interrompu laisse le témoin hors de l'état ``done`` : il est
+    repris au démarrage suivant, une fois le verrou expiré.
+    """
+    owner = uuid.uuid4().hex
+    if not await _acquire_stats_rebuild(db, owner, force):
+        return None
+    marker = {"_id": STATS_MARKER, "owner": owner}
+    try:
+        rebuilt = await rebuild_review_stats(db)
+    except BaseException:
+        await db.migrations.update_one(marker, {"$set": {"state": "failed", "lockedUntil": None}})
+        raise
+    await db.migrations.update_one(marker, {"$set": {
+        "state": "done", "lockedUntil": None, "rebuiltAt": datetime.utcnow(), "apps": rebuilt,
+    }})
+    return rebuilt
+
+
+async def ensure_review_stats(db):
+    """Calculer les agrégats au démarrage tant que le témoin n'indique pas un recalcul complet"""
+    try:
+        marker = await db.migrations.find_one({"_id": STATS_MARKER}, {"state": 1})
+        if marker is None or marker.get("state") != "done":
+            await rebuild_review_stats_exclusive(db)
+    except Exception as e:
+        logger.error(f"Erreur lors de l'initialisation des agrégats d'avis: {e}")
+
+
+# Pagination par curseur (keyset) sur l'index (appId, createdAt desc, id desc)
+REVIEWS_SORT = [("createdAt", -1), ("id", -1)]
+
+
+def encode_cursor(review: Dict) -> str:
+    """Curseur opaque pointant après ``review`` dans l'ordre antéchronologique"""
+    raw = f"{review['createdAt'].isoformat()}|{review['id']}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Lève ValueError si le curseur est invalide"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        created_at, review_id = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), review_id
+    except ValueError as e:
+        raise ValueError(f"Curseur invalide: {cursor}") from e
+
+
+async def fetch_reviews_page(
+    db, app_id: str, limit: int, cursor: Optional[str] = None
+) -> Tuple[List[Dict], Optional[str]]:
+    """Page d'avis la plus récente après ``cursor`` et curseur de la page suivante.
+
+    Coût constant quelle que soit la profondeur de la page : aucun skip(),
+    la requête reprend directement dans l'index après le dernier avis vu.
+    Les documents sont projetés sur les champs de Review et renvoyés tels
+    quels : ils ont été validés à l'écriture.
+    """
+    query: Dict = {"appId": app_id}
+    if cursor:
+        created_at, review_id = decode_cursor(cursor)
+        query["$or"] = [
+            {"createdAt": {"$lt": created_at}},
+            {"createdAt": created_at, "id": {"$lt": review_id}},
+        ]
+    # Un élément de plus pour savoir s'il existe une page suivante
+    reviews = await db.reviews.find(query, REVIEW_PROJECTION).sort(REVIEWS_SORT).limit(limit + 1).to_list(limit + 1)
+    next_cursor = encode_cursor(reviews[limit - 1]) if len(reviews) > limit else None
+    return reviews[:limit], next_cursor
+
+
+def parse_review_date(date: str) -> datetime:
+    """Date d'affichage ``dd/mm/YYYY`` (anciens avis) ou ISO 8601"""
+    try:
+        return datetime.strptime(date, '%d/%m/%Y')
+    except ValueError:
+        return datetime.fromisoformat(date.replace('Z', '+00:00')).replace(tzinfo=None)
+
+
+async def backfill_review_timestamps(db, batch_size: int = 1000) -> int:
+    """Ajouter ``createdAt`` aux avis créés avant son introduction"""
+    from pymongo import UpdateOne
+
+    updated = 0
+    try:
+        while True:
+            batch = await db.reviews.find(
+                {"createdAt": {"$exists": False}}, {"_id": 1, "date": 1}
+            ).limit(batch_size).to_list(batch_size)
+            if not batch:
+                break
+            operations = []
+            for review in batch:
+                try:
+                    created_at = parse_review_date(review.get("date", ""))
+                except ValueError:
+                    created_at = datetime(1970, 1, 1)
+                operations.append(UpdateOne({"_id": review["_id"]}, {"$set": {"createdAt": created_at}}))
+            await db.reviews.bulk_write(operations, ordered=False)
+            updated += len(operations)
+        if updated:
+            logger.info(f"createdAt ajouté à {updated} avis")
+    except Exception as e:
+        logger.error(f"Erreur lors de la migration des dates d'avis: {e}")
+    return updated
@@ -0,0 +1,201 @@
+"""Recherche plein texte du catalogue (saisie semi-automatique).
+
+L'index est construit une fois au chargement du catalogue, sur le nom, la
+catégorie (française et anglaise), les fonctionnalités et les descriptions
+FR/EN de enrichedSubscriptions. Les textes sont normalisés comme les clés de
+tri (casse et accents repliés : « Productivité » = « productivite »).
+
+Deux structures :
+- un index inversé terme → {position: poids}, le poids cumulant les champs
+  où le terme apparaît (nom > catégorie > fonctionnalités > description) ;
+- un trie des termes dont chaque nœud porte l'union des postings de ses
+  complétions : le dernier mot tapé (« netf ») se résout en une descente de
+  quelques caractères, sans parcourir le vocabulaire.
+
+Un mot sans aucune complétion est recherché à une faute de frappe près
+(deux au-delà de huit lettres) par un parcours du trie élagué sur la
+distance de Levenshtein. Les mots de la requête se combinent en ET et les
+résultats sont classés par score puis par nom.
+
+L'index est immuable : un rechargement du catalogue en construit un nouveau
+et le substitue en une seule affectation, les requêtes en cours gardent
+l'ancien.
+"""
+import heapq
+import logging
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from catalog import Catalog, sort_key
+
+logger = logging.getLogger(__name__)
+
+# Poids d'un terme selon le champ où il apparaît
+NAME_WEIGHT = 8.0
+CATEGORY_WEIGHT = 4.0
+FEATURE_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+
+# Facteurs appliqués aux correspondances par préfixe et approchées
+PREFIX_FACTOR = 0.6
+FUZZY_FACTOR = 0.4
+# Bonus quand le nom commence par la requête entière (« disney p » → Disney+)
+NAME_PREFIX_BONUS = 4.0
+
+MIN_FUZZY_LENGTH = 4
+MAX_QUERY_TERMS = 8
+
+_WORD = re.compile(r'\w+')
+
+# Mots vides ignorés dans les fonctionnalités et descriptions (jamais dans les noms)
+STOPWORDS = frozenset((
+    'a', 'au', 'aux', 'avec', 'ce', 'd', 'dans', 'de', 'des', 'du', 'en', 'et', 'l', 'la', 'le', 'les',
+    'ou', 'par', 'pour', 'plus', 'sur', 'un', 'une',
+    'an', 'and', 'for', 'in', 'more', 'of', 'on', 'or', 'the', 'to', 'with',
+))
+
+
+def tokenize(text: str) -> List[str]:
+    """Mots normalisés d'un texte (casse et accents repliés)"""
+    return _WORD.findall(sort_key(text))
+
+
+def _fields(
+    subscription: Dict[str, Any], enriched: Dict[str, Any], category_en: Optional[str]
+) -> Iterator[Tuple[float, str]]:
+    """(poids, texte) indexés pour un abonnement"""
+    yield NAME_WEIGHT, subscription['name']
+    yield NAME_WEIGHT, subscription['id']
+    yield CATEGORY_WEIGHT, subscription['category']
+    if category_en:
+        yield CATEGORY_WEIGHT, category_en
+    for feature in enriched.get('features') or []:
+        yield FEATURE_WEIGHT, feature
+    for key in ('description', 'descriptionEn'):
+        if enriched.get(key):
+            yield DESCRIPTION_WEIGHT, enriched[key]
+
+
+class _Node:
+    __slots__ = ('children', 'postings', 'term')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        # Union des postings des termes sous ce nœud (meilleur poids par position)
+        self.postings: Dict[int, float] = {}
+        self.term: Optional[str] = None
+
+
+class SearchIndex:
+    def __init__(
+        self,
+        catalog: Catalog,
+        enriched: Optional[Dict[str, Dict[str, Any]]] = None,
+        category_translations: Optional[Dict[str, str]] = None,
+    ):
+        enriched = enriched or {}
+        category_translations = category_translations or {}
+        self.ids: List[str] = [sub['id'] for sub in catalog.subscriptions]
+        self.categories: List[str] = [sub['category'] for sub in catalog.subscriptions]
+        self._names: List[str] = [' '.join(tokenize(sub['name'])) for sub in catalog.subscriptions]
+        self._name_keys: List[str] = [sort_key(sub['name']) for sub in catalog.subscriptions]
+
+        self.terms: Dict[str, Dict[int, float]] = {}
+        for position, sub in enumerate(catalog.subscriptions):
+            weights: Dict[str, float] = {}
+            fields = _fields(sub, enriched.get(sub['id']) or {}, category_translations.get(sub['category']))
+            for weight, text in fields:
+                for term in tokenize(text):
+                    if weight < CATEGORY_WEIGHT and term in STOPWORDS:
+                        continue
+                    # Chaque terme compte une fois par champ, avec le poids du meilleur champ
+                    weights[term] = max(weights.get(term, 0.0), weight)
+            for term, weight in weights.items():
+                self.terms.setdefault(term, {})[position] = weight
+
+        self._root = _Node()
+        for term, postings in self.terms.items():
+            node = self._root
+            for char in term:
+                node = node.children.setdefault(char, _Node())
+                for position, weight in postings.items():
+                    if node.postings.get(position, 0.0) < weight:
+                        node.postings[position] = weight
+            node.term = term
+        logger.info(f"Index de recherche: {len(self.ids)} abonnements, {len(self.terms)} termes")
+
+    def _prefix_node(self, prefix: str) -> Optional[_Node]:
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def _fuzzy(self, word: str, max_distance: int) -> Dict[int, float]:
+        """Postings des préfixes du vocabulaire à ``max_distance`` éditions au plus de ``word``"""
+        matches: Dict[int, float] = {}
+        stack = [(child, char, list(range(len(word) + 1))) for char, child in self._root.children.items()]
+        while stack:
+            node, char, previous = stack.pop()
+            row = [previous[0] + 1]
+            for i in range(1, len(word) + 1):
+                row.append(min(row[i - 1] + 1, previous[i] + 1, previous[i - 1] + (word[i - 1] != char)))
+            if row[-1] <= max_distance:
+                # Ce préfixe est assez proche : toutes ses complétions conviennent, inutile de descendre
+                for position, weight in node.postings.items():
+                    if matches.get(position, 0.0) < weight:
+                        matches[position] = weight
+            elif min(row) <= max_distance:
+                stack.extend((child, next_char, row) for next_char, child in node.children.items())
+        return matches
+
+    def _word_scores(self, word: str) -> Dict[int, float]:
+        """Score de chaque position pour un mot : exact, sinon complétion, sinon approché"""
+        node = self._prefix_node(word)
+        if node is not None:
+            exact = self.terms.get(word, {})
+            return {
+                position: max(exact.get(position, 0.0), weight * PREFIX_FACTOR)
+                for position, weight in node.postings.items()
+            }
+        if len(word) < MIN_FUZZY_LENGTH:
+            return {}
+        fuzzy = self._fuzzy(word, 2 if len(word) > 8 else 1)
+        return {position: weight * FUZZY_FACTOR for position, weight in fuzzy.items()}
+
+    def search(self, query: str, limit: int = 10, category: Optional[str] = None) -> Dict[str, Any]:
+        """Abonnements correspondant à tous les mots de ``query``, les mieux classés d'abord"""
+        words = tokenize(query)[:MAX_QUERY_TERMS]
+        if not words:
+            return {'total': 0, 'items': []}
+
+        scores: Optional[Dict[int, float]] = None
+        # Les mots les plus sélectifs d'abord : l'intersection rétrécit vite
+        for word_scores in sorted((self._word_scores(word) for word in words), key=len):
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {
+                    position: score + word_scores[position]
+                    for position, score in scores.items()
+                    if position in word_scores
+                }
+            if not scores:
+                return {'total': 0, 'items': []}
+
+        if category is not None and category != 'all':
+            scores = {position: score for position, score in scores.items() if self.categories[position] == category}
+
+        phrase = ' '.join(words)
+        for position in scores:
+            if self._names[position].startswith(phrase):
+                scores[position] += NAME_PREFIX_BONUS
+
+        best = heapq.nsmallest(
+            limit, scores.items(), key=lambda item: (-item[1], self._name_keys[item[0]], item[0])
+        )
+        return {
+            'total': len(scores),
+            'items': [{'id': self.ids[position], 'score': round(score, 3)} for position, score in best],
+        }
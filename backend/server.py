@@ -1,17 +1,67 @@
-from fastapi import FastAPI, APIRouter
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List
-import uuid
-from datetime import datetime
-import zipfile
-import io
+from typing import TYPE_CHECKING, List, Optional
+import asyncio
+import secrets
+import tempfile
+import time
+
+from models import StatusCheck, StatusCheckCreate, Review, ReviewCreate, OptimizeRequest, SpendingSnapshotCreate
+from catalog import PRICE_MATCHES, SORT_OPTIONS
+from database import Mongo, MongoUnavailable
+from export import EXPORT_FORMATS, stream_export
+from overlap import DEFAULT_THRESHOLD
+from snapshot import CatalogError, CatalogPaths, CatalogStore, CatalogVersionMiddleware
+from reviews import (
+    REVIEW_PROJECTION,
+    backfill_review_timestamps,
+    build_review,
+    ensure_review_stats,
+    fetch_reviews_page,
+    get_review_summaries,
+    get_review_summary,
+    rebuild_review_stats_exclusive,
+    record_review_stats,
+)
+from ingest import IngestTooLarge, ingest_reviews, iter_ndjson
+from spending import (
+    GRANULARITIES,
+    SpendingConflict,
+    append_snapshot,
+    check_secret,
+    delete_history,
+    get_evolution,
+    get_snapshot,
+    issue_user,
+    rebuild_spending_rollups,
+    valid_user,
+)
+from metrics import CommandMetrics, MetricsMiddleware, build_registry
+from health import InFlightMiddleware, InFlightRequests, LoopLagMonitor, MongoReadiness, PoolStats
+from indexes import check_query_plans, ensure_indexes
+from votes import HelpfulVoteBuffer
+from archive import ArchiveCache, etag_matches, iter_file_range, parse_byte_range
+from cache import ResponseCache
+from ratelimit import RateLimiter, build_store
+from idempotency import (
+    MAX_KEY_LENGTH,
+    IdempotencyMismatch,
+    IdempotentRequests,
+    check_fingerprint,
+    fingerprint,
+    scoped_key,
+)
+
+if TYPE_CHECKING:
+    from costs import CostEngine
+    from optimizer import BasketOptimizer
 
 
 ROOT_DIR = Path(__file__).parent
@@ -25,156 +75,802 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+pool_stats = PoolStats()
+# Métriques Prometheus (/api/metrics) : requêtes HTTP et commandes MongoDB
+metrics_registry = build_registry()
+
+def record_pool_size(client):
+    pool_stats.max_pool_size = client.options.pool_options.max_pool_size
+
+# Client créé à la première utilisation (Motor n'est pas importé au démarrage) ; facultatif
+mongo = Mongo(
+    os.environ.get('MONGO_URL'),
+    os.environ.get('DB_NAME'),
+    listeners=[pool_stats, CommandMetrics(metrics_registry)],
+    on_connect=record_pool_size,
+)
+
+# Sondes de santé : ping MongoDB en arrière-plan, retard de boucle, requêtes en cours
+mongo_readiness = MongoReadiness(
+    lambda: mongo.db,
+    interval=float(os.environ.get('READINESS_PING_INTERVAL', 5.0))
+)
+loop_lag = LoopLagMonitor()
+in_flight = InFlightRequests()
+started_at = time.time()
+
+# Cache des lectures (avis, statuts), invalidé par les écritures
+response_cache = ResponseCache(
+    ttl=float(os.environ.get('RESPONSE_CACHE_TTL', 30)),
+    max_entries=int(os.environ.get('RESPONSE_CACHE_ENTRIES', 1024)),
+    max_bytes=int(os.environ.get('RESPONSE_CACHE_BYTES', 16 * 1024 * 1024))
+)
+
+# Votes 'Utile' écrits en lot (intervalle en secondes, nombre d'avis en attente) ;
+# chaque écriture invalide les lectures en cache des applications concernées
+helpful_votes = HelpfulVoteBuffer(
+    lambda: mongo.db.reviews,
+    flush_interval=float(os.environ.get('HELPFUL_FLUSH_INTERVAL', 0.5)),
+    max_pending=int(os.environ.get('HELPFUL_FLUSH_SIZE', 500)),
+    on_flush=lambda app_ids: response_cache.invalidate(*(f"reviews:{app_id}" for app_id in app_ids))
+)
+
+# Création d'avis : seau à jetons par client et par application (par défaut 5 avis, puis 5 par minute)
+review_limiter = RateLimiter(
+    build_store(os.environ.get('RATE_LIMIT_BACKEND', 'memory'), lambda: mongo.db.rate_limits),
+    rate=float(os.environ.get('REVIEW_RATE_PER_MINUTE', 5)) / 60,
+    burst=int(os.environ.get('REVIEW_RATE_BURST', 5)),
+    enabled=os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+)
+review_requests = IdempotentRequests()
+# Historique des dépenses : ajouts par identifiant, délivrance d'identifiants par client (10, puis 10 par minute)
+spending_limiter = RateLimiter(
+    build_store(os.environ.get('RATE_LIMIT_BACKEND', 'memory'), lambda: mongo.db.rate_limits),
+    rate=float(os.environ.get('SPENDING_RATE_PER_MINUTE', 10)) / 60,
+    burst=int(os.environ.get('SPENDING_RATE_BURST', 10)),
+    enabled=os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+)
+# Derrière un proxy de confiance, le client est le premier hop de X-Forwarded-For
+TRUST_FORWARDED_FOR = os.environ.get('TRUST_FORWARDED_FOR') == '1'
+
+# Racine du projet servie par /api/download-project
+PROJECT_ROOT = Path(os.environ.get('PROJECT_ROOT', '/app'))
+archive_cache = ArchiveCache(
+    PROJECT_ROOT,
+    Path(os.environ.get('ARCHIVE_CACHE_DIR', Path(tempfile.gettempdir()) / 'combien-ca-coute-archives'))
+)
+# Construire l'archive dès le démarrage (0 en serverless : le démarrage à froid ne la construit pas)
+ARCHIVE_WARM_ON_STARTUP = os.environ.get('ARCHIVE_WARM_ON_STARTUP', '1') == '1'
+
+# Catalogue des abonnements (partagé avec le frontend) : instantanés immuables rechargés à chaud
+CATALOG_PATH = Path(
+    os.environ.get('CATALOG_PATH', ROOT_DIR.parent / 'frontend' / 'src' / 'data' / 'subscriptions.json')
+)
+# Fonctionnalités et descriptions FR/EN (similarité et recherche)
+ENRICHED_PATH = Path(os.environ.get('ENRICHED_PATH', CATALOG_PATH.parent / 'enrichedSubscriptions.json'))
+# Noms anglais des catégories (recherche)
+CATEGORY_TRANSLATIONS_PATH = Path(
+    os.environ.get('CATEGORY_TRANSLATIONS_PATH', CATALOG_PATH.parent / 'categoryTranslations.json')
+)
+# Codes promo en cours de validité, balayés à chaque expiration
+PROMO_CODES_PATH = Path(os.environ.get('PROMO_CODES_PATH', CATALOG_PATH.parent / 'promoCodes.json'))
+# Voisins précalculés par abonnement (borne de limit sur /similar)
+SIMILAR_K = int(os.environ.get('SIMILAR_K', 8))
+# Répertoire propre à l'utilisateur du processus : /tmp est partagé avec les autres comptes
+CATALOG_PACKED_DIR = os.environ.get(
+    'CATALOG_PACKED_DIR', str(Path(tempfile.gettempdir()) / f'combien-ca-coute-catalog-{os.getuid()}')
+)
+catalog_store = CatalogStore(
+    CatalogPaths(CATALOG_PATH, ENRICHED_PATH, CATEGORY_TRANSLATIONS_PATH, PROMO_CODES_PATH),
+    similar_k=SIMILAR_K,
+    # Surveillance des fichiers (secondes entre deux vérifications, 0 : désactivée)
+    watch_interval=float(os.environ.get('CATALOG_WATCH_INTERVAL', 2)),
+    # Catalogue binaire partagé entre workers (vide : désactivé, chaque worker lit le JSON)
+    packed_dir=Path(CATALOG_PACKED_DIR) if CATALOG_PACKED_DIR else None,
+)
+# Construire les index NumPy du catalogue (coûts, optimiseur, similarité) en arrière-plan au démarrage
+CATALOG_WARM_ON_STARTUP = os.environ.get('CATALOG_WARM_ON_STARTUP', '1') == '1'
+# Jeton de POST /api/admin/catalog/reload (endpoint désactivé sans jeton)
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+
+# Limites de /api/search
+MAX_SEARCH_QUERY_LENGTH = 200
+MAX_SEARCH_LIMIT = 500
+
+# Limites de /api/costs
+MAX_COST_HORIZONS = 50
+MAX_COST_MONTHS = 1200
+
+# Limites de /api/optimize
+MAX_OPTIMIZE_ITEMS = 200
+MAX_OPTIMIZE_BATCH = 100
+# Cases de programmation dynamique pour tout un appel à /api/optimize/batch
+# (8 × optimizer.MAX_CELLS, ~1 s de calcul)
+MAX_OPTIMIZE_BATCH_CELLS = 16_000_000
+
+# Nombre maximal d'applications par appel à /api/reviews/summary
+MAX_SUMMARY_IDS = 500
+
+# Limites de /api/spending/{user}/evolution (20 ans de points mensuels)
+MAX_SPENDING_POINTS = 240
+SPENDING_MONTH = r'^\d{4}-(0[1-9]|1[0-2])$'
+
+# Limites de /api/reviews/bulk
+MAX_BULK_BYTES = 64 * 1024 * 1024
+MAX_BULK_RECORDS = 100_000
+
+# Pagination de /api/reviews/{app_id}
+REVIEWS_PAGE_SIZE = int(os.environ.get('REVIEWS_PAGE_SIZE', 20))
+MAX_REVIEWS_PAGE_SIZE = 100
+
+async def bootstrap_database():
+    """Créer le client MongoDB hors de la boucle, puis index et migrations"""
+    try:
+        await mongo.connect()
+    except MongoUnavailable as e:
+        logger.warning(f"{e} : seuls le catalogue et les sondes sont servis")
+    except Exception as e:
+        logger.error(f"Erreur lors de la connexion à MongoDB: {e}")
+    # Après connect : le premier ping n'importe pas Motor dans la boucle
+    mongo_readiness.start()
+    if not mongo.connected:
+        return
+    db = mongo.db
+    try:
+        await ensure_indexes(db)
+        await review_limiter.store.ensure_index()
+    except Exception as e:
+        logger.error(f"Erreur lors de la création des index: {e}")
+    await backfill_review_timestamps(db)
+    await ensure_review_stats(db)
+    # Les migrations ont pu modifier des avis déjà servis
+    response_cache.clear()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if ARCHIVE_WARM_ON_STARTUP:
+        archive_cache.warm()
+    helpful_votes.start()
+    loop_lag.start()
+    catalog_store.start()
+    if CATALOG_WARM_ON_STARTUP:
+        catalog_store.warm()
+    # En arrière-plan : le démarrage ne dépend pas de la disponibilité de MongoDB
+    bootstrap = asyncio.ensure_future(bootstrap_database())
+    try:
+        yield
+    finally:
+        bootstrap.cancel()
+        # Écrire les votes en attente avant de fermer la connexion
+        await helpful_votes.stop()
+        await mongo_readiness.stop()
+        await loop_lag.stop()
+        await catalog_store.stop()
+        mongo.close()
 
 # Create the main app without a prefix
-app = FastAPI()
+# Réponses encodées avec orjson (dates et listes volumineuses nettement plus rapides)
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+
+@app.exception_handler(MongoUnavailable)
+async def mongo_unavailable(request: Request, exc: MongoUnavailable):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
 
-# Define Models
-class StatusCheck(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    client_name: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
-
-class StatusCheckCreate(BaseModel):
-    client_name: str
-
-# Review Models
-class Review(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    appId: str
-    userName: str
-    rating: int = Field(ge=1, le=5)  # Entre 1 et 5
-    comment: str
-    date: str
-    helpful: int = Field(default=0)
-    userInitials: str
-
-class ReviewCreate(BaseModel):
-    appId: str
-    userName: str
-    rating: int = Field(ge=1, le=5)
-    comment: str
-
 # Add your routes to the router instead of directly to app
 @api_router.get("/")
 async def root():
     return {"message": "Hello World"}
 
+def runtime_stats():
+    return {
+        "uptimeSeconds": round(time.time() - started_at, 3),
+        "mongoPool": pool_stats.snapshot(),
+        "eventLoopLag": loop_lag.snapshot(),
+        "inFlightRequests": in_flight.snapshot(),
+    }
+
+@api_router.get("/health")
+async def health():
+    """Vivacité : ne touche jamais MongoDB"""
+    return {"status": "ok", **runtime_stats()}
+
+@api_router.get("/ready")
+async def ready():
+    """Disponibilité : dernier ping MongoDB (mis en cache, rafraîchi en arrière-plan)"""
+    readiness = mongo_readiness.snapshot()
+    return JSONResponse(
+        status_code=200 if readiness["ready"] else 503,
+        content={"status": "ready" if readiness["ready"] else "unavailable", "mongo": readiness, **runtime_stats()},
+        headers={"Cache-Control": "no-store"}
+    )
+
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    _ = await mongo.db.status_checks.insert_one(status_obj.dict())
+    response_cache.invalidate("status")
     return status_obj
 
-@api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+# Réponses déjà sérialisées par le cache : le modèle ne sert qu'à la documentation
+@api_router.get("/status", responses={200: {"model": List[StatusCheck]}})
+async def get_status_checks(request: Request):
+    async def compute():
+        status_checks = await mongo.db.status_checks.find({}, {"_id": 0}).sort("timestamp", -1).to_list(1000)
+        return status_checks, {}
+    return await response_cache.respond(request, ["status"], compute)
 
-# Reviews endpoints
-@api_router.get("/reviews/{app_id}", response_model=List[Review])
-async def get_reviews(app_id: str):
-    """Récupérer tous les avis pour une application/abonnement"""
+# Catalog endpoints
+@api_router.get("/subscriptions")
+async def list_subscriptions(
+    category: Optional[str] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    sort: Optional[str] = Query(None, pattern=f"^({'|'.join(SORT_OPTIONS)})$"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(12, ge=1, le=100),
+    price_match: str = Query('cheapest', pattern=f"^({'|'.join(PRICE_MATCHES)})$"),
+):
+    """Lister les abonnements du catalogue (filtrés, triés et paginés)
+
+    ``price_match=cheapest`` : le plan le moins cher est dans [min_price, max_price]
+    (comme le filtre du frontend) ; ``overlap`` : les prix des plans recoupent la plage.
+    """
+    return catalog_store.current.catalog.query(
+        category=category,
+        min_price=min_price,
+        max_price=max_price,
+        sort=sort,
+        page=page,
+        page_size=page_size,
+        price_match=price_match,
+    )
+
+@api_router.get("/subscriptions/{subscription_id}")
+async def get_subscription(subscription_id: str):
+    """Récupérer un abonnement du catalogue"""
+    subscription = catalog_store.current.catalog.get(subscription_id)
+    if subscription is None:
+        raise HTTPException(status_code=404, detail="Abonnement non trouvé")
+    return subscription
+
+@api_router.get("/subscriptions/{subscription_id}/similar")
+async def get_similar_subscriptions(subscription_id: str, limit: Optional[int] = Query(None, ge=1, le=SIMILAR_K)):
+    """Abonnements les plus proches (catégorie, prix, fonctionnalités), lus dans la table précalculée"""
+    snapshot = catalog_store.current
+    neighbours = snapshot.similarity_table.similar(subscription_id, limit)
+    if neighbours is None:
+        raise HTTPException(status_code=404, detail="Abonnement non trouvé")
+    return [{**snapshot.catalog.get(n["id"]), "score": n["score"]} for n in neighbours]
+
+@api_router.get("/search")
+async def search_subscriptions(
+    q: str = Query(..., min_length=1, max_length=MAX_SEARCH_QUERY_LENGTH),
+    category: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=MAX_SEARCH_LIMIT),
+):
+    """Recherche insensible à la casse et aux accents (saisie semi-automatique, FR/EN)"""
+    snapshot = catalog_store.current
+    results = snapshot.search_index.search(q, limit=limit, category=category)
+    return {
+        "query": q,
+        "total": results["total"],
+        "items": [{**snapshot.catalog.get(item["id"]), "score": item["score"]} for item in results["items"]],
+    }
+
+@api_router.get("/promo-codes/{app_id}")
+async def get_promo_codes(app_id: str):
+    """Codes promo en cours de validité d'une application (cache versionné)"""
+    version, codes = catalog_store.current.promo_codes.get(app_id)
+    return JSONResponse(content=codes, headers={"X-Promo-Version": str(version)})
+
+def require_admin(x_admin_token: Optional[str]):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Administration désactivée (ADMIN_TOKEN non défini)")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Jeton d'administration invalide")
+
+@api_router.post("/admin/catalog/reload")
+async def reload_catalog(force: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """Relire les fichiers du catalogue et publier un nouvel instantané s'ils ont changé"""
+    require_admin(x_admin_token)
     try:
-        reviews = await db.reviews.find({"appId": app_id}).sort("date", -1).to_list(1000)
-        return [Review(**review) for review in reviews]
-    except Exception as e:
-        logger.error(f"Erreur lors de la récupération des avis: {e}")
-        return []
+        snapshot, replaced = await catalog_store.reload(force=force)
+    except CatalogError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    # L'instantané épinglé pour cette requête est l'ancien : la réponse annonce le nouveau
+    return JSONResponse(
+        content={**snapshot.info(), "replaced": replaced},
+        headers={"X-Catalog-Version": snapshot.version},
+    )
 
-@api_router.post("/reviews", response_model=Review)
-async def create_review(review_input: ReviewCreate):
-    """Créer un nouvel avis"""
+@api_router.get("/categories")
+async def list_categories():
+    """Lister les catégories et leur nombre d'abonnements"""
+    catalog = catalog_store.current.catalog
+    return [
+        {"name": name, "count": len(catalog.by_category[name])}
+        for name in catalog.categories
+    ]
+
+def parse_horizon(months: Optional[str], cost_engine: 'CostEngine') -> List[int]:
+    """Durées en mois séparées par des virgules (par défaut celles du catalogue)"""
+    try:
+        horizon = [int(m) for m in months.split(',') if m.strip()] if months else cost_engine.default_months
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Paramètre months invalide")
+    if not horizon or len(horizon) > MAX_COST_HORIZONS or not all(0 < m <= MAX_COST_MONTHS for m in horizon):
+        raise HTTPException(status_code=400, detail="Paramètre months invalide")
+    return horizon
+
+def parse_plans(plans: Optional[str], cost_engine: 'CostEngine'):
+    """Références ``id`` ou ``id:index`` séparées par des virgules (par défaut tout le catalogue)"""
     try:
-        # Créer les initiales
-        user_initials = ''.join([n[0] for n in review_input.userName.strip().split()]).upper()[:2]
-        
-        # Créer l'objet Review
-        review = Review(
-            appId=review_input.appId,
-            userName=review_input.userName.strip(),
-            rating=review_input.rating,
-            comment=review_input.comment.strip(),
-            date=datetime.now().strftime('%d/%m/%Y'),
-            helpful=0,
-            userInitials=user_initials
+        return cost_engine.resolve(p for p in plans.split(',') if p.strip()) if plans else cost_engine.refs
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Plan inconnu: {e.args[0]}")
+
+@api_router.get("/costs")
+async def get_costs(months: Optional[str] = None, plans: Optional[str] = None):
+    """Calculer le coût total d'un panier de plans pour plusieurs durées en une passe
+
+    - months : durées en mois séparées par des virgules (par défaut 12,36,60,120)
+    - plans : références ``id`` ou ``id:index`` séparées par des virgules (par défaut tout le catalogue)
+    """
+    cost_engine = catalog_store.current.cost_engine
+    return cost_engine.price_basket(parse_plans(plans, cost_engine), parse_horizon(months, cost_engine))
+
+@api_router.get("/export")
+async def export_costs(
+    format: str = Query("csv", pattern=f"^({'|'.join(EXPORT_FORMATS)})$"),
+    months: Optional[str] = None,
+    plans: Optional[str] = None,
+):
+    """Exporter en streaming un panier (``plans``) ou tout le catalogue × toutes les durées
+
+    Une ligne par plan et par durée ; l'export d'un panier se termine par ses totaux.
+    """
+    cost_engine = catalog_store.current.cost_engine
+    basket = parse_plans(plans, cost_engine)
+    horizon = parse_horizon(months, cost_engine)
+    filename = f"{'mes-abonnements' if plans else 'catalogue-abonnements'}.{format}"
+    return StreamingResponse(
+        stream_export(cost_engine, format, basket, horizon, with_totals=bool(plans)),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+def optimize_table_size(optimizer: 'BasketOptimizer', request: OptimizeRequest) -> int:
+    """Taille de la programmation dynamique du panier (400 si trop grand, 404 si plan inconnu)"""
+    if len(request.plans) > MAX_OPTIMIZE_ITEMS:
+        raise HTTPException(status_code=400, detail=f"{MAX_OPTIMIZE_ITEMS} abonnements maximum")
+    try:
+        return optimizer.table_size(request.plans, request.budget, request.allowDowngrade)
+    except ValueError as e:
+        # BasketTooLarge (optimizer.py n'est importé qu'avec NumPy, à la première optimisation)
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Plan inconnu: {e.args[0]}")
+
+def run_optimizer(optimizer: 'BasketOptimizer', request: OptimizeRequest):
+    try:
+        return optimizer.optimize(
+            plans=request.plans,
+            budget=request.budget,
+            months=request.months,
+            required_categories=request.requiredCategories,
+            priorities=request.priorities,
+            allow_downgrade=request.allowDowngrade,
         )
-        
-        # Insérer dans MongoDB
-        await db.reviews.insert_one(review.dict())
-        
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Plan inconnu: {e.args[0]}")
+
+# La programmation dynamique tourne dans le pool de threads : la boucle d'événements reste libre
+@api_router.post("/optimize")
+async def optimize_basket(request: OptimizeRequest):
+    """Trouver l'affectation de plans la moins chère qui respecte le budget et les catégories requises"""
+    optimizer = catalog_store.current.basket_optimizer
+    optimize_table_size(optimizer, request)
+    return await run_in_threadpool(run_optimizer, optimizer, request)
+
+@api_router.post("/optimize/batch")
+async def optimize_baskets(requests: List[OptimizeRequest]):
+    """Optimiser plusieurs paniers en un appel (suggestions précalculées)"""
+    if len(requests) > MAX_OPTIMIZE_BATCH:
+        raise HTTPException(status_code=400, detail=f"{MAX_OPTIMIZE_BATCH} paniers maximum")
+    optimizer = catalog_store.current.basket_optimizer
+    if sum(optimize_table_size(optimizer, request) for request in requests) > MAX_OPTIMIZE_BATCH_CELLS:
+        raise HTTPException(status_code=400, detail="Paniers trop grands pour un seul appel")
+    return await run_in_threadpool(lambda: [run_optimizer(optimizer, request) for request in requests])
+
+@api_router.get("/overlaps")
+async def get_overlaps(
+    ids: str = Query(..., description="Identifiants séparés par des virgules"),
+    threshold: float = Query(DEFAULT_THRESHOLD, gt=0, le=1),
+):
+    """Détecter les doublons et chevauchements dans un panier"""
+    try:
+        return catalog_store.current.overlap_index.basket_overlaps(
+            (i.strip() for i in ids.split(',') if i.strip()), threshold
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Abonnement inconnu: {e.args[0]}")
+
+@api_router.get("/overlaps/audit")
+async def audit_overlaps(threshold: float = Query(DEFAULT_THRESHOLD, gt=0, le=1)):
+    """Doublons probables dans tout le catalogue (audit des données)"""
+    return catalog_store.current.overlap_index.audit(threshold)
+
+# Reviews endpoints
+# Les routes /reviews/summary doivent précéder /reviews/{app_id}
+def review_tags(*app_ids: str) -> List[str]:
+    """Étiquettes de cache des lectures d'avis (« reviews » : toutes les applications)"""
+    return ["reviews", *(f"reviews:{app_id}" for app_id in app_ids)]
+
+@api_router.get("/reviews/summary")
+async def get_reviews_summaries(
+    request: Request,
+    ids: str = Query(..., description="Identifiants séparés par des virgules"),
+):
+    """Récupérer les résumés (nombre, moyenne, histogramme) de plusieurs applications"""
+    app_ids = [app_id.strip() for app_id in ids.split(',') if app_id.strip()]
+    if len(app_ids) > MAX_SUMMARY_IDS:
+        raise HTTPException(status_code=400, detail=f"{MAX_SUMMARY_IDS} identifiants maximum")
+    async def compute():
+        return await get_review_summaries(mongo.db, app_ids), {}
+    return await response_cache.respond(request, review_tags(*app_ids), compute)
+
+@api_router.get("/reviews/{app_id}/summary")
+async def get_reviews_summary(app_id: str, request: Request):
+    """Récupérer le résumé des avis d'une application"""
+    async def compute():
+        return await get_review_summary(mongo.db, app_id), {}
+    return await response_cache.respond(request, review_tags(app_id), compute)
+
+@api_router.get("/reviews/{app_id}", responses={200: {"model": List[Review]}})
+async def get_reviews(
+    app_id: str,
+    request: Request,
+    limit: int = Query(REVIEWS_PAGE_SIZE, ge=1, le=MAX_REVIEWS_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    """Récupérer les avis d'une application/abonnement, du plus récent au plus ancien
+
+    La page suivante s'obtient en repassant l'en-tête X-Next-Cursor dans ``cursor``.
+    """
+    async def compute():
+        reviews, next_cursor = await fetch_reviews_page(mongo.db, app_id, limit, cursor)
+        helpful_votes.apply_pending(reviews)
+        return reviews, {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    try:
+        return await response_cache.respond(request, review_tags(app_id), compute)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def client_id(request: Request) -> str:
+    if TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+@api_router.post("/reviews", response_model=Review)
+async def create_review(review_input: ReviewCreate, request: Request, response: Response):
+    """Créer un nouvel avis
+
+    Limité par client et par application (429 + Retry-After). Avec l'en-tête
+    Idempotency-Key, les tentatives répétées ne créent qu'un seul avis et
+    sont rejouées sans consommer de jeton ; la même clé avec un autre corps
+    est refusée (422).
+    """
+    idempotency_key = request.headers.get("idempotency-key")
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail="En-tête Idempotency-Key invalide")
+    client = client_id(request)
+    key = scoped_key(client, review_input.appId, idempotency_key) if idempotency_key else None
+    request_fingerprint = fingerprint(review_input.model_dump())
+    projection = {**REVIEW_PROJECTION, "requestHash": 1}
+
+    async def stored_review():
+        """Avis déjà créé avec cette clé (422 si le corps diffère)"""
+        existing = await mongo.db.reviews.find_one({"idempotencyKey": key}, projection)
+        if existing is not None:
+            check_fingerprint(existing.pop("requestHash", None), request_fingerprint)
+        return existing
+
+    async def insert_review():
+        from pymongo.errors import DuplicateKeyError
+
+        # Créer l'objet Review (initiales, dates d'affichage et de tri)
+        review = build_review(review_input)
+        document = review.model_dump()
+        if key:
+            document["idempotencyKey"] = key
+            document["requestHash"] = request_fingerprint
+        db = mongo.db
+        try:
+            # Insérer dans MongoDB
+            await db.reviews.insert_one(document)
+        except DuplicateKeyError:
+            # Tentative déjà traitée par un autre worker entre-temps
+            existing = await stored_review() if key else None
+            if existing is None:
+                raise
+            return existing, True
+        await record_review_stats(db, review.appId, review.rating)
+        response_cache.invalidate(f"reviews:{review.appId}")
         logger.info(f"Avis créé: {review.id} pour {review.appId}")
-        return review
+        return review, False
+
+    try:
+        # Rejeu d'une tentative déjà traitée ou en cours : pas de jeton consommé
+        if key and not review_requests.pending(key):
+            existing = await stored_review()
+            if existing is not None:
+                response.headers["Idempotent-Replayed"] = "true"
+                return existing
+        decision = None
+        if not (key and review_requests.pending(key)):
+            decision = await review_limiter.check(f"{client}:{review_input.appId}")
+            if not decision.allowed:
+                return JSONResponse(
+                    status_code=429,
+                    content={"detail": "Trop d'avis envoyés, réessayez plus tard"},
+                    headers=decision.headers(review_limiter.burst)
+                )
+        if key:
+            (review, duplicate), coalesced = await review_requests.run(key, insert_review, request_fingerprint)
+        else:
+            (review, duplicate), coalesced = await insert_review(), False
+    except IdempotencyMismatch as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         logger.error(f"Erreur lors de la création de l'avis: {e}")
         raise
+    if decision is not None:
+        response.headers.update(decision.headers(review_limiter.burst))
+    if duplicate or coalesced:
+        response.headers["Idempotent-Replayed"] = "true"
+    return review
+
+@api_router.post("/reviews/bulk")
+async def bulk_create_reviews(request: Request, x_admin_token: Optional[str] = Header(None)):
+    """Importer des avis en masse (NDJSON : un ReviewCreate par ligne, ``id`` local optionnel)
+
+    Réservé à l'administration : les compteurs ``helpful`` et les dates
+    importés sont repris tels quels. Au-delà de MAX_BULK_BYTES,
+    ingest.MAX_LINE_BYTES par ligne ou MAX_BULK_RECORDS avis : 413 (les lots
+    déjà insérés le restent, un nouvel import les compte en doublons).
+    """
+    require_admin(x_admin_token)
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > MAX_BULK_BYTES:
+        raise HTTPException(status_code=413, detail=f"Import limité à {MAX_BULK_BYTES} octets")
+    try:
+        report = await ingest_reviews(mongo.db, iter_ndjson(request.stream(), max_records=MAX_BULK_RECORDS))
+    except IngestTooLarge as e:
+        response_cache.invalidate("reviews")
+        raise HTTPException(status_code=413, detail=str(e))
+    if report.inserted:
+        response_cache.invalidate("reviews")
+    return report.as_dict()
+
+@api_router.post("/admin/reviews/stats/rebuild")
+async def rebuild_review_stats_route(x_admin_token: Optional[str] = Header(None)):
+    """Recalculer les agrégats de toutes les applications depuis les avis (réparation)"""
+    require_admin(x_admin_token)
+    rebuilt = await rebuild_review_stats_exclusive(mongo.db, force=True)
+    if rebuilt is None:
+        raise HTTPException(status_code=409, detail="Recalcul des agrégats déjà en cours")
+    response_cache.invalidate("reviews")
+    return {"apps": rebuilt}
 
 @api_router.put("/reviews/{app_id}/{review_id}/helpful")
 async def increment_helpful(app_id: str, review_id: str):
     """Incrémenter le compteur 'Utile' d'un avis"""
+    # Écriture différée : le vote est cumulé puis écrit en lot par helpful_votes
+    mongo.require()
+    helpful_votes.add(app_id, review_id)
+    response_cache.invalidate(f"reviews:{app_id}")
+    return {"success": True, "message": "Vote ajouté"}
+
+# Historique des dépenses (useSpendingHistory), par identifiant anonyme délivré avec son secret
+async def spending_owner(user: str, secret: Optional[str]) -> str:
+    """Identifiant validé dont l'appelant présente le secret (X-Spending-Secret)"""
+    if not valid_user(user):
+        raise HTTPException(status_code=400, detail="Identifiant utilisateur invalide")
+    if not await check_secret(mongo.db, user, secret):
+        raise HTTPException(status_code=401, detail="Secret de l'historique invalide")
+    return user
+
+def spending_rate_limited(decision) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Trop de requêtes sur l'historique des dépenses, réessayez plus tard"},
+        headers=decision.headers(spending_limiter.burst)
+    )
+
+@api_router.post("/spending", status_code=201)
+async def create_spending_user(request: Request):
+    """Délivrer un identifiant d'historique et son secret (à conserver par le navigateur)"""
+    decision = await spending_limiter.check(f"spending-issue:{client_id(request)}")
+    if not decision.allowed:
+        return spending_rate_limited(decision)
+    return await issue_user(mongo.db)
+
+@api_router.post("/spending/{user}/snapshots")
+async def create_spending_snapshot(
+    user: str, snapshot: SpendingSnapshotCreate, x_spending_secret: Optional[str] = Header(None)
+):
+    """Ajouter un instantané des dépenses au journal et aux agrégats mensuels et annuels
+
+    Limité par identifiant (429 + Retry-After).
+    """
+    user = await spending_owner(user, x_spending_secret)
+    decision = await spending_limiter.check(f"spending:{user}")
+    if not decision.allowed:
+        return spending_rate_limited(decision)
     try:
-        result = await db.reviews.update_one(
-            {"id": review_id, "appId": app_id},
-            {"$inc": {"helpful": 1}}
-        )
-        
-        if result.modified_count > 0:
-            logger.info(f"Vote utile ajouté pour l'avis {review_id}")
-            return {"success": True, "message": "Vote ajouté"}
-        else:
-            logger.warning(f"Avis non trouvé: {review_id}")
-            return {"success": False, "message": "Avis non trouvé"}
-    except Exception as e:
-        logger.error(f"Erreur lors du vote: {e}")
-        raise
+        return await append_snapshot(mongo.db, user, snapshot)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except SpendingConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@api_router.get("/spending/{user}/evolution")
+async def get_spending_evolution(
+    user: str,
+    granularity: str = Query("month", pattern=f"^({'|'.join(GRANULARITIES)})$"),
+    limit: int = Query(6, ge=1, le=MAX_SPENDING_POINTS),
+    start: Optional[str] = Query(None, alias="from", pattern=SPENDING_MONTH),
+    end: Optional[str] = Query(None, alias="to", pattern=SPENDING_MONTH),
+    x_spending_secret: Optional[str] = Header(None),
+):
+    """Dernières périodes (mois ou années) du graphique SpendingEvolution, lues dans les agrégats
+
+    Chaque point porte la dernière valeur de la période (totaux, nombre
+    d'abonnements) et ses statistiques (instantanés, moyenne, min, max).
+    """
+    user = await spending_owner(user, x_spending_secret)
+    return await get_evolution(mongo.db, user, granularity, limit, start, end)
+
+@api_router.get("/spending/{user}/snapshots/{seq}")
+async def get_spending_snapshot(user: str, seq: int, x_spending_secret: Optional[str] = Header(None)):
+    """Instantané complet (liste des abonnements) reconstruit depuis le journal"""
+    user = await spending_owner(user, x_spending_secret)
+    snapshot = await get_snapshot(mongo.db, user, seq)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Instantané non trouvé")
+    return snapshot
+
+@api_router.delete("/spending/{user}")
+async def delete_spending_history(user: str, x_spending_secret: Optional[str] = Header(None)):
+    """Effacer l'historique des dépenses d'un utilisateur (l'identifiant et son secret restent valides)"""
+    user = await spending_owner(user, x_spending_secret)
+    return {"deleted": await delete_history(mongo.db, user)}
+
+@api_router.post("/admin/spending/{user}/rebuild")
+async def rebuild_spending(user: str, x_admin_token: Optional[str] = Header(None)):
+    """Recalculer les agrégats d'un utilisateur depuis le journal"""
+    require_admin(x_admin_token)
+    if not valid_user(user):
+        raise HTTPException(status_code=400, detail="Identifiant utilisateur invalide")
+    return {"snapshots": await rebuild_spending_rollups(mongo.db, user)}
+
+def runtime_gauges():
+    """Valeurs instantanées ajoutées à l'exposition Prometheus"""
+    pool = pool_stats.snapshot()
+    cache = response_cache.metrics()
+    return [
+        ("process_uptime_seconds", "gauge", "Durée depuis le démarrage", round(time.time() - started_at, 3)),
+        ("http_requests_in_flight", "gauge", "Requêtes HTTP en cours", in_flight.current),
+        ("event_loop_lag_seconds", "gauge", "Dernier retard mesuré de la boucle d'événements", loop_lag.last_lag),
+        ("mongodb_pool_connections_open", "gauge", "Connexions MongoDB ouvertes", pool["open"]),
+        ("mongodb_pool_connections_in_use", "gauge", "Connexions MongoDB empruntées", pool["inUse"]),
+        ("response_cache_hits_total", "counter", "Réponses servies depuis le cache", cache["hits"]),
+        ("response_cache_misses_total", "counter", "Réponses absentes du cache", cache["misses"]),
+        ("response_cache_evictions_total", "counter", "Entrées évincées du cache (taille)", cache["evictions"]),
+        ("helpful_votes_queue_depth", "gauge", "Avis avec des votes 'Utile' en attente d'écriture",
+         helpful_votes.queue_depth),
+        ("review_rate_limit_rejections_total", "counter", "Créations d'avis refusées par le limiteur",
+         review_limiter.rejected),
+        ("spending_rate_limit_rejections_total", "counter",
+         "Requêtes d'historique des dépenses refusées par le limiteur", spending_limiter.rejected),
+        ("catalog_snapshot_generation", "gauge", "Génération de l'instantané du catalogue servi",
+         catalog_store.latest.generation),
+        ("catalog_reload_failures_total", "counter", "Rechargements du catalogue refusés", catalog_store.failures),
+    ]
+
+@api_router.get("/metrics")
+async def get_metrics():
+    """Métriques au format texte Prometheus"""
+    return Response(
+        content=metrics_registry.render(runtime_gauges()),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+@api_router.get("/metrics/votes")
+async def get_vote_metrics():
+    """Métriques de la file des votes 'Utile' (profondeur, latence des écritures)"""
+    return helpful_votes.metrics()
+
+@api_router.get("/metrics/rate-limits")
+async def get_rate_limit_metrics():
+    """Décisions du limiteur de création d'avis et requêtes idempotentes fusionnées"""
+    return {
+        **review_limiter.metrics(),
+        "idempotentCoalesced": review_requests.coalesced,
+        "idempotentInFlight": review_requests.in_flight,
+        "spending": spending_limiter.metrics(),
+    }
+
+@api_router.get("/metrics/cache")
+async def get_cache_metrics():
+    """Métriques du cache des réponses (succès, échecs, évictions)"""
+    return response_cache.metrics()
+
+@api_router.get("/metrics/catalog")
+async def get_catalog_metrics():
+    """Instantané du catalogue servi (version, génération) et rechargements"""
+    return catalog_store.metrics()
 
 # Download project endpoint
 @api_router.get("/download-project")
-async def download_project():
-    """Télécharger ABSOLUMENT TOUT le projet en ZIP"""
-    try:
-        zip_buffer = io.BytesIO()
-        project_root = Path("/app")
-        
-        # Exclure UNIQUEMENT les dossiers très volumineux
-        exclude_dirs = {'node_modules', '.git'}
-        
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for file_path in project_root.rglob('*'):
-                if file_path.is_file():
-                    # Exclure uniquement node_modules et .git
-                    if any(part in exclude_dirs for part in file_path.parts):
-                        continue
-                    
-                    arcname = str(file_path.relative_to(project_root))
-                    try:
-                        zip_file.write(file_path, arcname)
-                    except Exception as e:
-                        logger.warning(f"Impossible d'ajouter {arcname}: {e}")
-                        
-            logger.info(f"Total fichiers dans le ZIP: {len(zip_file.namelist())}")
-        
-        zip_buffer.seek(0)
-        logger.info("Projet ZIP COMPLET généré")
-        
-        return StreamingResponse(
-            zip_buffer,
-            media_type="application/zip",
-            headers={
-                "Content-Disposition": "attachment; filename=combien-ca-coute-COMPLET.zip"
-            }
-        )
-    except Exception as e:
-        logger.error(f"Erreur ZIP: {e}")
-        raise
+async def download_project(request: Request):
+    """Télécharger ABSOLUMENT TOUT le projet en ZIP (servi depuis le cache, reprise possible)"""
+    archive, file_obj = await archive_cache.open()
+    headers = {
+        "ETag": archive.etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "no-cache",
+        "Content-Disposition": "attachment; filename=combien-ca-coute-COMPLET.zip"
+    }
+    if etag_matches(request.headers.get("if-none-match"), archive.etag):
+        file_obj.close()
+        return Response(status_code=304, headers=headers)
+
+    start, end, status_code = 0, archive.size - 1, 200
+    range_header = request.headers.get("range")
+    # If-Range : ne reprendre que si l'archive n'a pas changé entre-temps
+    if range_header and request.headers.get("if-range", archive.etag) == archive.etag:
+        try:
+            byte_range = parse_byte_range(range_header, archive.size)
+        except ValueError:
+            file_obj.close()
+            return Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{archive.size}"}
+            )
+        if byte_range is not None:
+            start, end = byte_range
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{archive.size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        iter_file_range(file_obj, start, end),
+        status_code=status_code,
+        media_type="application/zip",
+        headers=headers
+    )
+
+# Debug endpoints (désactivés par défaut)
+if os.environ.get('ENABLE_DEBUG_ROUTES') == '1':
+    @api_router.get("/debug/query-plans")
+    async def debug_query_plans():
+        """Plan d'exécution de chaque requête de l'application (COLLSCAN signalés)"""
+        report = await check_query_plans(mongo.db)
+        return {
+            "collscan": sorted(name for name, result in report.items() if result["collscan"]),
+            "unexpected": sorted(name for name, result in report.items() if result["unexpected"]),
+            "queries": report,
+        }
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -185,8 +881,8 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Promo-Version", "X-Catalog-Version", "Retry-After", "Idempotent-Replayed"],
 )
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+app.add_middleware(InFlightMiddleware, counter=in_flight)
+app.add_middleware(MetricsMiddleware, registry=metrics_registry)
+app.add_middleware(CatalogVersionMiddleware, store=catalog_store)
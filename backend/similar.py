@@ -0,0 +1,191 @@
+"""Table précalculée des abonnements similaires (k plus proches voisins).
+
+La similarité entre deux abonnements combine la catégorie, la proximité des
+vecteurs de prix (plan le moins cher et le plus cher, en échelle
+logarithmique) et les fonctionnalités communes (Jaccard sur les mots des
+features et appareils de enrichedSubscriptions). La table est stockée dans
+deux tableaux NumPy (n, k) — positions des voisins en int32, scores en
+float32 — et chaque lecture est un simple accès par position.
+
+Quand une seule entrée change, ``update`` recalcule sa ligne en O(n) et ne
+retouche que les lignes où elle entre, monte ou sort du top-k ; seules les
+lignes où elle descend sont recalculées entièrement.
+"""
+import logging
+import re
+from typing import Any, Dict, FrozenSet, List, Optional, Set
+
+import numpy as np
+
+from catalog import Catalog, sort_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_K = 8
+
+# Poids des composantes du score (somme = 1)
+CATEGORY_WEIGHT = 0.5
+PRICE_WEIGHT = 0.3
+FEATURE_WEIGHT = 0.2
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def price_vector(subscription: Dict[str, Any]) -> List[float]:
+    prices = [plan['monthlyPrice'] for plan in subscription['plans']] or [0.0]
+    return [float(np.log1p(min(prices))), float(np.log1p(max(prices)))]
+
+
+def feature_tokens(enriched: Optional[Dict[str, Any]]) -> FrozenSet[str]:
+    """Mots significatifs des features et appareils (« Contenu 4K HDR » → contenu, hdr)"""
+    if not enriched:
+        return frozenset()
+    words: Set[str] = set()
+    for text in (enriched.get('features') or []) + (enriched.get('devices') or []):
+        words.update(word for word in _WORD.findall(sort_key(text)) if len(word) > 2)
+    return frozenset(words)
+
+
+class SimilarityTable:
+    def __init__(
+        self,
+        catalog: Catalog,
+        enriched: Optional[Dict[str, Dict[str, Any]]] = None,
+        k: int = DEFAULT_K,
+        neighbours: Optional[np.ndarray] = None,
+        scores: Optional[np.ndarray] = None,
+    ):
+        enriched = enriched or {}
+        self.ids: List[str] = [sub['id'] for sub in catalog.subscriptions]
+        self.positions: Dict[str, int] = dict(catalog.by_id)
+        n = len(self.ids)
+        self.k = max(min(k, n - 1), 0)
+
+        self._category_codes: Dict[str, int] = {}
+        self.categories = np.array(
+            [self._category_code(sub['category']) for sub in catalog.subscriptions], dtype=np.int32
+        )
+        self.prices = np.array([price_vector(sub) for sub in catalog.subscriptions], dtype=np.float64).reshape(n, 2)
+        self.features: List[FrozenSet[str]] = [feature_tokens(enriched.get(sub_id)) for sub_id in self.ids]
+
+        if neighbours is not None:
+            # Table déjà calculée (catalogue binaire partagé) : vues en lecture seule, update() travaille sur une copie
+            self.k = neighbours.shape[1]
+            self.neighbours = neighbours
+            self.scores = scores
+            return
+        self.neighbours = np.zeros((n, self.k), dtype=np.int32)
+        self.scores = np.zeros((n, self.k), dtype=np.float32)
+        self._build()
+        logger.info(f"Table de similarité: {n} abonnements, {self.k} voisins chacun")
+
+    def _category_code(self, category: str) -> int:
+        return self._category_codes.setdefault(category, len(self._category_codes))
+
+    def _combine(self, same_category, distance, intersection, union) -> np.ndarray:
+        jaccard = np.divide(intersection, union, out=np.zeros(np.shape(union)), where=union > 0)
+        return (
+            CATEGORY_WEIGHT * same_category
+            + PRICE_WEIGHT * np.exp(-distance)
+            + FEATURE_WEIGHT * jaccard
+        )
+
+    def _build(self):
+        """Matrice complète des scores n × n (quelques ms pour 300 abonnements)"""
+        n = len(self.ids)
+        vocabulary: Dict[str, int] = {}
+        for tokens in self.features:
+            for token in tokens:
+                vocabulary.setdefault(token, len(vocabulary))
+        incidence = np.zeros((n, max(len(vocabulary), 1)), dtype=np.float64)
+        for position, tokens in enumerate(self.features):
+            incidence[position, [vocabulary[token] for token in tokens]] = 1.0
+        intersection = incidence @ incidence.T
+        sizes = incidence.sum(axis=1)
+        same_category = (self.categories[:, None] == self.categories[None, :]).astype(np.float64)
+        distance = np.sqrt(((self.prices[:, None, :] - self.prices[None, :, :]) ** 2).sum(axis=2))
+        matrix = self._combine(same_category, distance, intersection, sizes[:, None] + sizes[None, :] - intersection)
+        np.fill_diagonal(matrix, -np.inf)
+        for position in range(n):
+            self._set_row(position, matrix[position])
+
+    def _row_scores(self, position: int) -> np.ndarray:
+        """Scores d'une entrée contre toutes les autres, mêmes opérations que _build"""
+        tokens = self.features[position]
+        intersection = np.array([len(tokens & other) for other in self.features], dtype=np.float64)
+        sizes = np.array([len(other) for other in self.features], dtype=np.float64)
+        same_category = (self.categories == self.categories[position]).astype(np.float64)
+        distance = np.sqrt(((self.prices - self.prices[position]) ** 2).sum(axis=1))
+        row = self._combine(same_category, distance, intersection, len(tokens) + sizes - intersection)
+        row[position] = -np.inf
+        return row
+
+    def _set_row(self, position: int, row: np.ndarray):
+        # Score décroissant, puis position croissante pour départager
+        order = np.lexsort((np.arange(len(row)), -row))[:self.k]
+        self.neighbours[position] = order
+        self.scores[position] = row[order]
+
+    def _sort_row(self, position: int):
+        order = np.lexsort((self.neighbours[position], -self.scores[position]))
+        self.neighbours[position] = self.neighbours[position][order]
+        self.scores[position] = self.scores[position][order]
+
+    def update(self, subscription: Dict[str, Any], enriched: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Prendre en compte la modification d'un abonnement existant.
+
+        Renvoie les ids dont la liste de voisins a changé. Lève KeyError pour
+        un id inconnu (un ajout ou une suppression demande une table neuve).
+        """
+        position = self.positions[subscription['id']]
+        self.categories[position] = self._category_code(subscription['category'])
+        self.prices[position] = price_vector(subscription)
+        self.features[position] = feature_tokens(enriched)
+
+        row = self._row_scores(position)
+        self._set_row(position, row)
+        if self.k == 0:
+            return [subscription['id']]
+        changed = [position]
+        rebuilt = 0
+        new_scores = row.astype(np.float32)
+        holds = (self.neighbours == position).any(axis=1)
+        beats = (new_scores > self.scores[:, -1]) | (
+            (new_scores == self.scores[:, -1]) & (position < self.neighbours[:, -1])
+        )
+        beats[position] = False
+        # Seules les lignes qui contiennent l'entrée ou qu'elle rejoint sont touchées
+        for other in np.flatnonzero(holds | beats):
+            score = new_scores[other]
+            slots = np.flatnonzero(self.neighbours[other] == position)
+            if slots.size:
+                slot = slots[0]
+                if score >= self.scores[other, slot]:
+                    # Score en hausse : l'entrée reste dans le top-k, seul l'ordre bouge
+                    self.scores[other, slot] = score
+                    self._sort_row(other)
+                else:
+                    # Score en baisse : une entrée hors du top-k peut la dépasser
+                    self._set_row(other, self._row_scores(other))
+                    rebuilt += 1
+            else:
+                self.neighbours[other, -1] = position
+                self.scores[other, -1] = score
+                self._sort_row(other)
+            changed.append(int(other))
+        logger.info(
+            f"Table de similarité: {subscription['id']} mis à jour, "
+            f"{len(changed)} lignes modifiées dont {rebuilt} recalculées"
+        )
+        return [self.ids[i] for i in changed]
+
+    def similar(self, subscription_id: str, limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """Voisins d'un abonnement, du plus proche au plus lointain (None si id inconnu)"""
+        position = self.positions.get(subscription_id)
+        if position is None:
+            return None
+        count = self.k if limit is None else min(limit, self.k)
+        return [
+            {'id': self.ids[neighbour], 'score': round(float(score), 4)}
+            for neighbour, score in zip(self.neighbours[position, :count], self.scores[position, :count])
+        ]
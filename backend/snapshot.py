@@ -0,0 +1,503 @@
+"""Instantanés versionnés et immuables du catalogue, rechargés à chaud.
+
+Le backend possède le catalogue : subscriptions.json, enrichedSubscriptions.json,
+categoryTranslations.json et promoCodes.json sont lus ensemble, validés par
+les modèles Pydantic (miroirs des interfaces du frontend), puis tous les
+index dérivés (coûts, optimiseur, chevauchements, similarité, recherche,
+codes promo) sont construits dans un thread, hors de la boucle
+d'événements. Le nouvel instantané remplace l'ancien en une seule
+affectation : une requête voit l'un ou l'autre, jamais un état à moitié
+construit.
+
+Chaque requête HTTP est épinglée sur l'instantané courant à son arrivée
+(CatalogVersionMiddleware) et sa réponse porte ``X-Catalog-Version`` : une
+empreinte du contenu des fichiers, identique d'un worker à l'autre, sur
+laquelle les caches peuvent s'appuyer.
+
+Le rechargement est déclenché par la surveillance des fichiers (date de
+modification et taille, vérifiées toutes les ``watch_interval`` secondes)
+ou par l'endpoint d'administration. Un fichier invalide est refusé et
+l'instantané en cours reste servi. Quand seules quelques entrées changent
+(mêmes identifiants, dans le même ordre), la table de similarité
+précédente est copiée puis mise à jour entrée par entrée au lieu d'être
+recalculée.
+
+Avec plusieurs workers, ``packed_dir`` active le catalogue binaire partagé
+(voir packed.py) : le premier worker qui rencontre une version la valide et
+l'écrit, les autres la projettent en mémoire sans rien reparser.
+
+Les index calculés avec NumPy (coûts, optimiseur, similarité) du premier
+instantané ne sont pas construits à l'import : le démarrage à froid
+n'importe pas NumPy. ``CatalogStore.warm`` les construit ensuite en
+arrière-plan, dans un thread, pour que la première requête qui en a
+besoin ne paie pas leur construction sur la boucle. Les instantanés
+rechargés les construisent d'emblée, dans le thread.
+"""
+import asyncio
+import contextlib
+import contextvars
+import copy
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from catalog import Catalog
+from models import CatalogFile, CategoryNames, EnrichedSubscription, PromoCode
+from packed import PackedCatalog, PackedFormatError, build_lock, pack_catalog, packed_filename, write_packed
+from overlap import OverlapIndex
+from promos import PromoCodes
+from search import SearchIndex
+
+if TYPE_CHECKING:
+    from costs import CostEngine
+    from optimizer import BasketOptimizer
+    from similar import SimilarityTable
+
+logger = logging.getLogger(__name__)
+
+# Au-delà, une table de similarité neuve coûte moins que les mises à jour successives
+MAX_INCREMENTAL_UPDATES = 16
+
+_CATALOG = TypeAdapter(CatalogFile)
+_ENRICHED = TypeAdapter(Dict[str, EnrichedSubscription])
+_CATEGORIES = TypeAdapter(Dict[str, CategoryNames])
+_PROMO_CODES = TypeAdapter(Dict[str, List[PromoCode]])
+
+
+class CatalogError(ValueError):
+    """Fichier du catalogue illisible ou invalide"""
+
+
+@dataclass(frozen=True)
+class CatalogPaths:
+    catalog: Path
+    enriched: Path
+    categories: Path
+    promos: Path
+
+    def all(self) -> Tuple[Path, ...]:
+        return (self.catalog, self.enriched, self.categories, self.promos)
+
+
+class CatalogSources(NamedTuple):
+    """Contenu brut des fichiers (None : fichier facultatif absent) et son empreinte"""
+    version: str
+    contents: Tuple[Optional[bytes], ...]
+
+
+class SimilaritySeed(NamedTuple):
+    """Dernière table de similarité calculée et le catalogue dont elle provient"""
+    table: 'SimilarityTable'
+    catalog: Catalog
+    enriched: Dict[str, Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: str
+    generation: int
+    loaded_at: datetime
+    catalog: Catalog
+    enriched: Dict[str, Dict[str, Any]]
+    overlap_index: OverlapIndex
+    search_index: SearchIndex
+    # Seule partie vivante : les codes expirés sont retirés au fil du temps
+    promo_codes: PromoCodes
+    similar_k: int
+    # Catalogue binaire projeté dont les enregistrements et tableaux sont des vues
+    packed: Optional[PackedCatalog] = None
+    # Table de l'instantané précédent, mise à jour au lieu d'être recalculée (libérée ensuite)
+    similarity_seed: Optional[SimilaritySeed] = field(default=None, repr=False, compare=False)
+
+    # cached_property écrit dans __dict__ : compatible avec frozen, la valeur reste fixe une fois calculée
+    @cached_property
+    def cost_engine(self) -> 'CostEngine':
+        from costs import CostEngine
+
+        return CostEngine(self.catalog)
+
+    @cached_property
+    def basket_optimizer(self) -> 'BasketOptimizer':
+        from optimizer import BasketOptimizer
+
+        return BasketOptimizer(self.catalog)
+
+    @cached_property
+    def similarity_table(self) -> 'SimilarityTable':
+        from similar import SimilarityTable
+
+        if self.packed is not None:
+            return SimilarityTable(
+                self.catalog, self.enriched, k=self.similar_k,
+                neighbours=self.packed.neighbours, scores=self.packed.scores,
+            )
+        table = _similarity_table(self.similarity_seed, self.catalog, self.enriched, self.similar_k)
+        object.__setattr__(self, 'similarity_seed', None)
+        return table
+
+    def next_similarity_seed(self) -> Optional[SimilaritySeed]:
+        """Graine de l'instantané suivant : notre table si elle est calculée, sinon celle héritée"""
+        table = self.__dict__.get('similarity_table')
+        if table is not None:
+            return SimilaritySeed(table, self.catalog, self.enriched)
+        return self.similarity_seed
+
+    def build_indexes(self):
+        """Construire les index paresseux (bloquant : à appeler hors de la boucle)"""
+        self.cost_engine
+        self.basket_optimizer
+        self.similarity_table
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "generation": self.generation,
+            "loadedAt": self.loaded_at.isoformat(),
+            "subscriptions": len(self.catalog),
+            "categories": len(self.catalog.categories),
+            "promoCodes": sum(len(codes) for codes in self.promo_codes.live.values()),
+            "packed": str(self.packed.path) if self.packed is not None else None,
+        }
+
+
+def read_sources(paths: CatalogPaths) -> CatalogSources:
+    contents: List[Optional[bytes]] = []
+    digest = hashlib.blake2b(digest_size=8)
+    for path in paths.all():
+        try:
+            content: Optional[bytes] = path.read_bytes()
+        except FileNotFoundError:
+            if path == paths.catalog:
+                raise CatalogError(f"Catalogue introuvable: {path}")
+            content = None
+        digest.update(path.name.encode())
+        digest.update(b'\0' if content is None else len(content).to_bytes(8, 'big') + content)
+        contents.append(content)
+    return CatalogSources(digest.hexdigest(), tuple(contents))
+
+
+def _validate(adapter, content: Optional[bytes], path: Path, default):
+    if content is None:
+        logger.warning(f"Fichier du catalogue absent: {path}")
+        return default
+    try:
+        return adapter.validate_json(content)
+    except ValidationError as e:
+        details = "; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or '(racine)'}: {error['msg']}"
+            for error in e.errors()[:5]
+        )
+        raise CatalogError(f"{path.name}: {e.error_count()} erreur(s) — {details}")
+
+
+def _similarity_table(
+    seed: Optional[SimilaritySeed], catalog: Catalog, enriched: Dict[str, Dict[str, Any]], k: int
+) -> 'SimilarityTable':
+    from similar import SimilarityTable
+
+    if seed is not None:
+        table = seed.table
+        ids = [sub['id'] for sub in catalog.subscriptions]
+        if table.ids == ids and table.k == max(min(k, len(ids) - 1), 0):
+            changed = [
+                sub for sub in catalog.subscriptions
+                if sub != seed.catalog.get(sub['id']) or enriched.get(sub['id']) != seed.enriched.get(sub['id'])
+            ]
+            if not changed:
+                return table
+            if len(changed) <= MAX_INCREMENTAL_UPDATES:
+                # L'instantané précédent reste servi pendant la construction : on travaille sur une copie
+                table = copy.deepcopy(table)
+                for sub in changed:
+                    table.update(sub, enriched.get(sub['id']))
+                return table
+    return SimilarityTable(catalog, enriched, k=k)
+
+
+def _load_json(
+    paths: CatalogPaths, sources: CatalogSources
+) -> Tuple[Catalog, Dict[str, Dict[str, Any]], Dict[str, str], Dict[str, List[Dict[str, Any]]]]:
+    """Valider les fichiers JSON ; renvoie (catalogue, données enrichies, traductions, codes promo)"""
+    catalog_content, enriched_content, categories_content, promos_content = sources.contents
+    data = _validate(_CATALOG, catalog_content, paths.catalog, None)
+    catalog = Catalog(
+        [sub.model_dump(exclude_none=True) for sub in data.subscriptions],
+        [option.model_dump() for option in data.durationOptions],
+    )
+    enriched = {
+        sub_id: entry.model_dump(exclude_none=True)
+        for sub_id, entry in _validate(_ENRICHED, enriched_content, paths.enriched, {}).items()
+    }
+    translations = {
+        name: names.en for name, names in _validate(_CATEGORIES, categories_content, paths.categories, {}).items()
+    }
+    promos = {
+        app_id: [promo.model_dump() for promo in codes]
+        for app_id, codes in _validate(_PROMO_CODES, promos_content, paths.promos, {}).items()
+    }
+    return catalog, enriched, translations, promos
+
+
+def _load_packed(
+    paths: CatalogPaths,
+    sources: CatalogSources,
+    similar_k: int,
+    seed: Optional[SimilaritySeed],
+    packed_dir: Path,
+) -> PackedCatalog:
+    """Projeter le catalogue binaire de cette version, après l'avoir construit s'il n'existe pas"""
+    path = packed_dir / packed_filename(sources.version, similar_k)
+    with contextlib.suppress(PackedFormatError):
+        return PackedCatalog(path, sources.version)
+    with build_lock(packed_dir):
+        # Un autre worker a pu le construire pendant l'attente du verrou
+        with contextlib.suppress(PackedFormatError):
+            return PackedCatalog(path, sources.version)
+        catalog, enriched, translations, promos = _load_json(paths, sources)
+        similarity = _similarity_table(seed, catalog, enriched, similar_k)
+        data = pack_catalog(
+            sources.version, catalog.subscriptions, catalog.duration_options, enriched, translations, promos,
+            similarity.neighbours, similarity.scores,
+        )
+        write_packed(path, data)
+        logger.info(f"Catalogue binaire écrit: {path} ({len(data)} octets)")
+        # Empreinte du corps vérifiée une fois, sur le fichier tel qu'il a été écrit
+        return PackedCatalog(path, sources.version, verify=True)
+
+
+def build_snapshot(
+    paths: CatalogPaths,
+    generation: int,
+    similar_k: int,
+    previous: Optional[CatalogSnapshot] = None,
+    sources: Optional[CatalogSources] = None,
+    packed_dir: Optional[Path] = None,
+    eager: bool = True,
+) -> CatalogSnapshot:
+    """Valider les fichiers et construire les index (bloquant : à appeler hors de la boucle)
+
+    Avec ``packed_dir``, le catalogue est lu depuis le fichier binaire partagé
+    de cette version (construit au besoin) au lieu des fichiers JSON. Sans
+    ``eager``, les index NumPy sont laissés à leur premier accès.
+    """
+    start = time.perf_counter()
+    sources = sources or read_sources(paths)
+    seed = previous.next_similarity_seed() if previous is not None else None
+    packed: Optional[PackedCatalog] = None
+    if packed_dir is not None:
+        try:
+            packed = _load_packed(paths, sources, similar_k, seed, packed_dir)
+        except OSError as e:
+            logger.warning(f"Catalogue binaire indisponible, lecture du JSON: {e}")
+    if packed is not None:
+        # Enregistrements projetés : décodés temporairement pour construire les index, jamais conservés
+        catalog = Catalog(packed.subscriptions, packed.duration_options())
+        enriched = packed.enriched()
+        translations = packed.category_translations()
+        promos = packed.promo_codes()
+        seed = None
+    else:
+        catalog, enriched, translations, promos = _load_json(paths, sources)
+
+    snapshot = CatalogSnapshot(
+        version=sources.version,
+        generation=generation,
+        loaded_at=datetime.now(timezone.utc),
+        catalog=catalog,
+        enriched=enriched,
+        overlap_index=OverlapIndex(catalog),
+        search_index=SearchIndex(catalog, enriched, translations),
+        promo_codes=PromoCodes(promos, version=previous.promo_codes.version + 1 if previous else 0),
+        similar_k=similar_k,
+        packed=packed,
+        similarity_seed=seed,
+    )
+    if eager:
+        snapshot.build_indexes()
+    logger.info(
+        f"Catalogue {snapshot.version} (génération {generation}{', binaire' if packed else ''}): "
+        f"{len(catalog)} abonnements, {len(catalog.categories)} catégories, "
+        f"construit en {(time.perf_counter() - start) * 1000:.0f} ms"
+    )
+    return snapshot
+
+
+_pinned: contextvars.ContextVar[Optional[CatalogSnapshot]] = contextvars.ContextVar(
+    'catalog_snapshot', default=None
+)
+
+
+class CatalogStore:
+    """Instantané courant du catalogue et son rechargement"""
+
+    def __init__(
+        self,
+        paths: CatalogPaths,
+        similar_k: int,
+        watch_interval: float = 2.0,
+        packed_dir: Optional[Path] = None,
+    ):
+        self.paths = paths
+        self.similar_k = similar_k
+        self.watch_interval = watch_interval
+        self.packed_dir = packed_dir
+        self._signature = self._stat()
+        # Premier instantané : index NumPy différés, le démarrage à froid ne les attend pas
+        self._latest = build_snapshot(paths, 1, similar_k, packed_dir=packed_dir, eager=False)
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._warm_task: Optional[asyncio.Task] = None
+        self._running = False
+
+        # Métriques
+        self.reloads = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def latest(self) -> CatalogSnapshot:
+        return self._latest
+
+    @property
+    def current(self) -> CatalogSnapshot:
+        """Instantané de la requête en cours (épinglé par le middleware), sinon le plus récent"""
+        return _pinned.get() or self._latest
+
+    def _stat(self) -> Tuple[Optional[Tuple[int, int]], ...]:
+        signature = []
+        for path in self.paths.all():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                signature.append(None)
+            else:
+                signature.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    async def reload(self, force: bool = False) -> Tuple[CatalogSnapshot, bool]:
+        """Relire les fichiers ; renvoie (instantané servi, remplacé ?). Lève CatalogError si invalide"""
+        async with self._lock:
+            # Signature prise avant la lecture : une écriture concurrente déclenchera une nouvelle passe
+            self._signature = self._stat()
+            previous = self._latest
+            try:
+                sources = await run_in_threadpool(read_sources, self.paths)
+                if sources.version == previous.version and not force:
+                    return previous, False
+                snapshot = await run_in_threadpool(
+                    build_snapshot, self.paths, previous.generation + 1, self.similar_k, previous, sources,
+                    self.packed_dir,
+                )
+            except CatalogError as e:
+                self.failures += 1
+                self.last_error = str(e)
+                raise
+            self._latest = snapshot
+            self.reloads += 1
+            self.last_error = None
+            if self._running:
+                snapshot.promo_codes.start()
+                await previous.promo_codes.stop()
+            return snapshot, True
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            if self._stat() == self._signature:
+                continue
+            try:
+                await self.reload()
+            except CatalogError as e:
+                logger.error(f"Catalogue refusé, version {self._latest.version} conservée: {e}")
+            except Exception as e:
+                logger.error(f"Erreur lors du rechargement du catalogue: {e}")
+
+    async def _build_indexes(self, snapshot: CatalogSnapshot):
+        start = time.perf_counter()
+        try:
+            await run_in_threadpool(snapshot.build_indexes)
+        except Exception as e:
+            # Une route qui en a besoin retentera la construction à son premier accès
+            logger.error(f"Erreur lors de la construction des index du catalogue {snapshot.version}: {e}")
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Index du catalogue {snapshot.version} construits en {elapsed_ms:.0f} ms")
+
+    def warm(self) -> asyncio.Task:
+        """Construire en arrière-plan, hors de la boucle, les index différés de l'instantané courant"""
+        if self._warm_task is None or self._warm_task.done():
+            self._warm_task = asyncio.ensure_future(self._build_indexes(self._latest))
+        return self._warm_task
+
+    def start(self):
+        self._running = True
+        # Verrou lié à la boucle du lifespan (une nouvelle boucle par démarrage en test)
+        self._lock = asyncio.Lock()
+        self._latest.promo_codes.start()
+        if self.watch_interval > 0 and self._task is None:
+            self._task = asyncio.ensure_future(self._watch())
+
+    async def stop(self):
+        self._running = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._warm_task is not None:
+            # Le thread termine sa construction : l'annulation ne prend effet qu'après
+            self._warm_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._warm_task
+            self._warm_task = None
+        await self._latest.promo_codes.stop()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self._latest.info(),
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "lastError": self.last_error,
+            "watchInterval": self.watch_interval,
+        }
+
+
+class CatalogVersionMiddleware:
+    """Middleware ASGI pur : épingle l'instantané de la requête et ajoute X-Catalog-Version"""
+
+    def __init__(self, app, store: CatalogStore):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        snapshot = self.store.latest
+        header = (b"x-catalog-version", snapshot.version.encode())
+
+        async def send_with_version(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                # Une réponse peut annoncer une autre version (rechargement administrateur)
+                if not any(name.lower() == header[0] for name, _ in headers):
+                    headers.append(header)
+                message["headers"] = headers
+            await send(message)
+
+        token = _pinned.set(snapshot)
+        try:
+            await self.app(scope, receive, send_with_version)
+        finally:
+            _pinned.reset(token)
@@ -0,0 +1,329 @@
+"""Historique des dépenses : série temporelle par utilisateur.
+
+Quatre collections :
+
+- ``spending_users`` : identifiants délivrés par ``issue_user`` avec
+  l'empreinte (SHA-256) de leur secret ; toutes les routes d'un
+  historique exigent ce secret ;
+- ``spending_events`` : journal en ajout seul, un document par instantané
+  (totaux, mois, abonnements). La liste des abonnements est encodée en
+  delta par rapport à l'instantané précédent (``set`` : ajoutés ou
+  modifiés, ``unset`` : identifiants retirés) ; un instantané sur
+  KEYFRAME_INTERVAL porte la liste complète, ce qui borne la relecture ;
+- ``spending_heads`` : dernier numéro de séquence et liste courante de
+  chaque utilisateur, base du delta suivant ;
+- ``spending_rollups`` : un agrégat par utilisateur et par mois ou année
+  (nombre d'instantanés, somme, min, max, dernière valeur), mis à jour à
+  chaque ajout. /api/spending/{user}/evolution ne lit que ces agrégats :
+  dix ans d'historique mensuel tiennent en 120 documents, quel que soit le
+  nombre d'instantanés.
+
+Le numéro de séquence est attribué par l'index unique (user, seq) de
+spending_events : de deux ajouts concurrents, le perdant relit la tête et
+recommence. La tête peut avoir un instantané de retard sur le journal
+(arrêt entre les deux écritures) : elle est alors avancée par l'ajout
+suivant. Les agrégats manquants après un tel arrêt se recalculent avec
+``rebuild_spending_rollups``.
+"""
+import hashlib
+import logging
+import re
+import secrets
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from models import SpendingSnapshotCreate
+
+if TYPE_CHECKING:
+    from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+# Identifiant anonyme délivré par issue_user (UUID)
+USER_ID = re.compile(r'[A-Za-z0-9_-]{8,64}')
+
+# Un instantané sur KEYFRAME_INTERVAL porte la liste complète des abonnements
+KEYFRAME_INTERVAL = 32
+MAX_APPEND_ATTEMPTS = 5
+# Tolérance sur les horodatages fournis par le client (horloge en avance)
+MAX_CLOCK_SKEW_MS = 24 * 3600 * 1000
+# Opérations d'agrégat envoyées par bulk_write lors d'un recalcul
+REBUILD_BATCH_SIZE = 1000
+
+GRANULARITIES = {"month": 7, "year": 4}  # longueur de la clé de période (YYYY-MM, YYYY)
+
+_TOTALS = ("totalMonthly", "totalYearly", "subscriptionCount")
+_ROLLUP_PROJECTION = {"_id": 0, "period": 1, "key": 1, "snapshots": 1, "sumMonthly": 1,
+                      "minMonthly": 1, "maxMonthly": 1, "last": 1}
+
+
+class SpendingConflict(RuntimeError):
+    """Trop d'ajouts concurrents pour le même utilisateur"""
+
+
+def valid_user(user: str) -> bool:
+    return USER_ID.fullmatch(user) is not None
+
+
+def _secret_hash(secret: str) -> str:
+    return hashlib.sha256(secret.encode('utf-8')).hexdigest()
+
+
+async def issue_user(db) -> Dict[str, str]:
+    """Nouvel identifiant d'historique et son secret (renvoyé une seule fois, seule l'empreinte est gardée)"""
+    user = str(uuid.uuid4())
+    secret = secrets.token_urlsafe(32)
+    await db.spending_users.insert_one({
+        "_id": user, "secretHash": _secret_hash(secret), "createdAt": datetime.now(timezone.utc),
+    })
+    return {"user": user, "secret": secret}
+
+
+async def check_secret(db, user: str, secret: Optional[str]) -> bool:
+    """Le secret présenté est-il celui délivré avec l'identifiant ?"""
+    if not secret:
+        return False
+    stored = await db.spending_users.find_one({"_id": user}, {"secretHash": 1})
+    return stored is not None and secrets.compare_digest(stored["secretHash"], _secret_hash(secret))
+
+
+def month_of(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc).strftime('%Y-%m')
+
+
+def diff_subscriptions(previous: List[Dict], current: List[Dict]) -> Dict[str, List]:
+    """Delta de ``previous`` à ``current`` (listes triées par identifiant)"""
+    before = {item["id"]: item for item in previous}
+    ids = {item["id"] for item in current}
+    delta: Dict[str, List] = {}
+    changed = [item for item in current if before.get(item["id"]) != item]
+    removed = [item_id for item_id in before if item_id not in ids]
+    if changed:
+        delta["set"] = changed
+    if removed:
+        delta["unset"] = removed
+    return delta
+
+
+def apply_delta(items: List[Dict], delta: Dict[str, List]) -> List[Dict]:
+    by_id = {item["id"]: item for item in items}
+    for item_id in delta.get("unset", ()):
+        by_id.pop(item_id, None)
+    for item in delta.get("set", ()):
+        by_id[item["id"]] = item
+    return sorted(by_id.values(), key=lambda item: item["id"])
+
+
+def build_event(user: str, seq: int, head: Dict, previous: List[Dict]) -> Dict:
+    """Document du journal : totaux et liste complète (image clé) ou delta"""
+    event = {"user": user, "seq": seq, **head}
+    items = event.pop("subscriptions")
+    delta = diff_subscriptions(previous, items)
+    # Image clé périodique, ou quand le delta ne serait pas plus court que la liste
+    if (seq - 1) % KEYFRAME_INTERVAL == 0 or len(delta.get("set", ())) + len(delta.get("unset", ())) >= len(items):
+        event["subscriptions"] = items
+    else:
+        event["delta"] = delta
+    return event
+
+
+def rollup_updates(event: Dict) -> List['UpdateOne']:
+    """Agrégats du mois et de l'année de l'instantané
+
+    Nombre, somme, min et max sont commutatifs ($inc, $min, $max). La
+    dernière valeur n'est remplacée que par un instantané plus récent
+    (horodatage, puis séquence) : l'ordre d'arrivée des écritures, ou la
+    reprise d'un historique daté, ne change pas le résultat.
+    """
+    from pymongo import UpdateOne
+
+    total = event["totalMonthly"]
+    last = {"seq": event["seq"], "timestamp": event["timestamp"], **{name: event[name] for name in _TOTALS}}
+    operations = []
+    for period, length in GRANULARITIES.items():
+        selector = {"user": event["user"], "period": period, "key": event["date"][:length]}
+        operations.append(UpdateOne(
+            selector,
+            {"$inc": {"snapshots": 1, "sumMonthly": total},
+             "$min": {"minMonthly": total},
+             "$max": {"maxMonthly": total}},
+            upsert=True
+        ))
+        operations.append(UpdateOne(
+            {**selector, "$or": [
+                {"last": {"$exists": False}},
+                {"last.timestamp": {"$lt": event["timestamp"]}},
+                {"last.timestamp": event["timestamp"], "last.seq": {"$lt": event["seq"]}},
+            ]},
+            {"$set": {"last": last}}
+        ))
+    return operations
+
+
+async def _advance_head(db, user: str, seq: int, head: Dict):
+    from pymongo.errors import DuplicateKeyError
+
+    try:
+        await db.spending_heads.update_one(
+            {"_id": user, "seq": {"$lt": seq}}, {"$set": {"seq": seq, **head}}, upsert=True
+        )
+    except DuplicateKeyError:
+        # Tête déjà plus avancée (ajout concurrent)
+        pass
+
+
+async def _catch_up(db, user: str, head: Optional[Dict]):
+    """Avancer la tête jusqu'à l'instantané qui occupe déjà la séquence suivante"""
+    seq = head["seq"] + 1 if head else 1
+    event = await db.spending_events.find_one({"user": user, "seq": seq}, {"_id": 0})
+    if event is None:
+        return
+    previous = head["subscriptions"] if head else []
+    items = event["subscriptions"] if "subscriptions" in event else apply_delta(previous, event["delta"])
+    await _advance_head(db, user, seq, {
+        "timestamp": event["timestamp"], "date": event["date"],
+        **{name: event[name] for name in _TOTALS}, "subscriptions": items,
+    })
+
+
+async def append_snapshot(db, user: str, snapshot: SpendingSnapshotCreate) -> Dict[str, Any]:
+    """Ajouter un instantané au journal et aux agrégats
+
+    Un instantané identique à la tête dans le même mois n'est pas ajouté
+    (``unchanged``) : le frontend en envoie un à chaque chargement de page.
+    Lève ValueError si l'horodatage est dans le futur.
+    """
+    from pymongo.errors import DuplicateKeyError
+
+    now = int(time.time() * 1000)
+    timestamp = snapshot.timestamp if snapshot.timestamp is not None else now
+    if timestamp > now + MAX_CLOCK_SKEW_MS:
+        raise ValueError("Horodatage dans le futur")
+    head = {
+        "timestamp": timestamp,
+        "date": snapshot.date or month_of(timestamp),
+        **{name: getattr(snapshot, name) for name in _TOTALS},
+        "subscriptions": sorted((item.model_dump() for item in snapshot.subscriptions), key=lambda item: item["id"]),
+    }
+
+    for _ in range(MAX_APPEND_ATTEMPTS):
+        current = await db.spending_heads.find_one({"_id": user})
+        if current is not None and all(current.get(name) == head[name] for name in ("date", *_TOTALS, "subscriptions")):
+            return {"seq": current["seq"], "date": current["date"], "unchanged": True}
+        seq = current["seq"] + 1 if current else 1
+        event = build_event(user, seq, head, current["subscriptions"] if current else [])
+        try:
+            await db.spending_events.insert_one(event)
+        except DuplicateKeyError:
+            await _catch_up(db, user, current)
+            continue
+        await _advance_head(db, user, seq, head)
+        await db.spending_rollups.bulk_write(rollup_updates(event), ordered=True)
+        return {"seq": seq, "date": head["date"], "unchanged": False}
+    raise SpendingConflict(f"Ajouts concurrents pour {user}")
+
+
+def format_point(row: Dict) -> Dict[str, Any]:
+    """Point du graphique (forme de SpendingSnapshot, sans la liste des abonnements)"""
+    last = row["last"]
+    return {
+        "id": f"{row['period']}-{row['key']}",
+        "date": row["key"],
+        "timestamp": last["timestamp"],
+        **{name: last[name] for name in _TOTALS},
+        "snapshots": row["snapshots"],
+        "averageMonthly": round(row["sumMonthly"] / row["snapshots"], 2),
+        "minMonthly": row["minMonthly"],
+        "maxMonthly": row["maxMonthly"],
+    }
+
+
+def compute_evolution(points: List[Dict]) -> Optional[Dict[str, Any]]:
+    """Variation entre les deux derniers points (getEvolution du frontend)"""
+    if len(points) < 2:
+        return None
+    previous, latest = points[-2]["totalMonthly"], points[-1]["totalMonthly"]
+    change = round(latest - previous, 2)
+    return {
+        "monthlyChange": change,
+        "percentageChange": round(change / previous * 100, 2) if previous else 0,
+        "direction": "up" if change > 0 else "down" if change < 0 else "stable",
+    }
+
+
+async def get_evolution(
+    db,
+    user: str,
+    granularity: str = "month",
+    limit: int = 6,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Les ``limit`` dernières périodes entre ``start`` et ``end`` (YYYY-MM inclus), lues dans les agrégats"""
+    length = GRANULARITIES[granularity]
+    query: Dict[str, Any] = {"user": user, "period": granularity}
+    if start or end:
+        query["key"] = {
+            **({"$gte": start[:length]} if start else {}),
+            **({"$lte": end[:length]} if end else {}),
+        }
+    rows = []
+    async for row in db.spending_rollups.find(query, _ROLLUP_PROJECTION).sort("key", -1).limit(limit):
+        # Agrégat créé par un ajout encore en cours (dernière valeur pas encore écrite)
+        if "last" in row:
+            rows.append(row)
+    points = [format_point(row) for row in reversed(rows)]
+    return {"granularity": granularity, "points": points, "evolution": compute_evolution(points)}
+
+
+async def get_snapshot(db, user: str, seq: int) -> Optional[Dict[str, Any]]:
+    """Instantané ``seq`` reconstruit depuis l'image clé précédente (au plus KEYFRAME_INTERVAL documents)"""
+    chain = []
+    async for event in db.spending_events.find(
+        {"user": user, "seq": {"$lte": seq}}, {"_id": 0, "user": 0}
+    ).sort("seq", -1).batch_size(KEYFRAME_INTERVAL):
+        if not chain and event["seq"] != seq:
+            return None
+        chain.append(event)
+        if "subscriptions" in event:
+            break
+    if not chain or "subscriptions" not in chain[-1]:
+        return None
+    items = chain[-1]["subscriptions"]
+    for event in reversed(chain[:-1]):
+        items = apply_delta(items, event["delta"])
+    snapshot = {name: chain[0][name] for name in ("seq", "timestamp", "date", *_TOTALS)}
+    return {"id": str(seq), **snapshot, "subscriptions": items}
+
+
+async def delete_history(db, user: str) -> int:
+    """Effacer tout l'historique d'un utilisateur ; renvoie le nombre d'instantanés supprimés"""
+    deleted = await db.spending_events.delete_many({"user": user})
+    await db.spending_rollups.delete_many({"user": user})
+    await db.spending_heads.delete_one({"_id": user})
+    return deleted.deleted_count
+
+
+async def rebuild_spending_rollups(db, user: str, batch_size: int = REBUILD_BATCH_SIZE) -> int:
+    """Recalculer les agrégats d'un utilisateur depuis le journal (réparation)
+
+    Les opérations partent par lots de ``batch_size`` : la mémoire ne dépend
+    pas de la longueur du journal.
+    """
+    from pymongo import UpdateOne
+
+    await db.spending_rollups.delete_many({"user": user})
+    operations: List[UpdateOne] = []
+    events = 0
+    async for event in db.spending_events.find({"user": user}, {"_id": 0}).sort("seq", 1):
+        operations += rollup_updates(event)
+        events += 1
+        if len(operations) >= batch_size:
+            await db.spending_rollups.bulk_write(operations, ordered=True)
+            operations = []
+    if operations:
+        await db.spending_rollups.bulk_write(operations, ordered=True)
+    logger.info(f"Agrégats de dépenses recalculés pour {user} ({events} instantanés)")
+    return events
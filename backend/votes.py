@@ -0,0 +1,148 @@
+"""Agrégation en mémoire (write-behind) des votes « Utile ».
+
+Les votes sont cumulés par avis puis écrits en un seul ``bulk_write`` de
+``$inc``, à intervalle régulier ou dès que le nombre d'avis en attente
+dépasse un seuil. Les lectures ajoutent les votes pas encore écrits.
+
+Après chaque écriture, ``on_flush`` reçoit les applications concernées :
+une lecture faite pendant l'écriture a pu compter deux fois les votes en
+cours (déjà dans MongoDB et encore en attente), sa réponse ne doit pas
+rester en cache.
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+VoteKey = Tuple[str, str]  # (appId, id de l'avis)
+
+
+class HelpfulVoteBuffer:
+    def __init__(
+        self,
+        collection_getter,
+        flush_interval: float = 0.5,
+        max_pending: int = 500,
+        on_flush: Optional[Callable[[Set[str]], None]] = None,
+    ):
+        # Accès paresseux à la collection : le client MongoDB peut changer (tests, reconnexion)
+        self._collection_getter = collection_getter
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.on_flush = on_flush
+        self._pending: Dict[VoteKey, int] = {}
+        self._in_flight: Dict[VoteKey, int] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+        # Métriques
+        self.flushes = 0
+        self.flush_errors = 0
+        self.votes_flushed = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    def add(self, app_id: str, review_id: str, count: int = 1):
+        key = (app_id, review_id)
+        self._pending[key] = self._pending.get(key, 0) + count
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+
+    def pending_for(self, app_id: str, review_id: str) -> int:
+        """Votes pas encore visibles dans MongoDB pour un avis"""
+        key = (app_id, review_id)
+        return self._pending.get(key, 0) + self._in_flight.get(key, 0)
+
+    def apply_pending(self, reviews: Iterable[Dict]) -> None:
+        """Ajouter les votes en attente aux documents lus depuis MongoDB"""
+        if not self._pending and not self._in_flight:
+            return
+        for review in reviews:
+            extra = self.pending_for(review.get("appId"), review.get("id"))
+            if extra:
+                review["helpful"] = review.get("helpful", 0) + extra
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def metrics(self) -> Dict:
+        return {
+            "queueDepth": self.queue_depth,
+            "pendingVotes": sum(self._pending.values()),
+            "flushes": self.flushes,
+            "flushErrors": self.flush_errors,
+            "votesFlushed": self.votes_flushed,
+            "lastFlushMs": round(self.last_flush_seconds * 1000, 3),
+            "maxFlushMs": round(self.max_flush_seconds * 1000, 3),
+        }
+
+    async def flush(self) -> int:
+        """Écrire les votes en attente ; en cas d'erreur ils sont remis en file"""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            # PyMongo n'est chargé qu'au premier vote écrit (démarrage à froid)
+            from pymongo import UpdateOne
+
+            self._in_flight, self._pending = self._pending, {}
+            operations = [
+                UpdateOne({"id": review_id, "appId": app_id}, {"$inc": {"helpful": count}})
+                for (app_id, review_id), count in self._in_flight.items()
+            ]
+            app_ids = {app_id for app_id, _ in self._in_flight}
+            start = time.perf_counter()
+            try:
+                await self._collection_getter().bulk_write(operations, ordered=False)
+            except BaseException as e:
+                # Remettre les votes en file (y compris si l'écriture est annulée)
+                for key, count in self._in_flight.items():
+                    self._pending[key] = self._pending.get(key, 0) + count
+                self._in_flight = {}
+                if not isinstance(e, Exception):
+                    raise
+                self.flush_errors += 1
+                logger.error(f"Erreur lors de l'écriture des votes utiles: {e}")
+                return 0
+            finally:
+                elapsed = time.perf_counter() - start
+                self.last_flush_seconds = elapsed
+                self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+                # Écriture partielle possible même en cas d'erreur : les lectures en cours sont périmées
+                if self.on_flush is not None:
+                    self.on_flush(app_ids)
+            flushed = sum(self._in_flight.values())
+            self._in_flight = {}
+            self.flushes += 1
+            self.votes_flushed += flushed
+            return flushed
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            # Primitives liées à la boucle du lifespan (une nouvelle boucle par démarrage en test)
+            self._flush_lock = asyncio.Lock()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """Arrêter la boucle et écrire les derniers votes (arrêt du serveur)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
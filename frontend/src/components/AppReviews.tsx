@@ -13,7 +13,14 @@ import {
   DialogTrigger,
 } from "@/components/ui/dialog";
 import { Avatar, AvatarFallback } from "@/components/ui/avatar";
-import { getReviews, createReview, incrementHelpful, type Review } from "@/lib/reviewsDb";
+import {
+  getReviewsPage,
+  getReviewSummary,
+  createReview,
+  incrementHelpful,
+  type Review,
+  type ReviewSummary,
+} from "@/lib/reviewsDb";
 
 interface AppReviewsProps {
   appId: string;
@@ -22,6 +29,9 @@ interface AppReviewsProps {
 
 const AppReviews = ({ appId, appName }: AppReviewsProps) => {
   const [reviews, setReviews] = useState<Review[]>([]);
+  const [summary, setSummary] = useState<ReviewSummary | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [isDialogOpen, setIsDialogOpen] = useState(false);
   const [userName, setUserName] = useState("");
   const [rating, setRating] = useState(0);
@@ -38,8 +48,13 @@ const AppReviews = ({ appId, appName }: AppReviewsProps) => {
   const loadReviews = async () => {
     setIsLoading(true);
     try {
-      const data = await getReviews(appId);
-      setReviews(data);
+      const [page, summaryData] = await Promise.all([
+        getReviewsPage(appId),
+        getReviewSummary(appId),
+      ]);
+      setReviews(page.reviews);
+      setNextCursor(page.nextCursor);
+      setSummary(summaryData);
     } catch (error) {
       console.error("Erreur:", error);
     } finally {
@@ -47,11 +62,24 @@ const AppReviews = ({ appId, appName }: AppReviewsProps) => {
     }
   };
 
-  // Calculer la moyenne des notes
-  const averageRating =
-    reviews.length > 0
-      ? reviews.reduce((sum, review) => sum + review.rating, 0) / reviews.length
-      : 0;
+  // Moyenne et nombre d'avis issus de l'agrégat (pas de parcours de la liste)
+  const reviewCount = summary?.count ?? 0;
+  const averageRating = summary?.average ?? 0;
+
+  // Charger la page d'avis suivante
+  const loadMoreReviews = async () => {
+    if (!nextCursor) return;
+    setIsLoadingMore(true);
+    try {
+      const page = await getReviewsPage(appId, nextCursor);
+      setReviews(prev => [...prev, ...page.reviews]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error("Erreur:", error);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
 
   // Soumettre un nouvel avis
   const handleSubmitReview = async () => {
@@ -67,6 +95,17 @@ const AppReviews = ({ appId, appName }: AppReviewsProps) => {
       
       // Ajouter le nouvel avis à la liste
       setReviews([newReview, ...reviews]);
+      setSummary(prev => {
+        const count = (prev?.count ?? 0) + 1;
+        const histogram = { ...(prev?.histogram ?? {}) };
+        histogram[String(rating)] = (histogram[String(rating)] ?? 0) + 1;
+        return {
+          appId,
+          count,
+          average: ((prev?.average ?? 0) * (count - 1) + rating) / count,
+          histogram,
+        };
+      });
 
       // Réinitialiser le formulaire
       setUserName("");
@@ -157,7 +196,7 @@ const AppReviews = ({ appId, appName }: AppReviewsProps) => {
               <Loader2 className="w-4 h-4 animate-spin" />
               <span>Chargement des avis...</span>
             </div>
-          ) : reviews.length > 0 ? (
+          ) : reviewCount > 0 ? (
             <div className="flex items-center gap-3">
               <div className="flex items-center gap-2">
                 {renderStars(Math.round(averageRating), false, "lg")}
@@ -167,7 +206,7 @@ const AppReviews = ({ appId, appName }: AppReviewsProps) => {
                   {averageRating.toFixed(1)}
                 </span>
                 <span className="text-sm ml-2">
-                  ({reviews.length} avis)
+                  ({reviewCount} avis)
                 </span>
               </div>
             </div>
@@ -320,6 +359,24 @@ const AppReviews = ({ appId, appName }: AppReviewsProps) => {
               ))}
             </AnimatePresence>
 
+            {nextCursor && (
+              <Button
+                variant="outline"
+                onClick={loadMoreReviews}
+                disabled={isLoadingMore}
+                className="w-full glass border-white/10"
+              >
+                {isLoadingMore ? (
+                  <>
+                    <Loader2 className="w-4 h-4 mr-2 animate-spin" />
+                    Chargement...
+                  </>
+                ) : (
+                  "Voir plus d'avis"
+                )}
+              </Button>
+            )}
+
             {reviews.length === 0 && (
               <div className="text-center py-12 glass rounded-xl">
                 <MessageSquare className="w-16 h-16 mx-auto mb-4 text-foreground/20" />
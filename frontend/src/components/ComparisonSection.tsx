@@ -35,6 +35,11 @@ import {
   DialogTitle,
 } from "./ui/dialog";
 
+const BACKEND_URL = import.meta.env.VITE_BACKEND_URL || import.meta.env.REACT_APP_BACKEND_URL || '';
+
+// Casse et accents ignorés, comme l'index de recherche du backend
+const foldText = (text: string) => text.normalize('NFD').replace(/[\u0300-\u036f]/g, '').toLowerCase();
+
 const ComparisonSection = () => {
   const [duration, setDuration] = useState<DurationOption>(durationOptions[2]); // default 5 ans
   const [selectedPlans, setSelectedPlans] = useLocalStorage<Record<string, number>>('selected-plans', {});
@@ -122,6 +127,22 @@ const ComparisonSection = () => {
     });
   }, [toast]);
 
+  // Recherche du backend (noms, catégories, fonctionnalités, descriptions FR/EN, fautes de frappe)
+  const [searchMatches, setSearchMatches] = useState<Set<string> | null>(null);
+  useEffect(() => {
+    setSearchMatches(null);
+    const query = searchQuery.trim();
+    if (!BACKEND_URL || !query) return;
+    const controller = new AbortController();
+    fetch(`${BACKEND_URL}/api/search?q=${encodeURIComponent(query)}&limit=500`, { signal: controller.signal })
+      .then(response => (response.ok ? response.json() : null))
+      .then(data => {
+        if (data) setSearchMatches(new Set(data.items.map((item: { id: string }) => item.id)));
+      })
+      .catch(() => {});
+    return () => controller.abort();
+  }, [searchQuery]);
+
   // Extraire toutes les catégories uniques
   const categories = useMemo(() => {
     const cats = new Set(subscriptions.map(sub => sub.category));
@@ -130,8 +151,10 @@ const ComparisonSection = () => {
 
   // Filtrer les abonnements
   const filteredSubscriptions = useMemo(() => {
+    const foldedQuery = foldText(searchQuery);
     let filtered = subscriptions.filter(sub => {
-      const matchesSearch = sub.name.toLowerCase().includes(searchQuery.toLowerCase());
+      // Sans réponse du backend : sous-chaîne du nom
+      const matchesSearch = searchMatches ? searchMatches.has(sub.id) : foldText(sub.name).includes(foldedQuery);
       const matchesCategory = selectedCategory === "all" || sub.category === selectedCategory;
       const matchesFavorites = !showFavoritesOnly || isFavorite(sub.id);
       
@@ -167,7 +190,7 @@ const ComparisonSection = () => {
     });
 
     return filtered;
-  }, [searchQuery, selectedCategory, showFavoritesOnly, isFavorite, sortOption, selectedPlans, priceRange]);
+  }, [searchQuery, searchMatches, selectedCategory, showFavoritesOnly, isFavorite, sortOption, selectedPlans, priceRange]);
 
   const isPriceFilterActive = priceRange[0] !== 0 || priceRange[1] !== 100;
 
@@ -2,6 +2,7 @@ import { motion } from "framer-motion";
 import { Search, Filter } from "lucide-react";
 import { useState, forwardRef } from "react";
 import { useLanguage } from "@/contexts/LanguageContext";
+import categoryTranslationsData from "@/data/categoryTranslations.json";
 
 interface FilterBarProps {
   searchQuery: string;
@@ -11,25 +12,8 @@ interface FilterBarProps {
   categories: string[];
 }
 
-const categoryTranslations: Record<string, { fr: string; en: string }> = {
-  'Streaming vidéo': { fr: 'Streaming vidéo', en: 'Video streaming' },
-  'Musique': { fr: 'Musique', en: 'Music' },
-  'Multi-services': { fr: 'Multi-services', en: 'Multi-services' },
-  'Jeux vidéo': { fr: 'Jeux vidéo', en: 'Video games' },
-  'Productivité': { fr: 'Productivité', en: 'Productivity' },
-  'Stockage': { fr: 'Stockage', en: 'Storage' },
-  'Communication': { fr: 'Communication', en: 'Communication' },
-  'Éducation': { fr: 'Éducation', en: 'Education' },
-  'Livres audio': { fr: 'Livres audio', en: 'Audiobooks' },
-  'Livres': { fr: 'Livres', en: 'Books' },
-  'Bien-être': { fr: 'Bien-être', en: 'Wellness' },
-  'Sport': { fr: 'Sport', en: 'Sport' },
-  'Actualités': { fr: 'Actualités', en: 'News' },
-  'Marketing': { fr: 'Marketing', en: 'Marketing' },
-  'Presse': { fr: 'Presse', en: 'Press' },
-  'Fitness': { fr: 'Fitness', en: 'Fitness' },
-  'Méditation': { fr: 'Méditation', en: 'Meditation' },
-};
+// Traductions des catégories (partagées avec l'index de recherche du backend)
+const categoryTranslations: Record<string, { fr: string; en: string }> = categoryTranslationsData;
 
 const FilterBar = forwardRef<HTMLInputElement, FilterBarProps>(({ 
   searchQuery, 
@@ -1,9 +1,11 @@
-import { useState } from "react";
+import { useEffect, useState } from "react";
 import { motion, AnimatePresence } from "framer-motion";
 import { Tag, Copy, Check, Clock, Gift } from "lucide-react";
 import { useLanguage } from "@/contexts/LanguageContext";
 import { promoCodes, type PromoCode } from "@/data/promoCodes";
 
+const BACKEND_URL = import.meta.env.VITE_BACKEND_URL || import.meta.env.REACT_APP_BACKEND_URL || '';
+
 interface PromoCodesProps {
   subscriptionId: string;
   subscriptionName: string;
@@ -12,12 +14,29 @@ interface PromoCodesProps {
 const PromoCodes = ({ subscriptionId, subscriptionName }: PromoCodesProps) => {
   const { language } = useLanguage();
   const [copiedCode, setCopiedCode] = useState<string | null>(null);
+  const [backendCodes, setBackendCodes] = useState<PromoCode[] | null>(null);
+
+  // Le backend ne renvoie que les codes en cours de validité
+  useEffect(() => {
+    setBackendCodes(null);
+    if (!BACKEND_URL) return;
+    let cancelled = false;
+    fetch(`${BACKEND_URL}/api/promo-codes/${subscriptionId}`)
+      .then(response => (response.ok ? response.json() : null))
+      .then(data => {
+        if (!cancelled && data) setBackendCodes(data);
+      })
+      .catch(() => {});
+    return () => {
+      cancelled = true;
+    };
+  }, [subscriptionId]);
 
-  // Récupérer les codes promo pour cet abonnement
+  // Sans backend : récupérer les codes promo pour cet abonnement
   const codes: PromoCode[] = promoCodes[subscriptionId] || [];
   
   // Filtrer les codes actifs et non expirés
-  const activeCodes = codes.filter(code => {
+  const activeCodes = backendCodes ?? codes.filter(code => {
     if (!code.isActive) return false;
     const expiryDate = new Date(code.expiresAt);
     return expiryDate > new Date();
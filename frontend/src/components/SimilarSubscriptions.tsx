@@ -1,3 +1,4 @@
+import { useEffect, useState } from "react";
 import { motion } from "framer-motion";
 import { Link } from "react-router-dom";
 import { subscriptions, formatPrice, type Subscription } from "@/data/subscriptions";
@@ -9,10 +10,29 @@ interface SimilarSubscriptionsProps {
   category: string;
 }
 
+const BACKEND_URL = import.meta.env.VITE_BACKEND_URL || import.meta.env.REACT_APP_BACKEND_URL || '';
+
 const SimilarSubscriptions = ({ currentId, category }: SimilarSubscriptionsProps) => {
   const { language } = useLanguage();
+  const [backendSimilar, setBackendSimilar] = useState<Subscription[] | null>(null);
+
+  // Voisins précalculés par le backend (catégorie, prix, fonctionnalités)
+  useEffect(() => {
+    setBackendSimilar(null);
+    if (!BACKEND_URL) return;
+    let cancelled = false;
+    fetch(`${BACKEND_URL}/api/subscriptions/${currentId}/similar?limit=6`)
+      .then(response => (response.ok ? response.json() : null))
+      .then(data => {
+        if (!cancelled && data) setBackendSimilar(data);
+      })
+      .catch(() => {});
+    return () => {
+      cancelled = true;
+    };
+  }, [currentId]);
 
-  // Trouver des abonnements similaires (même catégorie, exclure l'actuel)
+  // Sans backend : trouver des abonnements similaires (même catégorie, exclure l'actuel)
   const similarSubs = subscriptions
     .filter(s => s.category === category && s.id !== currentId)
     .slice(0, 4);
@@ -23,7 +43,7 @@ const SimilarSubscriptions = ({ currentId, category }: SimilarSubscriptionsProps
     .filter(s => s.id !== currentId)
     .slice(0, 2);
 
-  const allSimilar = [...similarSubs, ...popularOthers].slice(0, 6);
+  const allSimilar = backendSimilar ?? [...similarSubs, ...popularOthers].slice(0, 6);
 
   if (allSimilar.length === 0) return null;
 
@@ -8,6 +8,7 @@ export interface Subscription {
   plans: Plan[];
   category: string;
   description?: string;
+  descriptionEn?: string;
   features?: string[];
   pros?: string[];
   cons?: string[];
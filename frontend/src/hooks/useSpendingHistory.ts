@@ -1,6 +1,16 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 
 const SPENDING_HISTORY_KEY = 'subscription-spending-history';
+// Identifiant anonyme de l'historique côté serveur et son secret, délivrés par POST /api/spending
+const SPENDING_USER_KEY = 'spending-history-credentials';
+// Signalé après chaque écriture : les autres instances du hook relisent l'historique
+const SPENDING_UPDATED_EVENT = 'spending-history-updated';
+// Sans backend : un instantané par mois, les plus anciens sont oubliés
+const MAX_LOCAL_SNAPSHOTS = 24;
+// Mois lus dans les agrégats du backend
+const HISTORY_MONTHS = 12;
+
+const BACKEND_URL = import.meta.env.VITE_BACKEND_URL || import.meta.env.REACT_APP_BACKEND_URL || '';
 
 export interface SpendingSnapshot {
   id: string;
@@ -9,35 +19,185 @@ export interface SpendingSnapshot {
   totalMonthly: number;
   totalYearly: number;
   subscriptionCount: number;
-  subscriptions: Array<{
+  // Absente des points servis par le backend (agrégats mensuels)
+  subscriptions?: Array<{
     id: string;
     name: string;
     monthlyPrice: number;
   }>;
 }
 
-export const useSpendingHistory = () => {
-  const [spendingHistory, setSpendingHistory] = useState<SpendingSnapshot[]>(() => {
-    if (typeof window === 'undefined') return [];
+export interface SpendingEvolution {
+  monthlyChange: number;
+  percentageChange: number;
+  direction: 'up' | 'down' | 'stable';
+}
+
+const currentMonth = () => {
+  const now = new Date();
+  return `${now.getFullYear()}-${String(now.getMonth() + 1).padStart(2, '0')}`;
+};
+
+interface SpendingCredentials {
+  user: string;
+  secret: string;
+}
+
+const readCredentials = (): SpendingCredentials | null => {
+  try {
+    const saved = JSON.parse(localStorage.getItem(SPENDING_USER_KEY) || 'null');
+    return saved && typeof saved.user === 'string' && typeof saved.secret === 'string' ? saved : null;
+  } catch {
+    return null;
+  }
+};
+
+// Délivrance partagée par toutes les instances du hook
+let issuing: Promise<SpendingCredentials> | null = null;
+
+const getCredentials = () => {
+  const saved = readCredentials();
+  if (saved) return Promise.resolve(saved);
+  if (!issuing) {
+    issuing = fetch(`${BACKEND_URL}/api/spending`, { method: 'POST' })
+      .then(async (response) => {
+        if (!response.ok) throw new Error(`Identifiant d'historique refusé (${response.status})`);
+        const credentials: SpendingCredentials = await response.json();
+        localStorage.setItem(SPENDING_USER_KEY, JSON.stringify(credentials));
+        return credentials;
+      })
+      .finally(() => {
+        issuing = null;
+      });
+  }
+  return issuing;
+};
+
+// Requête authentifiée par le secret ; 401 : identifiant inconnu du serveur, un nouveau sera délivré
+const spendingFetch = async (path: string, init: RequestInit = {}) => {
+  const { user, secret } = await getCredentials();
+  const response = await fetch(`${BACKEND_URL}/api/spending/${user}${path}`, {
+    ...init,
+    headers: { ...(init.headers as Record<string, string>), 'X-Spending-Secret': secret }
+  });
+  if (response.status === 401) localStorage.removeItem(SPENDING_USER_KEY);
+  return response;
+};
+
+const readLocalHistory = (): SpendingSnapshot[] => {
+  try {
     const saved = localStorage.getItem(SPENDING_HISTORY_KEY);
     return saved ? JSON.parse(saved) : [];
+  } catch {
+    return [];
+  }
+};
+
+const computeEvolution = (history: SpendingSnapshot[]): SpendingEvolution | null => {
+  if (history.length < 2) return null;
+
+  const latest = history[history.length - 1];
+  const previous = history[history.length - 2];
+
+  const monthlyChange = latest.totalMonthly - previous.totalMonthly;
+  const percentageChange = previous.totalMonthly ? (monthlyChange / previous.totalMonthly) * 100 : 0;
+
+  return {
+    monthlyChange,
+    percentageChange,
+    direction: monthlyChange > 0 ? 'up' : monthlyChange < 0 ? 'down' : 'stable'
+  };
+};
+
+const postSnapshot = (snapshot: Omit<SpendingSnapshot, 'id' | 'timestamp'> & { id?: string; timestamp?: number }) =>
+  spendingFetch('/snapshots', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(snapshot)
   });
 
+// Reprise de l'ancien historique local, une seule fois pour toutes les instances du hook
+let migration: Promise<void> | null = null;
+
+const migrateLocalHistory = () => {
+  if (migration) return migration;
+  migration = (async () => {
+    const legacy = readLocalHistory();
+    if (legacy.length === 0) return;
+    const pending = [...legacy].sort((a, b) => a.timestamp - b.timestamp);
+    while (pending.length > 0) {
+      const { subscriptions = [], ...snapshot } = pending[0];
+      const response = await postSnapshot({ ...snapshot, subscriptions });
+      // Serveur indisponible ou ajouts limités : la suite est reprise au prochain chargement
+      if (response.status >= 500 || response.status === 401 || response.status === 429) {
+        migration = null;
+        return;
+      }
+      pending.shift();
+      localStorage.setItem(SPENDING_HISTORY_KEY, JSON.stringify(pending));
+    }
+    localStorage.removeItem(SPENDING_HISTORY_KEY);
+  })().catch((error) => {
+    migration = null;
+    console.error('Erreur lors de la reprise de l\'historique des dépenses:', error);
+  });
+  return migration;
+};
+
+export const useSpendingHistory = () => {
+  const [spendingHistory, setSpendingHistory] = useState<SpendingSnapshot[]>(() => {
+    if (typeof window === 'undefined' || BACKEND_URL) return [];
+    return readLocalHistory();
+  });
+  const [serverEvolution, setServerEvolution] = useState<SpendingEvolution | null>(null);
+  // Dernier instantané envoyé : la page en renvoie un identique à chaque rendu
+  const lastSaved = useRef<string | null>(null);
+
+  const refresh = useCallback(async () => {
+    if (!BACKEND_URL) return;
+    try {
+      const response = await spendingFetch(`/evolution?limit=${HISTORY_MONTHS}`);
+      if (!response.ok) return;
+      const data = await response.json();
+      setSpendingHistory(data.points);
+      setServerEvolution(data.evolution);
+    } catch (error) {
+      console.error('Erreur lors du chargement de l\'historique des dépenses:', error);
+    }
+  }, []);
+
   useEffect(() => {
+    if (!BACKEND_URL) return;
+    migrateLocalHistory().then(refresh);
+    window.addEventListener(SPENDING_UPDATED_EVENT, refresh);
+    return () => window.removeEventListener(SPENDING_UPDATED_EVENT, refresh);
+  }, [refresh]);
+
+  useEffect(() => {
+    if (BACKEND_URL) return;
     localStorage.setItem(SPENDING_HISTORY_KEY, JSON.stringify(spendingHistory));
   }, [spendingHistory]);
 
-  const saveSnapshot = (
+  const saveSnapshot = useCallback((
     totalMonthly: number,
     totalYearly: number,
     subscriptionCount: number,
     subscriptions: Array<{ id: string; name: string; monthlyPrice: number }>
   ) => {
-    const now = new Date();
-    const date = `${now.getFullYear()}-${String(now.getMonth() + 1).padStart(2, '0')}`;
+    const date = currentMonth();
+    const key = JSON.stringify([date, totalMonthly, totalYearly, subscriptionCount, subscriptions]);
+    if (key === lastSaved.current) return;
+    lastSaved.current = key;
 
-    // Check if snapshot for current month already exists
-    const existingIndex = spendingHistory.findIndex(s => s.date === date);
+    if (BACKEND_URL) {
+      // Le serveur ajoute l'instantané au journal et met à jour les agrégats du mois et de l'année
+      postSnapshot({ date, totalMonthly, totalYearly, subscriptionCount, subscriptions })
+        .then((response) => {
+          if (response.ok) window.dispatchEvent(new Event(SPENDING_UPDATED_EVENT));
+        })
+        .catch((error) => console.error('Erreur lors de l\'enregistrement des dépenses:', error));
+      return;
+    }
 
     const snapshot: SpendingSnapshot = {
       id: Date.now().toString(),
@@ -48,42 +208,26 @@ export const useSpendingHistory = () => {
       subscriptionCount,
       subscriptions
     };
-
-    if (existingIndex >= 0) {
-      // Update existing snapshot
-      setSpendingHistory(prev => {
-        const updated = [...prev];
-        updated[existingIndex] = snapshot;
-        return updated;
-      });
-    } else {
-      // Add new snapshot
-      setSpendingHistory(prev => [...prev, snapshot]);
-    }
-  };
+    // Un instantané par mois : celui du mois en cours est remplacé
+    setSpendingHistory(prev => [...prev.filter(s => s.date !== date), snapshot].slice(-MAX_LOCAL_SNAPSHOTS));
+  }, []);
 
   const getLastMonths = (months: number = 6) => {
     return spendingHistory.slice(-months);
   };
 
   const getEvolution = () => {
-    if (spendingHistory.length < 2) return null;
-
-    const latest = spendingHistory[spendingHistory.length - 1];
-    const previous = spendingHistory[spendingHistory.length - 2];
-
-    const monthlyChange = latest.totalMonthly - previous.totalMonthly;
-    const percentageChange = (monthlyChange / previous.totalMonthly) * 100;
-
-    return {
-      monthlyChange,
-      percentageChange,
-      direction: monthlyChange > 0 ? 'up' : monthlyChange < 0 ? 'down' : 'stable'
-    };
+    return BACKEND_URL ? serverEvolution : computeEvolution(spendingHistory);
   };
 
   const clearHistory = () => {
+    lastSaved.current = null;
     setSpendingHistory([]);
+    setServerEvolution(null);
+    if (BACKEND_URL) {
+      spendingFetch('', { method: 'DELETE' })
+        .catch((error) => console.error('Erreur lors de la suppression de l\'historique:', error));
+    }
   };
 
   return {
@@ -1,5 +1,7 @@
 import { subscriptions, type DurationOption, calculateTotalCost, formatPrice } from "@/data/subscriptions";
 
+const BACKEND_URL = import.meta.env.VITE_BACKEND_URL || import.meta.env.REACT_APP_BACKEND_URL || '';
+
 export interface ExportData {
   subscriptionId: string;
   subscriptionName: string;
@@ -13,6 +15,14 @@ export const exportToCSV = (
   selectedPlans: Record<string, number>,
   duration: DurationOption
 ) => {
+  // Avec le backend, le navigateur télécharge directement le flux de /api/export
+  if (BACKEND_URL) {
+    const plans = Object.entries(selectedPlans).map(([subId, planIndex]) => `${subId}:${planIndex}`).join(',');
+    const params = new URLSearchParams({ format: 'csv', plans, months: String(duration.months) });
+    downloadUrl(`${BACKEND_URL}/api/export?${params}`, `mes-abonnements-${duration.label}.csv`);
+    return;
+  }
+
   const data: ExportData[] = [];
 
   Object.entries(selectedPlans).forEach(([subId, planIndex]) => {
@@ -53,13 +63,16 @@ export const exportToCSV = (
 
   // Télécharger
   const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
+  downloadUrl(URL.createObjectURL(blob), `mes-abonnements-${duration.label}.csv`);
+};
+
+const downloadUrl = (url: string, filename: string) => {
   const link = document.createElement('a');
-  const url = URL.createObjectURL(blob);
-  
+
   link.setAttribute('href', url);
-  link.setAttribute('download', `mes-abonnements-${duration.label}.csv`);
+  link.setAttribute('download', filename);
   link.style.visibility = 'hidden';
-  
+
   document.body.appendChild(link);
   link.click();
   document.body.removeChild(link);
@@ -8,10 +8,18 @@ export interface Review {
   rating: number;
   comment: string;
   date: string;
+  createdAt?: string;
   helpful: number;
   userInitials: string;
 }
 
+export interface ReviewSummary {
+  appId: string;
+  count: number;
+  average: number;
+  histogram: Record<string, number>;
+}
+
 // Vérifier si le backend est disponible
 const isBackendAvailable = async (): Promise<boolean> => {
   if (!BACKEND_URL) return false;
@@ -33,23 +41,83 @@ const saveLocalReviews = (appId: string, reviews: Review[]): void => {
   localStorage.setItem(`reviews_${appId}`, JSON.stringify(reviews));
 };
 
-// Récupérer tous les avis pour une app
-export async function getReviews(appId: string): Promise<Review[]> {
+export interface ReviewsPage {
+  reviews: Review[];
+  nextCursor: string | null;
+}
+
+// Récupérer une page d'avis pour une app (du plus récent au plus ancien)
+export async function getReviewsPage(appId: string, cursor?: string | null): Promise<ReviewsPage> {
   // D'abord essayer le backend
   if (BACKEND_URL) {
     try {
-      const response = await fetch(`${BACKEND_URL}/api/reviews/${appId}`);
+      const params = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+      const response = await fetch(`${BACKEND_URL}/api/reviews/${appId}${params}`);
       if (response.ok) {
         const reviews = await response.json();
-        return reviews;
+        return { reviews, nextCursor: response.headers.get('X-Next-Cursor') };
       }
     } catch (error) {
       console.warn('Backend non disponible, utilisation du localStorage');
     }
   }
-  
-  // Fallback sur localStorage
-  return getLocalReviews(appId);
+
+  // Fallback sur localStorage (tout est déjà en mémoire)
+  return { reviews: cursor ? [] : getLocalReviews(appId), nextCursor: null };
+}
+
+// Récupérer la première page d'avis pour une app
+export async function getReviews(appId: string): Promise<Review[]> {
+  const { reviews } = await getReviewsPage(appId);
+  return reviews;
+}
+
+// Résumé calculé à partir d'une liste d'avis (mode localStorage)
+const summarize = (appId: string, reviews: Review[]): ReviewSummary => {
+  const histogram: Record<string, number> = { '1': 0, '2': 0, '3': 0, '4': 0, '5': 0 };
+  reviews.forEach(review => {
+    histogram[String(review.rating)] = (histogram[String(review.rating)] ?? 0) + 1;
+  });
+  const sum = reviews.reduce((total, review) => total + review.rating, 0);
+  return {
+    appId,
+    count: reviews.length,
+    average: reviews.length > 0 ? sum / reviews.length : 0,
+    histogram,
+  };
+};
+
+// Récupérer le résumé des avis (nombre, moyenne, histogramme) d'une app
+export async function getReviewSummary(appId: string): Promise<ReviewSummary> {
+  if (BACKEND_URL) {
+    try {
+      const response = await fetch(`${BACKEND_URL}/api/reviews/${appId}/summary`);
+      if (response.ok) {
+        return await response.json();
+      }
+    } catch (error) {
+      console.warn('Backend non disponible, utilisation du localStorage');
+    }
+  }
+
+  return summarize(appId, getLocalReviews(appId));
+}
+
+// Récupérer les résumés de plusieurs apps en un seul appel (grille)
+export async function getReviewSummaries(appIds: string[]): Promise<ReviewSummary[]> {
+  if (BACKEND_URL && appIds.length > 0) {
+    try {
+      const ids = encodeURIComponent(appIds.join(','));
+      const response = await fetch(`${BACKEND_URL}/api/reviews/summary?ids=${ids}`);
+      if (response.ok) {
+        return await response.json();
+      }
+    } catch (error) {
+      console.warn('Backend non disponible, utilisation du localStorage');
+    }
+  }
+
+  return appIds.map(appId => summarize(appId, getLocalReviews(appId)));
 }
 
 // Créer un nouvel avis
@@ -83,6 +151,8 @@ export async function createReview(
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          // Une nouvelle tentative du même avis ne crée pas de doublon
+          'Idempotency-Key': newReview.id,
         },
         body: JSON.stringify({
           appId,
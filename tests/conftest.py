@@ -0,0 +1,51 @@
+"""Configuration commune : le backend s'importe comme depuis backend/ (uvicorn server:app).
+
+Les tests tournent sur mongomock-motor : ``db`` est une base vide par test,
+``client`` un TestClient de l'application (lifespan compris) branché sur
+une base vide.
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Avant l'import de server : pas de surveillance du catalogue, d'index ni d'archive au démarrage
+os.environ.setdefault('DB_NAME', 'tests')
+os.environ['CATALOG_WATCH_INTERVAL'] = '0'
+os.environ['CATALOG_WARM_ON_STARTUP'] = '0'
+os.environ['ARCHIVE_WARM_ON_STARTUP'] = '0'
+
+ADMIN_TOKEN = 'jeton-de-test'
+
+
+@pytest.fixture
+def db():
+    from mongomock_motor import AsyncMongoMockClient
+
+    return AsyncMongoMockClient()['tests']
+
+
+@pytest.fixture
+def admin_headers():
+    return {'X-Admin-Token': ADMIN_TOKEN}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from fastapi.testclient import TestClient
+    from mongomock_motor import AsyncMongoMockClient
+
+    import server
+    from ratelimit import MemoryBucketStore
+
+    server.mongo.use(AsyncMongoMockClient())
+    server.response_cache.clear()
+    monkeypatch.setattr(server.review_limiter, 'store', MemoryBucketStore())
+    monkeypatch.setattr(server.spending_limiter, 'store', MemoryBucketStore())
+    monkeypatch.setattr(server, 'ADMIN_TOKEN', ADMIN_TOKEN)
+    with TestClient(server.app) as test_client:
+        yield test_client
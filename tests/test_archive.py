@@ -0,0 +1,167 @@
+import asyncio
+import io
+import os
+import zipfile
+from pathlib import Path
+
+from archive import ArchiveCache, stream_project_zip
+
+
+def names(archive):
+    with zipfile.ZipFile(archive.path) as zip_file:
+        return sorted(zip_file.namelist())
+
+
+def test_streamed_zip_is_valid_and_chunked(tmp_path):
+    root = tmp_path / 'projet'
+    (root / 'src').mkdir(parents=True)
+    (root / 'node_modules' / 'dep').mkdir(parents=True)
+    (root / 'node_modules' / 'dep' / 'index.js').write_text('ignoré')
+    (root / 'README.md').write_text('# Projet\n' * 1000)
+    # Données incompressibles : la taille compressée suit la taille lue
+    payload = os.urandom(1024 * 1024)
+    (root / 'src' / 'data.bin').write_bytes(payload)
+    (root / 'vide.txt').write_bytes(b'')
+    # Lien cassé : stat échoue, le fichier est ignoré sans entrée tronquée
+    os.symlink(root / 'absent', root / 'casse.txt')
+
+    chunk_size = 16 * 1024
+    chunks = list(stream_project_zip(root, chunk_size=chunk_size))
+    assert len(chunks) > len(payload) // (2 * chunk_size)
+    # Au plus un bloc lu en attente dans le tampon, plus la sortie d'une écriture
+    assert max(len(chunk) for chunk in chunks) < 2 * chunk_size + 1024
+
+    with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as zip_file:
+        assert zip_file.testzip() is None
+        assert zip_file.namelist() == ['README.md', 'vide.txt', 'src/data.bin']
+        assert zip_file.read('src/data.bin') == payload
+        assert zip_file.read('README.md') == b'# Projet\n' * 1000
+
+
+def test_stale_archive_served_while_rebuilding(tmp_path):
+    root = tmp_path / 'projet'
+    root.mkdir()
+    (root / 'a.txt').write_text('a')
+    cache = ArchiveCache(root, tmp_path / 'cache', manifest_ttl=0)
+
+    async def scenario():
+        first = await cache.get()
+        (root / 'b.txt').write_text('b')
+        # La reconstruction part en arrière-plan, l'archive précédente est servie
+        stale = await cache.get()
+        assert stale == first
+        await asyncio.gather(*cache._builds.values())
+        return first, await cache.get()
+
+    first, fresh = asyncio.run(scenario())
+    assert names(first) == ['a.txt']
+    assert names(fresh) == ['a.txt', 'b.txt']
+    assert fresh.digest != first.digest
+
+
+def test_superseded_build_does_not_replace_current(tmp_path):
+    root = tmp_path / 'projet'
+    root.mkdir()
+    (root / 'a.txt').write_text('a')
+    cache = ArchiveCache(root, tmp_path / 'cache', manifest_ttl=0)
+
+    async def scenario():
+        latest = await cache.get()
+        # Construction d'une empreinte dépassée qui se termine après la plus récente
+        outdated = await cache._build('0' * 64)
+        return latest, outdated
+
+    latest, outdated = asyncio.run(scenario())
+    assert cache._current == latest
+    assert latest.path.exists()
+    assert outdated.path.exists()
+
+
+def test_prune_keeps_previous_archive_one_round(tmp_path):
+    root = tmp_path / 'projet'
+    root.mkdir()
+    cache = ArchiveCache(root, tmp_path / 'cache', manifest_ttl=0)
+
+    async def build(content):
+        (root / 'f.txt').write_text(content)
+        archive = await cache.get()
+        if cache._builds:
+            await asyncio.gather(*cache._builds.values())
+            archive = await cache.get()
+        return archive
+
+    async def scenario():
+        return [await build(content) for content in ('1', '22', '333')]
+
+    first, second, third = asyncio.run(scenario())
+    assert not first.path.exists()
+    assert second.path.exists() and third.path.exists()
+    with open(third.path, 'rb') as f:
+        assert zipfile.ZipFile(io.BytesIO(f.read())).read('f.txt') == b'333'
+
+
+def test_unreadable_file_leaves_no_entry(tmp_path, monkeypatch):
+    import archive
+
+    root = tmp_path / 'projet'
+    root.mkdir()
+    (root / 'a.txt').write_text('a')
+    (root / 'secret.txt').write_text('s')
+
+    def open_or_deny(path, *args, **kwargs):
+        if Path(path).name == 'secret.txt':
+            raise PermissionError(path)
+        return open(path, *args, **kwargs)
+
+    # Le stat réussit, l'ouverture échoue : aucune entrée n'a encore été créée
+    monkeypatch.setattr(archive, 'open', open_or_deny, raising=False)
+    data = b''.join(stream_project_zip(root))
+    with zipfile.ZipFile(io.BytesIO(data)) as zip_file:
+        assert zip_file.testzip() is None
+        assert zip_file.namelist() == ['a.txt']
+
+
+def test_open_falls_back_to_current_archive_after_prune(tmp_path):
+    root = tmp_path / 'projet'
+    root.mkdir()
+    (root / 'f.txt').write_text('1')
+    cache = ArchiveCache(root, tmp_path / 'cache', manifest_ttl=0)
+
+    async def scenario():
+        first = await cache.get()
+        (root / 'f.txt').write_text('22')
+        await cache.get()
+        await asyncio.gather(*cache._builds.values())
+        # get() a rendu ``first`` juste avant qu'un élagage ne le supprime
+        first.path.unlink()
+        get = cache.get
+        answers = iter([first])
+
+        async def racing_get():
+            return next(answers, None) or await get()
+
+        cache.get = racing_get
+        return first, await cache.open()
+
+    first, (archive, file_obj) = asyncio.run(scenario())
+    assert archive != first and archive == cache._current
+    with file_obj:
+        assert zipfile.ZipFile(io.BytesIO(file_obj.read())).read('f.txt') == b'22'
+
+
+def test_download_route_serves_ranges_from_the_cache(client, tmp_path, monkeypatch):
+    import server
+
+    root = tmp_path / 'projet'
+    root.mkdir()
+    (root / 'f.txt').write_text('contenu')
+    monkeypatch.setattr(server, 'archive_cache', ArchiveCache(root, tmp_path / 'cache'))
+
+    full = client.get('/api/download-project')
+    assert full.status_code == 200
+    assert zipfile.ZipFile(io.BytesIO(full.content)).read('f.txt') == b'contenu'
+    etag = full.headers['etag']
+    assert client.get('/api/download-project', headers={'If-None-Match': etag}).status_code == 304
+    partial = client.get('/api/download-project', headers={'Range': 'bytes=10-', 'If-Range': etag})
+    assert partial.status_code == 206 and partial.content == full.content[10:]
+    assert client.get('/api/download-project', headers={'Range': f'bytes={len(full.content)}-'}).status_code == 416
@@ -0,0 +1,61 @@
+import time
+
+from cache import CachedResponse, ResponseCache, weak_etag
+
+
+def entry(body=b'{}', tags=('reviews',), ttl=30.0):
+    return CachedResponse(body, weak_etag(body), {}, frozenset(tags), time.monotonic() + ttl)
+
+
+def test_lru_eviction_by_count_and_bytes():
+    cache = ResponseCache(max_entries=2, max_bytes=10)
+    cache.put('a', entry(b'aaaa'))
+    cache.put('b', entry(b'bbbb'))
+    cache.get('a')
+    cache.put('c', entry(b'cccc'))
+    # b est le moins récemment lu
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    cache.put('d', entry(b'dddddddd'))
+    assert cache.size <= 10
+    assert cache.evictions == 3
+    cache.put('trop-gros', entry(b'x' * 11))
+    assert cache.get('trop-gros') is None
+
+
+def test_expired_entries_are_misses():
+    cache = ResponseCache()
+    cache.put('a', entry(ttl=-1))
+    assert cache.get('a') is None
+    assert cache.expirations == 1
+
+
+def test_invalidation_by_tag_and_generation():
+    cache = ResponseCache()
+    cache.put('netflix', entry(tags=('reviews', 'reviews:netflix')))
+    cache.put('spotify', entry(tags=('reviews', 'reviews:spotify')))
+    assert cache.invalidate('reviews:netflix') == 1
+    assert cache.get('netflix') is None and cache.get('spotify') is not None
+    # Réponse calculée avant une écriture qui l'invalide : pas mise en cache
+    generations = cache.generations(['reviews', 'reviews:spotify'])
+    cache.invalidate('reviews:spotify')
+    cache.put('spotify', entry(tags=('reviews', 'reviews:spotify')), generations)
+    assert cache.get('spotify') is None
+
+
+def test_reviews_etag_and_invalidation(client):
+    first = client.get('/api/reviews/netflix')
+    assert first.status_code == 200
+    etag = first.headers['etag']
+    assert etag.startswith('W/"')
+    assert first.headers['cache-control'] == 'no-cache'
+    assert client.get('/api/reviews/netflix', headers={'If-None-Match': etag}).status_code == 304
+
+    created = client.post('/api/reviews', json={
+        'appId': 'netflix', 'userName': 'Jean Test', 'rating': 5, 'comment': 'Très bon catalogue',
+    })
+    assert created.status_code == 200
+    after = client.get('/api/reviews/netflix', headers={'If-None-Match': etag})
+    assert after.status_code == 200
+    assert after.headers['etag'] != etag
+    assert [review['id'] for review in after.json()] == [created.json()['id']]
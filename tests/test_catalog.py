@@ -0,0 +1,123 @@
+import random
+
+import pytest
+
+from catalog import SORT_OPTIONS, Catalog, sort_key
+
+CATEGORIES = ['Streaming vidéo', 'Musique', 'Cloud', 'Éducation']
+
+
+def random_catalog(seed, count=60):
+    rng = random.Random(seed)
+    subscriptions = [
+        {
+            'id': f"abo-{i}",
+            'name': rng.choice(['Alpha', 'beta', 'Élan', 'zeta', 'Omega']) + f" {i}",
+            'category': rng.choice(CATEGORIES),
+            'plans': [{'name': f"Plan {j}", 'monthlyPrice': rng.choice([0.0, 2.99, 4.99, 9.99, 12.5, 20.0])}
+                      for j in range(rng.randint(1, 3))],
+        }
+        for i in range(count)
+    ]
+    return Catalog(subscriptions, [])
+
+
+def prices(sub):
+    return [plan['monthlyPrice'] for plan in sub['plans']]
+
+
+def brute_force(catalog, category, min_price, max_price, sort, price_match):
+    """Filtrage et tri par parcours complet, comme ComparisonSection côté client"""
+    low = float('-inf') if min_price is None else min_price
+    high = float('inf') if max_price is None else max_price
+    matches = []
+    for sub in catalog.subscriptions:
+        if category not in (None, 'all') and sub['category'] != category:
+            continue
+        if price_match == 'cheapest' and not low <= min(prices(sub)) <= high:
+            continue
+        if price_match == 'overlap' and (min(prices(sub)) > high or max(prices(sub)) < low):
+            continue
+        matches.append(sub)
+    keys = {
+        'name-asc': (lambda sub: sort_key(sub['name']), False),
+        'name-desc': (lambda sub: sort_key(sub['name']), True),
+        'price-asc': (lambda sub: sub['plans'][0]['monthlyPrice'], False),
+        'price-desc': (lambda sub: sub['plans'][0]['monthlyPrice'], True),
+        'category': (lambda sub: sort_key(sub['category']), False),
+    }
+    if sort is not None:
+        key, reverse = keys[sort]
+        matches.sort(key=key, reverse=reverse)
+    return matches
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('price_match', ['cheapest', 'overlap'])
+def test_query_matches_a_full_scan(seed, price_match):
+    catalog = random_catalog(seed)
+    rng = random.Random(seed)
+    for _ in range(50):
+        category = rng.choice([None, 'all', *CATEGORIES, 'Inconnue'])
+        min_price = rng.choice([None, 0.0, 2.99, 5.0, 12.5])
+        max_price = rng.choice([None, 2.99, 9.99, 15.0])
+        sort = rng.choice([None, *SORT_OPTIONS])
+        expected = brute_force(catalog, category, min_price, max_price, sort, price_match)
+        result = catalog.query(category, min_price, max_price, sort, page=1, page_size=1000, price_match=price_match)
+        assert result['total'] == len(expected)
+        if sort is None:
+            assert {sub['id'] for sub in result['items']} == {sub['id'] for sub in expected}
+        elif sort.startswith('name'):
+            assert result['items'] == expected
+        else:
+            # Ex aequo de prix ou de catégorie : seul l'ordre des clés est garanti
+            key = (lambda sub: sub['category']) if sort == 'category' else (lambda sub: sub['plans'][0]['monthlyPrice'])
+            assert [key(sub) for sub in result['items']] == [key(sub) for sub in expected]
+
+
+def test_price_bounds_are_inclusive_and_modes_differ():
+    catalog = Catalog([
+        {'id': 'a', 'name': 'A', 'category': 'Cloud', 'plans': [{'name': 'P', 'monthlyPrice': 5.0}]},
+        {'id': 'b', 'name': 'B', 'category': 'Cloud', 'plans': [
+            {'name': 'P', 'monthlyPrice': 3.0}, {'name': 'Q', 'monthlyPrice': 15.0}]},
+        {'id': 'c', 'name': 'C', 'category': 'Cloud', 'plans': [{'name': 'P', 'monthlyPrice': 20.0}]},
+    ], [])
+
+    def ids(positions):
+        return sorted(catalog.subscriptions[i]['id'] for i in positions)
+
+    assert ids(catalog.price_range(5.0, 5.0)) == ['a']
+    assert ids(catalog.price_range(4.0, 16.0)) == ['a']
+    # b : 3 à 15 €, recoupe la plage sans que son plan le moins cher y soit
+    assert ids(catalog.price_range(4.0, 16.0, 'overlap')) == ['a', 'b']
+    assert ids(catalog.price_range(15.0, None, 'overlap')) == ['b', 'c']
+    assert ids(catalog.price_range(None, 3.0, 'overlap')) == ['b']
+    with pytest.raises(ValueError):
+        catalog.price_range(None, None, 'inconnue')
+
+
+def test_pages_split_the_sorted_matches():
+    catalog = random_catalog(7)
+    full = catalog.query(sort='name-asc', page=1, page_size=1000)['items']
+    total_pages = catalog.query(page_size=7)['totalPages']
+    assert total_pages == (len(catalog) + 6) // 7
+    pages = [catalog.query(sort='name-asc', page=page, page_size=7) for page in range(1, total_pages + 2)]
+    assert [sub for page in pages for sub in page['items']] == full
+    # Au-delà de la dernière page : vide, total inchangé
+    assert pages[-1]['items'] == [] and pages[-1]['total'] == len(catalog)
+
+
+def test_subscriptions_route(client):
+    response = client.get('/api/subscriptions?category=Musique&sort=price-asc&page_size=5')
+    assert response.status_code == 200
+    page = response.json()
+    assert page['pageSize'] == 5 and len(page['items']) <= 5
+    assert all(sub['category'] == 'Musique' for sub in page['items'])
+    first_prices = [sub['plans'][0]['monthlyPrice'] for sub in page['items']]
+    assert first_prices == sorted(first_prices)
+
+    overlap = client.get('/api/subscriptions?min_price=10&max_price=12&price_match=overlap&page_size=100').json()
+    cheapest = client.get('/api/subscriptions?min_price=10&max_price=12&page_size=100').json()
+    assert cheapest['total'] <= overlap['total']
+    assert client.get('/api/subscriptions?sort=prix').status_code == 422
+    assert client.get('/api/subscriptions?price_match=tous').status_code == 422
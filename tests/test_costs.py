@@ -0,0 +1,95 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from catalog import Catalog
+from costs import CostEngine, parse_plan_ref, round_cents
+
+
+def js_round_cents(value):
+    """Math.round(value * 100) / 100, comme calculateTotalCost côté frontend"""
+    return math.floor(value * 100 + 0.5) / 100
+
+
+def random_engine(seed, count=40):
+    rng = random.Random(seed)
+    subscriptions = [
+        {
+            'id': f"abo-{i}",
+            'name': f"Abo {i}",
+            'category': 'Cloud',
+            'plans': [{'name': f"Plan {j}", 'monthlyPrice': round(rng.uniform(0, 60), 2)}
+                      for j in range(rng.randint(1, 4))],
+        }
+        for i in range(count)
+    ]
+    durations = [{'label': f"{m} mois", 'months': m, 'value': str(m)} for m in (12, 36, 60, 120)]
+    return CostEngine(Catalog(subscriptions, durations))
+
+
+def test_round_cents_matches_math_round():
+    values = [0.005, 0.015, 1.005, 2.675, 10.125, 119.88, 0.0, 1e-9, 59.994999]
+    assert round_cents(np.asarray(values)).tolist() == [js_round_cents(v) for v in values]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_totals_match_a_scalar_loop(seed):
+    engine = random_engine(seed)
+    rng = random.Random(seed)
+    plans = rng.sample(engine.refs, 15)
+    months = rng.sample(range(1, 1201), 6)
+    matrix = engine.totals(plans, months)
+    assert matrix.shape == (len(plans), len(months))
+    for row, (subscription_id, index) in zip(matrix.tolist(), plans):
+        price = engine.catalog.get(subscription_id)['plans'][index]['monthlyPrice']
+        assert row == [js_round_cents(price * m) for m in months]
+
+    basket = engine.price_basket(plans, months)
+    assert basket['months'] == months
+    assert [plan['totals'] for plan in basket['plans']] == matrix.tolist()
+    # Total du panier : somme des totaux arrondis, puis arrondie
+    assert basket['basketTotals'] == [js_round_cents(sum(column)) for column in zip(*matrix.tolist())]
+    assert basket['basketMonthly'] == js_round_cents(sum(plan['monthlyPrice'] for plan in basket['plans']))
+
+
+def test_plan_refs():
+    engine = random_engine(0)
+    assert parse_plan_ref(' abo-1 ') == ('abo-1', 0)
+    assert parse_plan_ref('abo-1:2') == ('abo-1', 2)
+    with pytest.raises(ValueError):
+        parse_plan_ref('abo-1:x')
+    with pytest.raises(ValueError):
+        parse_plan_ref('abo-1:-1')
+    with pytest.raises(KeyError):
+        engine.resolve(['abo-1', 'inconnu'])
+    with pytest.raises(KeyError):
+        engine.resolve(['abo-1:99'])
+    assert engine.default_months == [12, 36, 60, 120]
+    assert len(engine.refs) == len(engine.prices)
+
+
+def test_costs_route(client):
+    response = client.get('/api/costs?plans=netflix,spotify:0&months=1,12')
+    assert response.status_code == 200
+    body = response.json()
+    assert body['months'] == [1, 12]
+    assert [plan['id'] for plan in body['plans']] == ['netflix', 'spotify']
+    for plan in body['plans']:
+        assert plan['totals'] == [js_round_cents(plan['monthlyPrice'] * m) for m in (1, 12)]
+    assert client.get('/api/costs?plans=netflix').json()['months'] == [12, 36, 60, 120]
+
+
+@pytest.mark.parametrize('query, status', [
+    ('plans=inconnu', 404),
+    ('plans=netflix:99', 404),
+    ('plans=netflix:x', 400),
+    ('plans=netflix&months=douze', 400),
+    ('plans=netflix&months=12,1.5', 400),
+    ('plans=netflix&months=0', 400),
+    ('plans=netflix&months=1201', 400),
+    ('plans=netflix&months=' + ','.join(['12'] * 51), 400),
+])
+def test_costs_route_errors(client, query, status):
+    assert client.get(f'/api/costs?{query}').status_code == status
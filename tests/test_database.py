@@ -0,0 +1,35 @@
+from pymongo import monitoring
+
+from database import Mongo
+from health import PoolStats
+from listeners import CommandListener, ConnectionPoolListener, wrap
+from metrics import CommandMetrics, MetricsRegistry
+
+
+def test_listeners_are_pymongo_subclasses():
+    pool = wrap(PoolStats())
+    commands = wrap(CommandMetrics(MetricsRegistry()))
+    assert isinstance(pool, ConnectionPoolListener)
+    assert isinstance(pool, monitoring.ConnectionPoolListener)
+    assert isinstance(commands, CommandListener)
+    assert isinstance(commands, monitoring.CommandListener)
+
+
+def test_pool_events_reach_handler():
+    stats = PoolStats()
+    listener = wrap(stats)
+    listener.connection_created(None)
+    listener.connection_checked_out(None)
+    assert stats.open == 1
+    assert stats.checked_out == 1
+    listener.connection_checked_in(None)
+    assert stats.checked_out == 0
+
+
+def test_reviews_without_mongo_is_503(client, monkeypatch):
+    import server
+
+    monkeypatch.setattr(server, 'mongo', Mongo(None, None))
+    server.response_cache.clear()
+    response = client.get('/api/reviews/netflix')
+    assert response.status_code == 503
@@ -0,0 +1,130 @@
+import csv
+import io
+import json
+import random
+import zipfile
+from xml.etree import ElementTree
+
+import pytest
+
+from catalog import Catalog
+from costs import CostEngine
+from export import COLUMNS, HEADERS, PLANS_PER_BLOCK, iter_export_rows, stream_export, stream_xlsx
+
+SHEET = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+MONTHS = [12, 36]
+
+
+@pytest.fixture(scope='module')
+def engine():
+    rng = random.Random(0)
+    subscriptions = [
+        {
+            'id': f"abo-{i}",
+            'name': f"Abo <{i}> & co, \"spécial\"",
+            'category': 'Cloud',
+            'plans': [{'name': f"Plan {j}", 'monthlyPrice': round(rng.uniform(0, 30), 2)} for j in range(3)],
+        }
+        for i in range(250)
+    ]
+    durations = [{'label': '1 an', 'months': 12, 'value': '1y'}, {'label': '3 ans', 'months': 36, 'value': '3y'}]
+    engine = CostEngine(Catalog(subscriptions, durations))
+    # Plusieurs blocs de produits extérieurs, le dernier incomplet
+    assert PLANS_PER_BLOCK < len(engine.refs) < 2 * PLANS_PER_BLOCK
+    return engine
+
+
+def export(engine, fmt):
+    return list(stream_export(engine, fmt, engine.refs, MONTHS, with_totals=True))
+
+
+def test_rows_cross_block_boundaries(engine):
+    rows = list(iter_export_rows(engine, engine.refs, MONTHS, with_totals=True))
+    plan_rows, total_rows = rows[:-len(MONTHS)], rows[-len(MONTHS):]
+    assert len(plan_rows) == len(engine.refs) * len(MONTHS)
+    expected = engine.price_basket(engine.refs, MONTHS)
+    for position, plan in enumerate(expected['plans']):
+        for offset, total in enumerate(plan['totals']):
+            row = plan_rows[position * len(MONTHS) + offset]
+            assert (row[0], row[3], row[6], row[8]) == (plan['id'], plan['plan'], MONTHS[offset], total)
+    assert [row[7] for row in plan_rows[:2]] == ['1 an', '3 ans']
+    # Totaux cumulés bloc par bloc : identiques au calcul en une passe
+    assert [row[1] for row in total_rows] == ['TOTAL', 'TOTAL']
+    assert [row[8] for row in total_rows] == expected['basketTotals']
+    assert total_rows[0][5] == expected['basketMonthly']
+
+
+def test_csv(engine):
+    chunks = export(engine, 'csv')
+    # L'en-tête part seul, avant tout calcul
+    assert chunks[0].decode('utf-8') == ','.join(HEADERS) + '\n'
+    rows = list(csv.reader(io.StringIO(b''.join(chunks).decode('utf-8'))))
+    assert rows[0] == list(HEADERS)
+    assert len(rows) == 1 + (len(engine.refs) + 1) * len(MONTHS)
+    assert rows[1][1] == engine.catalog.subscriptions[0]['name']
+    totals = [row for row in rows if row[1] == 'TOTAL']
+    expected = engine.price_basket(engine.refs, MONTHS)
+    assert [float(row[8]) for row in totals] == expected['basketTotals']
+    assert [row[3] for row in totals] == ['', '']
+
+
+def test_ndjson(engine):
+    chunks = export(engine, 'ndjson')
+    assert len(chunks) > 1
+    assert all(chunk.endswith(b'\n') for chunk in chunks)
+    records = [json.loads(line) for line in b''.join(chunks).decode('utf-8').splitlines()]
+    assert len(records) == (len(engine.refs) + 1) * len(MONTHS)
+    assert all(list(record) == list(COLUMNS) for record in records)
+    assert records[-1]['subscriptionName'] == 'TOTAL' and records[-1]['plan'] is None
+    assert records[0]['subscriptionName'] == engine.catalog.subscriptions[0]['name']
+
+
+def test_xlsx(engine):
+    chunks = export(engine, 'xlsx')
+    with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as workbook:
+        assert workbook.testzip() is None
+        assert set(workbook.namelist()) == {
+            '[Content_Types].xml', '_rels/.rels', 'xl/workbook.xml', 'xl/_rels/workbook.xml.rels',
+            'xl/worksheets/sheet1.xml',
+        }
+        for name in workbook.namelist():
+            ElementTree.fromstring(workbook.read(name))
+        sheet = ElementTree.fromstring(workbook.read('xl/worksheets/sheet1.xml'))
+
+    def value(cell):
+        if cell.get('t') == 'inlineStr':
+            return cell.find(f'{SHEET}is/{SHEET}t').text
+        found = cell.find(f'{SHEET}v')
+        return None if found is None else float(found.text)
+
+    rows = [[value(cell) for cell in row] for row in sheet.iter(f'{SHEET}row')]
+    assert rows[0] == list(HEADERS)
+    assert len(rows) == 1 + (len(engine.refs) + 1) * len(MONTHS)
+    # Caractères XML échappés puis relus à l'identique
+    assert rows[1][1] == engine.catalog.subscriptions[0]['name']
+    assert rows[-1][1] == 'TOTAL' and rows[-1][3] is None
+    assert rows[-1][8] == engine.price_basket(engine.refs, MONTHS)['basketTotals'][-1]
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'ndjson', 'xlsx'])
+def test_export_route(client, fmt):
+    response = client.get(f'/api/export?format={fmt}&plans=netflix,spotify&months=12')
+    assert response.status_code == 200
+    assert response.headers['content-disposition'] == f'attachment; filename=mes-abonnements.{fmt}'
+    if fmt == 'csv':
+        rows = list(csv.reader(io.StringIO(response.text)))
+        assert [row[0] for row in rows[1:]] == ['netflix', 'spotify', '']
+    assert client.get(f'/api/export?format={fmt}&plans=inconnu').status_code == 404
+
+
+def test_export_route_rejects_unknown_format(client):
+    assert client.get('/api/export?format=pdf').status_code == 422
+
+
+def test_xlsx_is_streamed(engine):
+    # zlib garde la sortie compressée en tampon : il faut assez de lignes pour qu'elle parte en plusieurs fois
+    rows = iter_export_rows(engine, engine.refs, list(range(1, 41)))
+    chunks = list(stream_xlsx(rows, chunk_size=16 * 1024))
+    assert len(chunks) > 3
+    with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as workbook:
+        assert workbook.testzip() is None
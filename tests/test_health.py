@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+import pytest
+
+from health import InFlightMiddleware, InFlightRequests, MongoReadiness
+
+
+class PingDb:
+    def __init__(self, hang=False):
+        self.hang = hang
+
+    async def command(self, name):
+        if self.hang:
+            await asyncio.sleep(10)
+        return {'ok': 1.0}
+
+
+def test_readiness_follows_the_last_ping():
+    async def scenario():
+        db = PingDb()
+        readiness = MongoReadiness(lambda: db, interval=1.0, timeout=0.05)
+        await readiness.check()
+        ok = readiness.ready
+        db.hang = True
+        await readiness.check()
+        await readiness.stop()
+        return ok, readiness
+
+    ok, readiness = asyncio.run(scenario())
+    assert ok
+    assert not readiness.ready and readiness.error == 'TimeoutError' and readiness.latency is None
+
+
+def test_stale_ping_is_not_ready():
+    readiness = MongoReadiness(lambda: PingDb(), interval=1.0, timeout=0.5)
+    asyncio.run(readiness.check())
+    assert readiness.ready
+    # Boucle de ping bloquée : le dernier succès vieillit au-delà de 3 intervalles + timeout
+    readiness.checked_at = time.time() - 3.6
+    assert not readiness.ready
+    assert readiness.snapshot()['ready'] is False
+
+
+def test_ready_route(client, monkeypatch):
+    import server
+
+    readiness = MongoReadiness(lambda: server.mongo.db, interval=1.0, timeout=0.5)
+    monkeypatch.setattr(server, 'mongo_readiness', readiness)
+    assert client.get('/api/ready').status_code == 503
+
+    readiness.ok, readiness.checked_at = True, time.time()
+    response = client.get('/api/ready')
+    assert response.status_code == 200
+    assert response.json()['status'] == 'ready'
+    assert response.headers['cache-control'] == 'no-store'
+
+    readiness.checked_at = time.time() - 60
+    response = client.get('/api/ready')
+    assert response.status_code == 503
+    assert response.json()['status'] == 'unavailable'
+
+
+def test_in_flight_counter_counts_the_current_request(client):
+    import server
+
+    before = server.in_flight.total
+    body = client.get('/api/health').json()
+    # La requête de santé elle-même est en cours pendant sa mesure
+    assert body['inFlightRequests']['current'] == 1
+    assert body['inFlightRequests']['total'] == before + 1
+    assert server.in_flight.current == 0
+
+
+def test_in_flight_counter_is_released_on_errors():
+    counter = InFlightRequests()
+    seen = []
+
+    async def failing_app(scope, receive, send):
+        seen.append(counter.current)
+        raise RuntimeError("échec")
+
+    async def ignored_app(scope, receive, send):
+        seen.append(counter.current)
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await InFlightMiddleware(failing_app, counter)({'type': 'http'}, None, None)
+        await InFlightMiddleware(ignored_app, counter)({'type': 'lifespan'}, None, None)
+
+    asyncio.run(scenario())
+    assert seen == [1, 0]
+    assert counter.snapshot() == {'current': 0, 'total': 1}
@@ -0,0 +1,26 @@
+from indexes import ID_INDEX, QUERY_SHAPES, REQUIRED_INDEXES, _plan_stages, _stage_index
+
+
+def collection_of(command):
+    return next(iter(command.values()))
+
+
+def test_every_shape_expects_a_declared_index():
+    declared = {(collection, options['name']) for collection, _, options in REQUIRED_INDEXES}
+    for name, (expected, command) in QUERY_SHAPES.items():
+        collection = collection_of(command)
+        assert name.split('.')[0] == collection
+        assert expected == ID_INDEX or (collection, expected) in declared, name
+
+
+def test_shapes_cover_every_collection():
+    collections = {collection_of(command) for _, command in QUERY_SHAPES.values()}
+    assert {collection for collection, _, _ in REQUIRED_INDEXES} <= collections
+    assert {'rate_limits', 'migrations', 'spending_heads'} <= collections
+
+
+def test_plan_indexes():
+    plan = {'stage': 'UPDATE', 'inputStage': {'stage': 'FETCH', 'inputStage': {
+        'stage': 'IXSCAN', 'indexName': 'user_period_key_unique'}}}
+    assert [_stage_index(stage) for stage in _plan_stages(plan)] == [None, None, 'user_period_key_unique']
+    assert _stage_index({'stage': 'IDHACK'}) == ID_INDEX
@@ -0,0 +1,82 @@
+import asyncio
+import json
+
+import pytest
+
+from ingest import IngestTooLarge, ingest_reviews, iter_ndjson
+
+
+async def chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+def ndjson(*records) -> bytes:
+    return b"".join(
+        (record if isinstance(record, bytes) else json.dumps(record).encode()) + b"\n" for record in records
+    )
+
+
+def review(local_id=None, **fields):
+    record = {"appId": "netflix", "userName": "Jeanne Dupont", "rating": 4, "comment": "Bien", **fields}
+    if local_id:
+        record["id"] = local_id
+    return record
+
+
+async def collect(stream):
+    return [item async for item in stream]
+
+
+def test_iter_ndjson_splits_across_chunks():
+    lines = asyncio.run(collect(iter_ndjson(chunks(b'{"a":', b'1}\n\n{"b"', b':2}'))))
+    assert lines == [(1, b'{"a":1}'), (3, b'{"b":2}')]
+
+
+def test_iter_ndjson_rejects_unbounded_line():
+    with pytest.raises(IngestTooLarge):
+        asyncio.run(collect(iter_ndjson(chunks(*[b"x" * 1000] * 10), max_line_bytes=4096)))
+
+
+def test_iter_ndjson_rejects_too_many_records():
+    with pytest.raises(IngestTooLarge):
+        asyncio.run(collect(iter_ndjson(chunks(b"{}\n{}\n{}"), max_records=2)))
+    assert len(asyncio.run(collect(iter_ndjson(chunks(b"{}\n{}\n"), max_records=2)))) == 2
+
+
+def test_ingest_deduplicates_and_reports_errors(db):
+    body = ndjson(
+        review("local_1"),
+        review("local_1"),             # doublon dans le flux
+        review("local_2", rating=6),   # note invalide
+        b"{pas du json",
+        review(),                      # sans identifiant local
+    )
+    report = asyncio.run(ingest_reviews(db, iter_ndjson(chunks(body))))
+    assert (report.received, report.inserted, report.duplicates, report.invalid) == (5, 2, 1, 2)
+    assert [error["line"] for error in report.errors] == [3, 4]
+
+    async def reimport():
+        await db.reviews.create_index("localId", unique=True, sparse=True)
+        return await ingest_reviews(db, iter_ndjson(chunks(ndjson(review("local_1"), review("local_3")))))
+
+    again = asyncio.run(reimport())
+    assert (again.inserted, again.duplicates) == (1, 1)
+
+    async def stats():
+        return await db.review_stats.find_one({"appId": "netflix"})
+
+    assert asyncio.run(stats())["count"] == 3
+
+
+def test_bulk_route_requires_admin_token(client, admin_headers):
+    body = ndjson(review("local_1", helpful=999))
+    assert client.post("/api/reviews/bulk", content=body).status_code == 401
+    response = client.post("/api/reviews/bulk", content=body, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 1
+
+
+def test_bulk_route_rejects_oversize_input(client, admin_headers):
+    response = client.post("/api/reviews/bulk", content=b"x" * (70 * 1024), headers=admin_headers)
+    assert response.status_code == 413
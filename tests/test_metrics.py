@@ -0,0 +1,49 @@
+import re
+
+from metrics import MetricsRegistry
+
+SIMILAR = '/api/subscriptions/{subscription_id}/similar'
+
+
+def counters(text, name):
+    """{(méthode, route, statut): valeur} d'un compteur exposé"""
+    pattern = re.compile(rf'^{name}{{method="([^"]*)",route="([^"]*)",status="([^"]*)"}} (\S+)$', re.M)
+    return {(method, route, status): float(value) for method, route, status, value in pattern.findall(text)}
+
+
+def test_histogram_exposition():
+    registry = MetricsRegistry()
+    registry.histogram('latence', "Latence", (0.1, 1))
+    registry.counter('appels', "Appels")
+    labels = (('route', '/a"b'),)
+    for value in (0.05, 0.5, 5):
+        registry.observe('latence', labels, value)
+    registry.inc('appels', labels, 2)
+    lines = registry.render([('jauge', 'gauge', "Jauge", 3)]).splitlines()
+    assert 'appels{route="/a\\"b"} 2' in lines
+    assert [line for line in lines if line.startswith('latence_bucket')] == [
+        'latence_bucket{route="/a\\"b",le="0.1"} 1',
+        'latence_bucket{route="/a\\"b",le="1"} 2',
+        'latence_bucket{route="/a\\"b",le="+Inf"} 3',
+    ]
+    assert 'latence_count{route="/a\\"b"} 3' in lines
+    assert lines[-3:] == ['# HELP jauge Jauge', '# TYPE jauge gauge', 'jauge 3']
+
+
+def test_requests_are_labelled_by_route_template(client):
+    before = counters(client.get('/api/metrics').text, 'http_requests_total')
+    for path in ('/api/subscriptions/netflix/similar', '/api/subscriptions/spotify/similar',
+                 '/api/subscriptions/inconnu/similar', '/api/inexistant/1', '/api/inexistant/2'):
+        client.get(path)
+    text = client.get('/api/metrics').text
+    after = counters(text, 'http_requests_total')
+
+    def delta(key):
+        return after.get(key, 0) - before.get(key, 0)
+
+    assert delta(('GET', SIMILAR, '200')) == 2
+    assert delta(('GET', SIMILAR, '404')) == 1
+    # Chemins sans route : une seule série, quel que soit le chemin demandé
+    assert delta(('GET', 'unmatched', '404')) == 2
+    assert 'netflix' not in text and '/api/inexistant' not in text
+    assert f'http_request_duration_seconds_count{{method="GET",route="{SIMILAR}"}}' in text
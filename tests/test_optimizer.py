@@ -0,0 +1,124 @@
+import itertools
+import random
+
+import pytest
+
+from catalog import Catalog
+from optimizer import BasketOptimizer, BasketTooLarge
+
+CATEGORIES = ('Vidéo', 'Musique', 'Jeux')
+
+
+def random_catalog(rng: random.Random, size: int) -> Catalog:
+    subscriptions = []
+    for index in range(size):
+        prices = sorted({round(rng.uniform(2, 25), 2) for _ in range(rng.randint(1, 3))})
+        subscriptions.append({
+            'id': f'sub-{index}',
+            'name': f'Abonnement {index}',
+            'category': rng.choice(CATEGORIES),
+            'plans': [{'name': f'Plan {p}', 'monthlyPrice': price} for p, price in enumerate(prices)],
+        })
+    return Catalog(subscriptions, [])
+
+
+def brute_force(catalog, plans, budget, required, priorities, unit=1):
+    """(valeur, coût en centimes) optimaux par énumération ; None si aucune affectation valide"""
+    choices = []
+    for sub_id, current in plans.items():
+        sub = catalog.get(sub_id)
+        price = sub['plans'][current]['monthlyPrice']
+        options = [None] + [i for i, plan in enumerate(sub['plans']) if plan['monthlyPrice'] <= price]
+        choices.append((sub, options))
+    best = None
+    for combination in itertools.product(*(options for _, options in choices)):
+        cost = value = 0
+        kept = set()
+        for (sub, _), plan in zip(choices, combination):
+            if plan is None:
+                continue
+            cents = int(round(sub['plans'][plan]['monthlyPrice'] * 100))
+            cost += -(-cents // unit) * unit
+            value += int(round(priorities.get(sub['id'], 1.0) * 1000))
+            kept.add(sub['category'])
+        if cost > int(round(budget * 100)) // unit * unit or not required <= kept:
+            continue
+        if best is None or (value, -cost) > (best[0], -best[1]):
+            best = (value, cost)
+    return best
+
+
+def solution(catalog, result, priorities):
+    kept = [a for a in result['assignments'] if a['plan'] is not None]
+    value = sum(int(round(priorities.get(a['id'], 1.0) * 1000)) for a in kept)
+    cost = sum(int(round(a['monthlyPrice'] * 100)) for a in kept)
+    return value, cost
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_dp_matches_brute_force(seed):
+    rng = random.Random(seed)
+    catalog = random_catalog(rng, 6)
+    plans = {sub['id']: rng.randrange(len(sub['plans'])) for sub in catalog.subscriptions}
+    priorities = {sub_id: rng.choice((0.5, 1.0, 2.0)) for sub_id in plans}
+    required = set(rng.sample(sorted({sub['category'] for sub in catalog.subscriptions}), 1))
+    budget = round(rng.uniform(5, 60), 2)
+
+    result = BasketOptimizer(catalog).optimize(
+        plans, budget=budget, required_categories=required, priorities=priorities
+    )
+    expected = brute_force(catalog, plans, budget, required, priorities)
+    if expected is None:
+        assert not result['feasible']
+        return
+    assert result['feasible']
+    assert solution(catalog, result, priorities) == expected
+    assert result['costResolution'] == 0.01
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_coarse_cost_unit_respects_budget(seed):
+    rng = random.Random(seed)
+    catalog = random_catalog(rng, 6)
+    plans = {sub['id']: len(sub['plans']) - 1 for sub in catalog.subscriptions}
+    budget = round(rng.uniform(10, 50), 2)
+
+    # 6 abonnements × budget en centimes ne tient pas dans 1000 cases : dizaines de centimes ou euros
+    result = BasketOptimizer(catalog).optimize(plans, budget=budget, required_categories=[], max_cells=1000)
+    unit = int(round(result['costResolution'] * 100))
+    assert unit in (10, 100)
+    value, cost = solution(catalog, result, {})
+    assert cost <= budget * 100
+    assert value == brute_force(catalog, plans, budget, set(), {}, unit=unit)[0]
+
+
+def test_table_too_large():
+    catalog = random_catalog(random.Random(0), 6)
+    plans = {sub['id']: len(sub['plans']) - 1 for sub in catalog.subscriptions}
+    optimizer = BasketOptimizer(catalog)
+    with pytest.raises(BasketTooLarge):
+        optimizer.optimize(plans, budget=20, max_cells=10)
+    # Budget suffisant : pas de programmation dynamique, donc pas de limite
+    assert optimizer.table_size(plans, budget=1000, max_cells=10) == 0
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_sufficient_budget_matches_brute_force(seed):
+    rng = random.Random(seed)
+    catalog = random_catalog(rng, 6)
+    plans = {sub['id']: rng.randrange(len(sub['plans'])) for sub in catalog.subscriptions}
+    # Priorités nulles : résiliés comme dans la programmation dynamique, sauf pour couvrir une catégorie requise
+    priorities = {sub_id: rng.choice((0.0, 0.0, 1.0, 2.0)) for sub_id in plans}
+    required = set(rng.sample(sorted({sub['category'] for sub in catalog.subscriptions}), 1))
+    optimizer = BasketOptimizer(catalog)
+    assert optimizer.table_size(plans, budget=1000) == 0
+
+    expected = brute_force(catalog, plans, 1000, required, priorities)
+    for budget in (None, 1000):
+        result = optimizer.optimize(plans, budget=budget, required_categories=required, priorities=priorities)
+        assert result['feasible']
+        assert solution(catalog, result, priorities) == expected
+        dropped = {a['id'] for a in result['assignments'] if a['action'] == 'drop'}
+        covering = {a['id'] for a in result['assignments'] if a['category'] in required and a['plan'] is not None}
+        assert dropped <= {sub_id for sub_id, priority in priorities.items() if priority == 0}
+        assert covering
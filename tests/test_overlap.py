@@ -0,0 +1,57 @@
+import random
+from itertools import combinations
+from pathlib import Path
+
+import pytest
+
+from catalog import Catalog
+from overlap import OverlapIndex, name_tokens
+
+CATALOG_PATH = Path(__file__).resolve().parent.parent / 'frontend' / 'src' / 'data' / 'subscriptions.json'
+
+
+@pytest.fixture(scope='module')
+def index():
+    return OverlapIndex(Catalog.from_file(CATALOG_PATH))
+
+
+def brute_force(index, ids, threshold=0.65):
+    """Toutes les paires du panier comparées une à une"""
+    pairs = [tuple(sorted(pair)) for pair in combinations(ids, 2)]
+    return index._report(pairs, threshold)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_basket_matches_all_pairs(index, seed):
+    ids = random.Random(seed).sample(list(index.grams), 40)
+    assert index.basket_overlaps(ids) == brute_force(index, ids)
+
+
+def test_name_variants():
+    assert name_tokens('Disney+') == name_tokens('Disney Plus') == ('disney',)
+    assert name_tokens('Spotify Premium') == ('spotify',)
+    assert name_tokens('Premium') == ('premium',)
+
+
+def test_same_and_similar_names():
+    subscriptions = [
+        {'id': 'a', 'name': 'Disney+', 'category': 'Streaming vidéo', 'plans': [{'name': 'A', 'monthlyPrice': 9.99}]},
+        {'id': 'b', 'name': 'Disney Plus', 'category': 'Streaming vidéo',
+         'plans': [{'name': 'B', 'monthlyPrice': 11.99}]},
+        {'id': 'c', 'name': 'HBO Max', 'category': 'Streaming vidéo', 'plans': [{'name': 'C', 'monthlyPrice': 9.99}]},
+        {'id': 'd', 'name': 'Max', 'category': 'Cloud', 'plans': [{'name': 'D', 'monthlyPrice': 5.0}]},
+        {'id': 'e', 'name': 'Notion', 'category': 'Productivité', 'plans': [{'name': 'E', 'monthlyPrice': 8.0}]},
+    ]
+    index = OverlapIndex(Catalog(subscriptions, []))
+    reasons = {
+        (o['subscription1']['id'], o['subscription2']['id']): o['reason']
+        for o in index.basket_overlaps(['a', 'b', 'c', 'd', 'e'])
+    }
+    assert reasons[('a', 'b')] == 'same-name'
+    assert reasons[('c', 'd')] == 'similar-name'
+    assert reasons[('a', 'c')] == 'same-category'
+    assert not any('e' in pair for pair in reasons)
+    same = index.basket_overlaps(['b', 'a'])[0]
+    assert same['recommendation'] == {'keep': 'a', 'monthlyPrice': 9.99, 'savings': 2.0}
+    with pytest.raises(KeyError):
+        index.basket_overlaps(['a', 'inconnu'])
@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import pytest
+
+from packed import FORMAT_VERSION, PackedCatalog, PackedFormatError, packed_filename
+from snapshot import CatalogPaths, build_snapshot
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'frontend' / 'src' / 'data'
+PATHS = CatalogPaths(
+    DATA_DIR / 'subscriptions.json',
+    DATA_DIR / 'enrichedSubscriptions.json',
+    DATA_DIR / 'categoryTranslations.json',
+    DATA_DIR / 'promoCodes.json',
+)
+
+
+def packed_path(packed_dir, snapshot):
+    return packed_dir / packed_filename(snapshot.version, snapshot.similar_k)
+
+
+def test_packed_snapshot_matches_json(tmp_path):
+    from_json = build_snapshot(PATHS, 1, 8, eager=False)
+    built = build_snapshot(PATHS, 1, 8, packed_dir=tmp_path, eager=False)
+    mapped = build_snapshot(PATHS, 2, 8, packed_dir=tmp_path, eager=False)
+    path = packed_path(tmp_path, mapped)
+    assert path.name.startswith(f'catalog-f{FORMAT_VERSION}-{mapped.version}-')
+    assert [p.name for p in tmp_path.glob('*.bin')] == [path.name]
+    for snapshot in (built, mapped):
+        assert snapshot.packed is not None
+        # Le catalogue lit les enregistrements projetés, sans copie remplacée après coup
+        assert snapshot.catalog.subscriptions is snapshot.packed.subscriptions
+        assert list(snapshot.catalog.subscriptions) == from_json.catalog.subscriptions
+        assert snapshot.enriched == from_json.enriched
+
+
+def test_records_are_decoded_on_each_read(tmp_path):
+    snapshot = build_snapshot(PATHS, 1, 8, packed_dir=tmp_path, eager=False)
+    records = snapshot.packed.subscriptions
+    # Aucune copie conservée : chaque lecture décode un nouveau dictionnaire depuis la projection
+    first = records[0]
+    assert first == records[0] and first is not records[0]
+    first['plans'].clear()
+    assert records[0]['plans']
+    assert records[-1] == list(records)[-1] == records[len(records) - 1]
+    assert records[:2] == [records[0], records[1]]
+
+
+def test_truncated_file_is_rejected_and_rebuilt(tmp_path):
+    snapshot = build_snapshot(PATHS, 1, 8, packed_dir=tmp_path, eager=False)
+    path = packed_path(tmp_path, snapshot)
+    data = path.read_bytes()
+    path.write_bytes(data[:-8])
+    with pytest.raises(PackedFormatError):
+        PackedCatalog(path)
+    path.write_bytes(data)
+    with pytest.raises(PackedFormatError):
+        PackedCatalog(path, version='0' * 16)
+
+    path.write_bytes(data[:-8])
+    rebuilt = build_snapshot(PATHS, 2, 8, packed_dir=tmp_path, eager=False)
+    assert rebuilt.packed is not None
+    assert list(rebuilt.catalog.subscriptions) == list(snapshot.catalog.subscriptions)
+
+
+def test_body_checksum_is_verified_on_demand(tmp_path):
+    snapshot = build_snapshot(PATHS, 1, 8, packed_dir=tmp_path, eager=False)
+    path = packed_path(tmp_path, snapshot)
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+    # Une ouverture ordinaire ne relit pas tout le fichier ; l'écrivain, lui, vérifie
+    assert len(PackedCatalog(path).subscriptions) == len(snapshot.catalog)
+    with pytest.raises(PackedFormatError):
+        PackedCatalog(path, verify=True)
@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from promos import PromoCodes, parse_expiry
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def promo(code, expires_at=None, active=True):
+    return {'code': code, 'description': code, 'discount': '-10%', 'expiresAt': expires_at, 'isActive': active}
+
+
+def codes(promos, app_id):
+    return [p['code'] for p in promos.get(app_id)[1]]
+
+
+def sample():
+    return {
+        'netflix': [promo('FIN-JUIN', '2026-06-30'), promo('MARS', '2026-03-01'), promo('SANS-FIN'),
+                    promo('INACTIF', '2027-01-01', active=False), promo('PASSE', '2025-06-30')],
+        'spotify': [promo('AVRIL', '2026-04-01T12:00:00+02:00')],
+        'vide': [promo('PASSE', '2025-01-01')],
+    }
+
+
+def test_only_live_codes_are_served_by_expiry():
+    promos = PromoCodes(sample(), now=NOW)
+    assert codes(promos, 'netflix') == ['SANS-FIN', 'MARS', 'FIN-JUIN']
+    assert codes(promos, 'vide') == []
+    assert promos.get('inconnue') == (0, [])
+    assert promos.version == 0
+    assert promos.next_expiry() == datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+def test_expiry_is_midnight_utc_unless_an_offset_is_given():
+    assert parse_expiry('2026-06-30') == datetime(2026, 6, 30, tzinfo=timezone.utc)
+    assert parse_expiry('2026-04-01T12:00:00+02:00') == datetime(2026, 4, 1, 10, tzinfo=timezone.utc)
+
+
+def test_sweeps_expire_codes_and_bump_only_touched_apps():
+    promos = PromoCodes(sample(), now=NOW)
+    assert promos.sweep(NOW + timedelta(days=1)) == set()
+    assert promos.version == 0
+
+    # La veille de l'échéance, puis l'échéance elle-même (incluse)
+    assert promos.sweep(datetime(2026, 2, 28, 23, 59, tzinfo=timezone.utc)) == set()
+    assert promos.sweep(datetime(2026, 3, 1, tzinfo=timezone.utc)) == {'netflix'}
+    assert promos.version == 1 and promos.get('netflix')[0] == 1
+    assert codes(promos, 'netflix') == ['SANS-FIN', 'FIN-JUIN']
+    # Application non touchée : ni ses codes ni sa version ne changent
+    assert promos.get('spotify')[0] == 0 and codes(promos, 'spotify') == ['AVRIL']
+
+    assert promos.sweep(datetime(2027, 1, 1, tzinfo=timezone.utc)) == {'netflix', 'spotify'}
+    assert promos.version == 2
+    assert promos.get('netflix')[0] == promos.get('spotify')[0] == 2
+    assert codes(promos, 'netflix') == ['SANS-FIN'] and codes(promos, 'spotify') == []
+    assert promos.next_expiry() is None
+
+
+def test_reloaded_codes_continue_the_version():
+    previous = PromoCodes(sample(), now=NOW)
+    previous.sweep(datetime(2026, 3, 1, tzinfo=timezone.utc))
+    reloaded = PromoCodes(sample(), now=NOW, version=previous.version + 1)
+    assert reloaded.get('netflix')[0] == 2
+
+
+def test_scheduled_sweep_runs_at_the_next_expiry():
+    soon = (datetime.now(timezone.utc) + timedelta(milliseconds=100)).isoformat()
+    later = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+
+    async def scenario():
+        promos = PromoCodes({'netflix': [promo('BIENTOT', soon), promo('DEMAIN', later)]})
+        assert codes(promos, 'netflix') == ['BIENTOT', 'DEMAIN']
+        promos.start()
+        await asyncio.sleep(0.4)
+        await promos.stop()
+        return promos
+
+    promos = asyncio.run(scenario())
+    assert codes(promos, 'netflix') == ['DEMAIN']
+    assert promos.version == 1
+
+
+def test_promo_codes_route_version(client):
+    import server
+
+    first = client.get('/api/promo-codes/netflix')
+    assert first.status_code == 200
+    version = int(first.headers['x-promo-version'])
+    live = [p['code'] for p in first.json()]
+    assert live
+
+    promos = server.catalog_store.latest.promo_codes
+    expiries = [p['expiresAt'] for p in first.json() if p.get('expiresAt')]
+    assert promos.sweep(parse_expiry(min(expiries))) >= {'netflix'}
+    second = client.get('/api/promo-codes/netflix')
+    assert int(second.headers['x-promo-version']) == version + 1
+    assert len(second.json()) < len(live)
+    assert client.get('/api/promo-codes/inconnue').json() == []
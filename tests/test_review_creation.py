@@ -0,0 +1,46 @@
+import server
+
+REVIEW = {"appId": "netflix", "userName": "Jeanne Dupont", "rating": 5, "comment": "Très bien"}
+
+
+def post(client, body=REVIEW, key=None):
+    headers = {"Idempotency-Key": key} if key else {}
+    return client.post("/api/reviews", json=body, headers=headers)
+
+
+def test_rate_limit_per_client_and_app(client):
+    for _ in range(server.review_limiter.burst):
+        assert post(client).status_code == 200
+    limited = post(client)
+    assert limited.status_code == 429
+    assert "Retry-After" in limited.headers
+    # Autre application : autre seau
+    assert post(client, {**REVIEW, "appId": "spotify"}).status_code == 200
+
+
+def test_idempotent_retry_is_replayed_without_a_token(client):
+    first = post(client, key="essai-1")
+    assert first.status_code == 200
+    # Épuiser le seau : la nouvelle tentative doit quand même rejouer la réponse
+    while post(client).status_code != 429:
+        pass
+    retry = post(client, key="essai-1")
+    assert retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json()["id"] == first.json()["id"]
+    summary = client.get("/api/reviews/netflix/summary").json()
+    assert summary["count"] == server.review_limiter.burst
+
+
+def test_reused_key_with_other_body_is_rejected(client):
+    assert post(client, key="essai-2").status_code == 200
+    response = post(client, {**REVIEW, "rating": 1}, key="essai-2")
+    assert response.status_code == 422
+
+
+def test_keys_are_scoped_by_app(client):
+    netflix = post(client, key="essai-3")
+    spotify = post(client, {**REVIEW, "appId": "spotify"}, key="essai-3")
+    assert spotify.status_code == 200
+    assert "Idempotent-Replayed" not in spotify.headers
+    assert spotify.json()["id"] != netflix.json()["id"]
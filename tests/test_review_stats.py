@@ -0,0 +1,77 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import reviews
+from reviews import STATS_MARKER, ensure_review_stats, rebuild_review_stats_exclusive, review_stats_pipeline
+
+
+def test_pipeline_matches_reviews(db):
+    ratings = {'netflix': [5, 4, 4, 1], 'spotify': [3]}
+
+    async def scenario():
+        await db.reviews.insert_many([
+            {'appId': app_id, 'rating': rating} for app_id, values in ratings.items() for rating in values
+        ])
+        # $merge n'existe pas dans mongomock : seules les étapes de calcul sont vérifiées
+        return await db.reviews.aggregate(review_stats_pipeline()).to_list(None)
+
+    rows = {row['appId']: row for row in asyncio.run(scenario())}
+    assert rows['netflix'] == {
+        'appId': 'netflix', 'count': 4, 'ratingSum': 14,
+        'histogram': {'1': 1, '2': 0, '3': 0, '4': 2, '5': 1},
+    }
+    assert rows['spotify']['count'] == 1
+    assert rows['spotify']['histogram']['3'] == 1
+
+
+def test_rebuild_runs_once_then_only_when_forced(db):
+    async def scenario():
+        first = await rebuild_review_stats_exclusive(db)
+        again = await rebuild_review_stats_exclusive(db)
+        forced = await rebuild_review_stats_exclusive(db, force=True)
+        return first, again, forced, await db.migrations.find_one({'_id': STATS_MARKER})
+
+    first, again, forced, marker = asyncio.run(scenario())
+    assert (first, again, forced) == (0, None, 0)
+    assert marker['state'] == 'done'
+    assert marker['lockedUntil'] is None
+
+
+def test_held_lock_blocks_even_forced_rebuild(db):
+    async def scenario():
+        await db.migrations.insert_one({
+            '_id': STATS_MARKER, 'state': 'building', 'owner': 'autre',
+            'lockedUntil': datetime.utcnow() + timedelta(minutes=5),
+        })
+        held = await rebuild_review_stats_exclusive(db, force=True)
+        await db.migrations.update_one(
+            {'_id': STATS_MARKER}, {'$set': {'lockedUntil': datetime.utcnow() - timedelta(seconds=1)}}
+        )
+        expired = await rebuild_review_stats_exclusive(db)
+        return held, expired
+
+    assert asyncio.run(scenario()) == (None, 0)
+
+
+def test_failed_rebuild_is_retried(db, monkeypatch):
+    async def failing(db):
+        raise RuntimeError('panne')
+
+    async def scenario():
+        monkeypatch.setattr(reviews, 'rebuild_review_stats', failing)
+        await ensure_review_stats(db)
+        failed = await db.migrations.find_one({'_id': STATS_MARKER})
+        monkeypatch.undo()
+        await ensure_review_stats(db)
+        return failed, await db.migrations.find_one({'_id': STATS_MARKER})
+
+    failed, done = asyncio.run(scenario())
+    assert failed['state'] == 'failed'
+    assert done['state'] == 'done'
+
+
+def test_admin_rebuild_route(client, admin_headers):
+    assert client.post('/api/admin/reviews/stats/rebuild').status_code == 401
+    response = client.post('/api/admin/reviews/stats/rebuild', headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json() == {'apps': 0}
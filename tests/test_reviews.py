@@ -0,0 +1,74 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+from reviews import decode_cursor, encode_cursor, fetch_reviews_page
+
+
+def review_documents(count, seed=0):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    # Horodatages en double : l'id départage
+    documents = [
+        {'id': f"avis-{i:04d}", 'appId': 'netflix', 'createdAt': start + timedelta(minutes=rng.randint(0, 20)),
+         'userName': 'Test', 'rating': 4, 'comment': 'Bien', 'date': '01/01/2024', 'helpful': 0, 'userInitials': 'T'}
+        for i in range(count)
+    ]
+    documents.append({**documents[0], 'id': 'autre-app', 'appId': 'spotify'})
+    return documents
+
+
+async def all_pages(db, limit):
+    pages, cursor = [], None
+    while True:
+        page, cursor = await fetch_reviews_page(db, 'netflix', limit, cursor)
+        pages.append(page)
+        if cursor is None:
+            return pages
+
+
+def test_pages_cover_every_review_once_in_order(db):
+    documents = review_documents(47)
+
+    async def scenario():
+        await db.reviews.insert_many([dict(doc) for doc in documents])
+        return await all_pages(db, 10)
+
+    pages = asyncio.run(scenario())
+    assert [len(page) for page in pages] == [10, 10, 10, 10, 7]
+    ids = [review['id'] for page in pages for review in page]
+    expected = sorted((doc for doc in documents if doc['appId'] == 'netflix'),
+                      key=lambda doc: (doc['createdAt'], doc['id']), reverse=True)
+    assert ids == [doc['id'] for doc in expected]
+    assert all('_id' not in review for page in pages for review in page)
+
+
+def test_cursor_is_stable_under_new_reviews(db):
+    documents = review_documents(30, seed=1)
+
+    async def scenario():
+        await db.reviews.insert_many([dict(doc) for doc in documents])
+        first, cursor = await fetch_reviews_page(db, 'netflix', 10, None)
+        # Un avis publié entre deux pages ne décale pas la suite
+        await db.reviews.insert_one({**documents[0], 'id': 'nouveau', 'createdAt': datetime(2030, 1, 1)})
+        second, _ = await fetch_reviews_page(db, 'netflix', 10, cursor)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    seen = {review['id'] for review in first}
+    assert not seen & {review['id'] for review in second}
+    assert 'nouveau' not in {review['id'] for review in second}
+    assert (second[0]['createdAt'], second[0]['id']) < (first[-1]['createdAt'], first[-1]['id'])
+
+
+def test_cursor_round_trip_and_invalid(client):
+    review = {'createdAt': datetime(2024, 5, 6, 7, 8, 9, 123000), 'id': 'abc|def'}
+    assert decode_cursor(encode_cursor(review)) == (review['createdAt'], review['id'])
+    assert client.get('/api/reviews/netflix?cursor=pas-un-curseur').status_code == 400
+
+
+def test_cached_lists_still_document_their_model(client):
+    paths = client.get('/openapi.json').json()['paths']
+    for path, model in (('/api/reviews/{app_id}', 'Review'), ('/api/status', 'StatusCheck')):
+        schema = paths[path]['get']['responses']['200']['content']['application/json']['schema']
+        assert schema['type'] == 'array' and schema['items']['$ref'].endswith(f'/{model}')
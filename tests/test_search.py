@@ -0,0 +1,88 @@
+import pytest
+
+from catalog import Catalog
+from search import SearchIndex
+
+
+def plan(price):
+    return [{'name': 'Standard', 'monthlyPrice': price}]
+
+
+SUBSCRIPTIONS = [
+    {'id': 'netflix', 'name': 'Netflix', 'logo': '', 'color': '', 'category': 'Streaming vidéo', 'plans': plan(13.49)},
+    {'id': 'disney-plus', 'name': 'Disney+', 'logo': '', 'color': '', 'category': 'Streaming vidéo',
+     'plans': plan(9.99)},
+    {'id': 'deezer', 'name': 'Deezer', 'logo': '', 'color': '', 'category': 'Musique', 'plans': plan(11.99)},
+    {'id': 'spotify', 'name': 'Spotify', 'logo': '', 'color': '', 'category': 'Musique', 'plans': plan(10.99)},
+    {'id': 'notion', 'name': 'Notion', 'logo': '', 'color': '', 'category': 'Productivité', 'plans': plan(8.0)},
+]
+ENRICHED = {
+    'netflix': {'features': ['Téléchargement hors ligne'], 'descriptionEn': 'Original series and films'},
+    'deezer': {'description': 'Écoute en haute qualité, paroles synchronisées'},
+}
+TRANSLATIONS = {'Streaming vidéo': 'Video streaming', 'Musique': 'Music', 'Productivité': 'Productivity'}
+
+
+@pytest.fixture(scope='module')
+def index():
+    return SearchIndex(Catalog(SUBSCRIPTIONS, []), ENRICHED, TRANSLATIONS)
+
+
+def ids(index, query, **kwargs):
+    return [item['id'] for item in index.search(query, **kwargs)['items']]
+
+
+@pytest.mark.parametrize('query', ['productivite', 'PRODUCTIVITÉ', 'Productivité', 'productivity'])
+def test_category_is_accent_and_language_insensitive(index, query):
+    assert ids(index, query) == ['notion']
+
+
+@pytest.mark.parametrize('query,expected', [
+    ('telechargement', 'netflix'),
+    ('téléchargement', 'netflix'),
+    ('ecoute', 'deezer'),
+    ('synchronisees', 'deezer'),
+    ('original series', 'netflix'),
+])
+def test_features_and_descriptions_fr_en(index, query, expected):
+    assert ids(index, query) == [expected]
+
+
+@pytest.mark.parametrize('query,expected', [
+    ('netflx', 'netflix'),
+    ('netfllix', 'netflix'),
+    ('spotfy', 'spotify'),
+    ('deezr', 'deezer'),
+])
+def test_one_typo_is_tolerated(index, query, expected):
+    assert ids(index, query)[0] == expected
+
+
+def test_short_words_are_not_fuzzy(index):
+    assert ids(index, 'xyz') == []
+
+
+def test_prefix_and_name_ranking(index):
+    assert ids(index, 'netf') == ['netflix']
+    assert ids(index, 'disney p') == ['disney-plus']
+    # Le nom pèse plus que la catégorie : « music » classe la musique, « streaming » la vidéo
+    assert set(ids(index, 'music')) == {'deezer', 'spotify'}
+    assert set(ids(index, 'streaming')) == {'netflix', 'disney-plus'}
+
+
+def test_words_combine_with_and(index):
+    assert ids(index, 'streaming netflix') == ['netflix']
+    assert ids(index, 'musique notion') == []
+
+
+def test_category_filter_and_limit(index):
+    assert ids(index, 'streaming', category='Musique') == []
+    result = index.search('music', limit=1)
+    assert result['total'] == 2
+    assert len(result['items']) == 1
+
+
+def test_search_route(client):
+    response = client.get('/api/search', params={'q': 'netflx'})
+    assert response.status_code == 200
+    assert response.json()['items'][0]['id'] == 'netflix'
@@ -0,0 +1,53 @@
+import copy
+import random
+
+import numpy as np
+import pytest
+
+from catalog import Catalog
+from similar import SimilarityTable
+from snapshot import build_snapshot
+
+from .test_packed import PATHS
+
+
+@pytest.fixture(scope='module')
+def snapshot():
+    return build_snapshot(PATHS, 1, 8, eager=False)
+
+
+def modified(snapshot, seed, count):
+    """Copie du catalogue et des données enrichies avec ``count`` abonnements modifiés"""
+    rng = random.Random(seed)
+    subscriptions = copy.deepcopy(list(snapshot.catalog.subscriptions))
+    enriched = copy.deepcopy(snapshot.enriched)
+    categories = sorted({sub['category'] for sub in subscriptions})
+    features = sorted({feature for entry in enriched.values() for feature in entry.get('features') or []})
+    changed = rng.sample(subscriptions, count)
+    for sub in changed:
+        for plan in sub['plans']:
+            plan['monthlyPrice'] = round(plan['monthlyPrice'] * rng.uniform(0.3, 3), 2)
+        if rng.random() < 0.5:
+            sub['category'] = rng.choice(categories)
+        entry = enriched.setdefault(sub['id'], {})
+        if rng.random() < 0.5:
+            entry['features'] = rng.sample(features, min(4, len(features)))
+    return Catalog(subscriptions, snapshot.catalog.duration_options), enriched, changed
+
+
+@pytest.mark.parametrize('seed,count', [(seed, count) for seed in range(4) for count in (1, 3, 10)])
+def test_incremental_update_equals_full_rebuild(snapshot, seed, count):
+    table = copy.deepcopy(snapshot.similarity_table)
+    catalog, enriched, changed = modified(snapshot, seed, count)
+    for sub in changed:
+        table.update(sub, enriched.get(sub['id']))
+    rebuilt = SimilarityTable(catalog, enriched, k=8)
+    assert not np.array_equal(rebuilt.neighbours, snapshot.similarity_table.neighbours)
+    np.testing.assert_array_equal(table.neighbours, rebuilt.neighbours)
+    np.testing.assert_allclose(table.scores, rebuilt.scores, rtol=1e-6)
+
+
+def test_similar_limit_is_bounded_by_k(client):
+    sub_id = client.get('/api/subscriptions?page=1').json()['items'][0]['id']
+    assert len(client.get(f'/api/subscriptions/{sub_id}/similar?limit=8').json()) == 8
+    assert client.get(f'/api/subscriptions/{sub_id}/similar?limit=9').status_code == 422
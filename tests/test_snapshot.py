@@ -0,0 +1,101 @@
+import asyncio
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from similar import SimilarityTable
+from snapshot import CatalogError, CatalogPaths, CatalogStore
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'frontend' / 'src' / 'data'
+PATHS = CatalogPaths(
+    DATA_DIR / 'subscriptions.json',
+    DATA_DIR / 'enrichedSubscriptions.json',
+    DATA_DIR / 'categoryTranslations.json',
+    DATA_DIR / 'promoCodes.json',
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    paths = CatalogPaths(*(tmp_path / path.name for path in PATHS.all()))
+    for source, target in zip(PATHS.all(), paths.all()):
+        if source.exists():
+            shutil.copy(source, target)
+    return CatalogStore(paths, similar_k=8, watch_interval=0)
+
+
+def edit_catalog(store, edit):
+    data = json.loads(store.paths.catalog.read_text(encoding='utf-8'))
+    edit(data)
+    store.paths.catalog.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    return data
+
+
+def test_unchanged_files_keep_the_snapshot(store):
+    snapshot, replaced = asyncio.run(store.reload())
+    assert not replaced
+    assert snapshot is store.latest
+    assert snapshot.generation == 1
+
+
+def test_reload_swaps_a_new_snapshot(store):
+    first = store.latest
+    first.build_indexes()
+    old_price = first.catalog.subscriptions[0]['plans'][0]['monthlyPrice']
+
+    def double_first_price(data):
+        data['subscriptions'][0]['plans'][0]['monthlyPrice'] = old_price * 2
+
+    data = edit_catalog(store, double_first_price)
+    snapshot, replaced = asyncio.run(store.reload())
+    assert replaced
+    assert store.latest is snapshot
+    assert snapshot.generation == 2
+    assert snapshot.version != first.version
+    assert snapshot.catalog.subscriptions[0]['plans'][0]['monthlyPrice'] == old_price * 2
+    # L'instantané précédent, encore servi aux requêtes épinglées, n'a pas bougé
+    assert first.catalog.subscriptions[0]['plans'][0]['monthlyPrice'] == old_price
+    # Table héritée puis mise à jour : identique à un calcul complet
+    rebuilt = SimilarityTable(snapshot.catalog, snapshot.enriched, k=8)
+    np.testing.assert_array_equal(snapshot.similarity_table.neighbours, rebuilt.neighbours)
+    assert len(snapshot.catalog) == len(data['subscriptions'])
+
+
+def test_warm_builds_the_deferred_indexes_off_the_loop(store):
+    snapshot = store.latest
+    assert 'similarity_table' not in vars(snapshot)
+
+    async def scenario():
+        store.start()
+        task = store.warm()
+        # Une seule construction à la fois
+        assert store.warm() is task
+        await task
+        await store.stop()
+
+    asyncio.run(scenario())
+    assert {'cost_engine', 'basket_optimizer', 'similarity_table'} <= set(vars(snapshot))
+
+
+def test_invalid_catalog_is_refused(store):
+    first = store.latest
+
+    def break_price(data):
+        data['subscriptions'][0]['plans'][0]['monthlyPrice'] = 'gratuit'
+
+    edit_catalog(store, break_price)
+    with pytest.raises(CatalogError):
+        asyncio.run(store.reload())
+    assert store.latest is first
+    assert store.failures == 1
+    assert 'subscriptions.0' in store.last_error
+
+
+def test_responses_carry_the_catalog_version(client):
+    import server
+
+    response = client.get('/api/categories')
+    assert response.headers['x-catalog-version'] == server.catalog_store.latest.version
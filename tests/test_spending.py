@@ -0,0 +1,133 @@
+import asyncio
+import random
+from datetime import datetime, timezone
+
+import server
+from models import SpendingSnapshotCreate
+from spending import append_snapshot, get_evolution, get_snapshot, rebuild_spending_rollups
+
+USER = 'utilisateur-de-test'
+GRANULARITIES = ('month', 'year')
+
+
+def random_snapshots(seed, count=60):
+    rng = random.Random(seed)
+    items = {}
+    snapshots = []
+    for _ in range(count):
+        for _ in range(rng.randint(1, 3)):
+            item_id = f"app-{rng.randint(0, 15)}"
+            if item_id in items and rng.random() < 0.4:
+                del items[item_id]
+            else:
+                price = rng.choice([4.99, 9.99, 13.49])
+                items[item_id] = {'id': item_id, 'name': item_id.upper(), 'monthlyPrice': price}
+        subscriptions = sorted(items.values(), key=lambda item: item['id'])
+        total = round(sum(item['monthlyPrice'] for item in subscriptions), 2)
+        # Horodatages dans le désordre : la dernière valeur d'une période suit l'horodatage
+        moment = datetime(rng.randint(2021, 2023), rng.randint(1, 12), rng.randint(1, 28), tzinfo=timezone.utc)
+        snapshots.append(SpendingSnapshotCreate(
+            totalMonthly=total, totalYearly=round(total * 12, 2), subscriptionCount=len(subscriptions),
+            subscriptions=subscriptions, timestamp=int(moment.timestamp() * 1000) + rng.randint(0, 999),
+        ))
+    return snapshots
+
+
+def expected_points(snapshots, length):
+    periods = {}
+    for seq, snapshot in enumerate(snapshots, start=1):
+        key = datetime.fromtimestamp(snapshot.timestamp / 1000, tz=timezone.utc).strftime('%Y-%m')[:length]
+        periods.setdefault(key, []).append((snapshot.timestamp, seq, snapshot))
+    points = []
+    for key in sorted(periods):
+        entries = periods[key]
+        totals = [snapshot.totalMonthly for _, _, snapshot in entries]
+        last = max(entries, key=lambda entry: entry[:2])[2]
+        points.append({
+            'date': key, 'snapshots': len(entries), 'totalMonthly': last.totalMonthly,
+            'subscriptionCount': last.subscriptionCount, 'minMonthly': min(totals), 'maxMonthly': max(totals),
+            'averageMonthly': round(sum(totals) / len(totals), 2),
+        })
+    return points
+
+
+def summary(points):
+    keys = ('date', 'snapshots', 'totalMonthly', 'subscriptionCount', 'minMonthly', 'maxMonthly', 'averageMonthly')
+    return [{key: point[key] for key in keys} for point in points]
+
+
+def test_rollups_and_rebuild_match_history(db):
+    snapshots = random_snapshots(7)
+
+    async def scenario():
+        for snapshot in snapshots:
+            await append_snapshot(db, USER, snapshot)
+        incremental = {
+            granularity: await get_evolution(db, USER, granularity, limit=240) for granularity in GRANULARITIES
+        }
+        # Petits lots : plusieurs bulk_write successifs
+        assert await rebuild_spending_rollups(db, USER, batch_size=7) == len(snapshots)
+        rebuilt = {granularity: await get_evolution(db, USER, granularity, limit=240) for granularity in GRANULARITIES}
+        replayed = [await get_snapshot(db, USER, seq) for seq in range(1, len(snapshots) + 1)]
+        return incremental, rebuilt, replayed
+
+    incremental, rebuilt, replayed = asyncio.run(scenario())
+    for granularity, length in (('month', 7), ('year', 4)):
+        assert summary(incremental[granularity]['points']) == expected_points(snapshots, length)
+        assert rebuilt[granularity] == incremental[granularity]
+    for snapshot, stored in zip(snapshots, replayed):
+        assert stored['subscriptions'] == [item.model_dump() for item in snapshot.subscriptions]
+
+
+def test_unchanged_snapshot_is_not_appended(db):
+    snapshot = random_snapshots(3, count=1)[0]
+
+    async def scenario():
+        return [await append_snapshot(db, USER, snapshot) for _ in range(2)]
+
+    first, second = asyncio.run(scenario())
+    assert first['unchanged'] is False
+    assert second == {'seq': 1, 'date': first['date'], 'unchanged': True}
+
+
+def issue(client):
+    response = client.post('/api/spending')
+    assert response.status_code == 201
+    credentials = response.json()
+    return credentials['user'], {'X-Spending-Secret': credentials['secret']}
+
+
+def test_routes_require_the_issued_secret(client):
+    user, headers = issue(client)
+    other, other_headers = issue(client)
+    body = {'totalMonthly': 9.99, 'totalYearly': 119.88, 'subscriptionCount': 1}
+    assert client.post(f'/api/spending/{user}/snapshots', json=body).status_code == 401
+    assert client.post(f'/api/spending/{user}/snapshots', json=body, headers=other_headers).status_code == 401
+    assert client.get(f'/api/spending/{user}/evolution').status_code == 401
+    assert client.get(f'/api/spending/{user}/snapshots/1').status_code == 401
+    assert client.delete(f'/api/spending/{user}').status_code == 401
+    # Identifiant jamais délivré
+    assert client.get('/api/spending/inconnu-1234/evolution', headers=headers).status_code == 401
+
+    assert client.post(f'/api/spending/{user}/snapshots', json=body, headers=headers).status_code == 200
+    assert len(client.get(f'/api/spending/{user}/evolution', headers=headers).json()['points']) == 1
+    assert client.get(f'/api/spending/{user}/snapshots/1', headers=headers).status_code == 200
+    assert client.get(f'/api/spending/{other}/evolution', headers=other_headers).json()['points'] == []
+    assert client.delete(f'/api/spending/{user}', headers=headers).json() == {'deleted': 1}
+
+
+def test_appends_are_rate_limited_per_user(client, monkeypatch):
+    monkeypatch.setattr(server.spending_limiter, 'burst', 3)
+    user, headers = issue(client)
+    other, other_headers = issue(client)
+    statuses = [
+        client.post(f'/api/spending/{user}/snapshots', headers=headers, json={
+            'totalMonthly': total, 'totalYearly': total * 12, 'subscriptionCount': 1,
+        }).status_code
+        for total in (1, 2, 3, 4)
+    ]
+    assert statuses == [200, 200, 200, 429]
+    response = client.post(f'/api/spending/{other}/snapshots', headers=other_headers, json={
+        'totalMonthly': 1, 'totalYearly': 12, 'subscriptionCount': 1,
+    })
+    assert response.status_code == 200
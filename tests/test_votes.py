@@ -0,0 +1,81 @@
+import asyncio
+
+from starlette.requests import Request
+
+from cache import ResponseCache
+from votes import HelpfulVoteBuffer
+
+
+class PausedCollection:
+    """bulk_write appliqué à MongoDB, puis suspendu avant de rendre la main au buffer"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.written = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def bulk_write(self, operations, ordered=True):
+        result = await self.collection.bulk_write(operations, ordered=ordered)
+        self.written.set()
+        await self.release.wait()
+        return result
+
+
+def reviews_request():
+    scope = {'type': 'http', 'method': 'GET', 'path': '/api/reviews/netflix', 'query_string': b'', 'headers': []}
+    return Request(scope)
+
+
+def test_read_during_flush_is_not_cached_with_votes_counted_twice(db):
+    cache = ResponseCache()
+
+    async def scenario():
+        await db.reviews.insert_one({'id': 'r1', 'appId': 'netflix', 'helpful': 0})
+        collection = PausedCollection(db.reviews)
+        votes = HelpfulVoteBuffer(
+            lambda: collection,
+            on_flush=lambda app_ids: cache.invalidate(*(f"reviews:{app_id}" for app_id in app_ids)),
+        )
+
+        async def compute():
+            reviews = await db.reviews.find({'appId': 'netflix'}, {'_id': 0}).to_list(10)
+            votes.apply_pending(reviews)
+            return reviews, {}
+
+        async def read():
+            response = await cache.respond(reviews_request(), ['reviews', 'reviews:netflix'], compute)
+            return response.body
+
+        votes.add('netflix', 'r1', 2)
+        flush = asyncio.ensure_future(votes.flush())
+        await collection.written.wait()
+        # Votes déjà dans MongoDB et encore en cours d'écriture : comptés deux fois, le temps de cette lecture
+        during = await read()
+        collection.release.set()
+        assert await flush == 2
+        return during, await read(), await db.reviews.find_one({'id': 'r1'})
+
+    during, after, stored = asyncio.run(scenario())
+    assert b'"helpful":4' in during
+    assert stored['helpful'] == 2
+    assert b'"helpful":2' in after
+
+
+def test_failed_flush_requeues_and_invalidates(db):
+    flushed = []
+
+    class Failing:
+        async def bulk_write(self, operations, ordered=True):
+            raise RuntimeError("indisponible")
+
+    async def scenario():
+        votes = HelpfulVoteBuffer(lambda: Failing(), on_flush=flushed.append)
+        votes.add('netflix', 'r1')
+        votes.add('spotify', 'r2')
+        assert await votes.flush() == 0
+        return votes
+
+    votes = asyncio.run(scenario())
+    assert flushed == [{'netflix', 'spotify'}]
+    assert votes.pending_for('netflix', 'r1') == 1
+    assert votes.flush_errors == 1